@@ -0,0 +1,130 @@
+# Import modules
+import threading
+from eth_utils import event_abi_to_log_topic
+from web3 import Web3
+
+# Settled deltas kept for collection, the oldest are dropped beyond this
+SETTLED_LIMIT = 1000
+
+
+# Running native, wrapped native and index balances of one account, moved by the logs and gas in the receipts of its own transactions
+class Ledger:
+    def __init__(
+        self,
+        address,
+        index_token_contract,
+        wrapped_native_contract,
+        native_payers,
+        reconcile_interval,
+    ):
+        self.address = address
+        self.index_address = index_token_contract.address
+        # Contracts that unwrap the native token and pay it out in our transactions, the payout itself leaves no log
+        self.native_payers = {Web3.to_checksum_address(i) for i in native_payers}
+        self.reconcile_interval = reconcile_interval
+        # (contract address, topic) -> event
+        self.events = {
+            (contract.address, event_abi_to_log_topic(event.abi)): event
+            for contract, event_names in [
+                (index_token_contract, ["Transfer"]),
+                (wrapped_native_contract, ["Transfer", "Deposit", "Withdrawal"]),
+            ]
+            for event in [getattr(contract.events, i)() for i in event_names]
+        }
+        # Value sent with each transaction not yet settled, and the deltas of settled ones until they are collected
+        self.pending = {}
+        self.settled = {}
+        # None until the first reconcile
+        self.balances = None
+        self.applied = 0
+        self.lock = threading.Lock()
+
+    def expect(self, transaction_hash, value):
+        with self.lock:
+            self.pending[Web3.to_hex(transaction_hash)] = value
+
+    def deltas(self, receipt, value):
+        # Gas is paid whether or not the transaction reverted
+        deltas = {
+            "native": -receipt["gasUsed"] * receipt["effectiveGasPrice"],
+            "wrapped": 0,
+            "index": 0,
+        }
+        if receipt["status"] == 0:
+            return deltas
+        deltas["native"] -= value
+        for log in receipt["logs"]:
+            address = Web3.to_checksum_address(log["address"])
+            event = self.events.get((address, bytes(log["topics"][0])))
+            if event is None:
+                continue
+            asset = "index" if address == self.index_address else "wrapped"
+            # Arguments are read by position, WETH names them src/dst/wad and the index from/to/value
+            args = list(event.process_log(log)["args"].values())
+            if event.event_name == "Transfer":
+                if args[1] == self.address:
+                    deltas[asset] += args[2]
+                if args[0] == self.address:
+                    deltas[asset] -= args[2]
+            elif event.event_name == "Deposit":
+                if args[0] == self.address:
+                    deltas["wrapped"] += args[1]
+            elif event.event_name == "Withdrawal":
+                if args[0] == self.address:
+                    deltas["wrapped"] -= args[1]
+                    deltas["native"] += args[1]
+                elif args[0] in self.native_payers:
+                    deltas["native"] += args[1]
+        return deltas
+
+    def drop(self, transaction_hash):
+        # A replaced transaction never gets a receipt of its own
+        with self.lock:
+            self.pending.pop(Web3.to_hex(transaction_hash), None)
+
+    def apply(self, receipt):
+        transaction_hash = Web3.to_hex(receipt["transactionHash"])
+        with self.lock:
+            # A receipt can reach the ledger from more than one waiter, it only counts once
+            if transaction_hash in self.settled:
+                return self.settled[transaction_hash]
+            deltas = self.deltas(receipt, self.pending.pop(transaction_hash, 0))
+            self.settled[transaction_hash] = deltas
+            if len(self.settled) > SETTLED_LIMIT:
+                del self.settled[next(iter(self.settled))]
+            if self.balances is not None:
+                for asset in deltas:
+                    self.balances[asset] += deltas[asset]
+            self.applied += 1
+            return deltas
+
+    def collect(self, transaction_hashes):
+        # Deltas of settled transactions, handed out once
+        with self.lock:
+            return [self.settled.pop(Web3.to_hex(i)) for i in transaction_hashes]
+
+    def due(self):
+        # Reconcile once enough receipts were applied, and only while nothing is in flight so the chain and the ledger agree
+        with self.lock:
+            return len(self.pending) == 0 and (
+                self.balances is None or self.applied >= self.reconcile_interval
+            )
+
+    def reconcile(self, native, wrapped, index):
+        with self.lock:
+            if self.balances is not None:
+                drift = {
+                    "native": native - self.balances["native"],
+                    "wrapped": wrapped - self.balances["wrapped"],
+                    "index": index - self.balances["index"],
+                }
+                print(f"Ledger drift for {self.address} after reconcile: {drift}")
+            self.balances = {"native": native, "wrapped": wrapped, "index": index}
+            self.applied = 0
+
+    def invalidate(self):
+        # The chain state went back, e.g. a fork revert, so balances are read again at the next reconcile
+        with self.lock:
+            self.pending.clear()
+            self.balances = None
+            self.applied = 0
@@ -0,0 +1,61 @@
+# Import modules
+import threading
+from collections import OrderedDict
+
+
+# Bounded LRU of contract reads keyed by (chain, provider, block, contract, call, args)
+class BlockCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        # Latest block seen per (chain, provider), older entries are dropped when it moves
+        self.latest_blocks = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(chain_id, provider, block_number, contract, fn_name, args):
+        return (chain_id, provider, block_number, contract.address, fn_name, repr(args))
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, self.entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def advance(self, chain_id, provider, block_number):
+        # Invalidate everything read at older blocks once a new block arrives
+        with self.lock:
+            if self.latest_blocks.get((chain_id, provider), -1) >= block_number:
+                return
+            self.latest_blocks[(chain_id, provider)] = block_number
+            for key in [
+                i
+                for i in self.entries
+                if i[0] == chain_id and i[1] == provider and i[2] < block_number
+            ]:
+                del self.entries[key]
+
+    def invalidate(self, chain_id, provider):
+        # Drop every entry for a provider whose state was rewound, e.g. a reverted fork
+        with self.lock:
+            self.latest_blocks.pop((chain_id, provider), None)
+            for key in [
+                i for i in self.entries if i[0] == chain_id and i[1] == provider
+            ]:
+                del self.entries[key]
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
@@ -0,0 +1,29 @@
+# Import modules
+import threading
+
+
+# Attribute kept per thread, so venues evaluated concurrently each see their own mode, provider and snapshot
+class ThreadLocal:
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def state(self, instance):
+        # One threading.local per instance, created on first use
+        return instance.__dict__.setdefault("_thread_state", threading.local())
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return getattr(self.state(instance), self.name, None)
+
+    def __set__(self, instance, value):
+        setattr(self.state(instance), self.name, value)
+
+
+def run_in_threads(*functions):
+    # Run each function on its own thread and wait for all of them, so one slow chain does not hold up another
+    threads = [threading.Thread(target=i) for i in functions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
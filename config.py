@@ -2,8 +2,6 @@
 ethereum_index_helper = "0x76Dd4189d73f07e7B11350CfFc9B503627fc7a3b"
 avalanche_index_helper = "0xaCef72ef3AFEb044845f0869586445e5C6c2504a"
 
-pdi_weth_pool = "0xF5FE7ea8537CBd9E5e7b81A93828F48037D220c2"
-
 # PDI contract address
 pdi_address = "0x632806BF5c8f062932Dd121244c9fbe7becb8B48"
 
@@ -14,12 +12,6 @@ cai_address = "0x48f88A3fE843ccb0b5003e70B4192c1d7448bEf0"
 pdi_decimals = 1e18
 index_helper_decimals = 1e6
 
-# Index router contract address - ethereum
-index_router = "0x1985426d77c431fc95E5Ca51547BcB9b793E8482"
-
-# Index router contract address - Avalanche
-index_router_avax = "0xD6dd95610fC3A3579a2C32fe06158d8bfB8F4eE9"
-
 # Uniswap swap router
 uniswap_swap_router = "0xE592427A0AEce92De3Edee1F18E0157C05861564"
 
@@ -61,3 +53,117 @@ gas_multiplier = 1.1
 
 # 0x gas multiplier
 zero_ex_multiplier = 1.5
+
+# Multicall3 address (same deployment on ethereum and avalanche)
+multicall3 = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# Uniswap v3 subgraph used to load initialized ticks
+uniswap_v3_subgraph = "https://api.thegraph.com/subgraphs/name/uniswap/uniswap-v3"
+
+# Seconds a pool's tick ladder from the subgraph is reused before it is paged through again
+tick_ladder_ttl = 600
+
+# Typical gas used by a single pool Uniswap v3 swap, used when the swap is simulated off-chain
+uniswap_v3_swap_gas = 130000
+
+# Bins fetched either side of the TJ v2 active bin, and the furthest a walk may go from it
+tj_v2_bin_window = 50
+tj_v2_max_bins = 500
+
+# CoinGecko ids fetched together by the price service
+coingecko_assets = ["ethereum", "avalanche-2"]
+
+# Seconds a cached price is fresh, and how long a stale price may be served while it refreshes
+price_cache_ttl = 30
+price_cache_stale_ttl = 120
+
+# Calls memoized per block, the cache size and how long the head block number is reused
+block_memoized_calls = {
+    "totalEvaluation",
+    "anatomy",
+    "inactiveAnatomy",
+    "burnTokensAmount",
+}
+block_cache_size = 256
+block_number_ttl = 1
+
+# Share of the mint/burn value lost to 0x swap fees and slippage, used by the local profit model
+mint_burn_cost = 0.005
+
+# Gas used by both arb legs together before a fork simulation has measured it
+arb_gas_estimate = {1: 1500000, 43114: 2500000}
+
+# Indices and the pools each is traded on, read once at startup
+venues_file = "venues.json"
+
+# Steps a route's size is split across pools in, each step going to the pool with the best marginal output
+route_chunks = 20
+
+# Trade size search: upper bound as a multiple of the push-to-NAV size, grid points and tolerance in wei
+sizing_search_multiplier = 1.25
+sizing_grid_points = 32
+sizing_tolerance = 1e15
+
+# Blocks between reloads of the constituent amounts behind one index token, and between NAV checks against totalEvaluation
+nav_balance_refresh_blocks = 300
+nav_check_interval = 100
+# Largest relative difference between the off-chain NAV and totalEvaluation that is still traded on
+nav_drift_tolerance = 0.005
+
+# 0x API limits for our tier: requests per second, burst size, concurrent requests, 429 retries and base backoff in seconds
+zero_ex_rate_limit = 5
+zero_ex_burst = 10
+zero_ex_max_workers = 10
+zero_ex_max_retries = 3
+zero_ex_backoff = 0.5
+
+# Seconds and blocks a 0x quote may be reused for, so the live BUILD step reuses the quotes the fork simulation validated
+zero_ex_quote_ttl = 20
+zero_ex_quote_block_window = {1: 2, 43114: 10}
+
+# Local ports of the warm Ganache forks for each chain, one route simulates on each at a time, and how many blocks a fork may lag the head before re-forking
+ganache_fork_ports = {1: [8545], 43114: [8546, 8547]}
+fork_max_lag = {1: 25, 43114: 150}
+
+# Fork simulation backend, "ganache" or "py-evm" for the in-process EVM, and how many state loads one request may need
+simulation_backend = "ganache"
+evm_fork_max_loads = 50
+
+# Connections kept alive per host by the shared HTTP session
+http_pool_size = 10
+
+# Headroom on gas used from a debug_traceCall trace, which leaves out refunds and the 63/64 gas forwarded to sub-calls that estimate_gas covers
+trace_gas_headroom = 1.2
+
+# Share of the simulated leg 1 output the pre-built leg 2 spends, leaving room for the real output to come in slightly lower
+leg_2_amount_share = 0.999
+
+# Fee oracle per chain: blocks of fee history kept, reward percentile taken as the typical priority fee, blocks of maximum base fee growth a max fee covers and share of an arb's expected profit bid on top of the typical priority fee
+fee_history_blocks = {1: 20, 43114: 20}
+fee_reward_percentile = 50
+fee_blocks_ahead = {1: 2, 43114: 2}
+priority_fee_profit_share = 0.1
+
+# Contracts that unwrap the native token and pay it out to us, and transactions applied to the ledger between checks against on-chain balances
+native_payers = {1: [], 43114: [trader_joe_router]}
+ledger_reconcile_interval = 20
+
+# Fee increase when replacing a pending leg 2 with an empty transaction, nodes require at least 10%
+cancel_fee_bump = 1.2
+
+# Run both arb legs in one transaction through the arb executor in solidity/ArbExecutor.sol, deployed on the fork during preflight
+atomic_execution = False
+arb_executor_address = {1: None, 43114: None}
+
+# Compiler the arb executor artifact is built and checked with, py-solc-x is only needed to rebuild it
+solc_version = "0.8.19"
+
+# Receipt polling per chain: seconds between batched polls and confirmations before a transaction counts as settled, then seconds to give up after
+receipt_poll_interval = {1: 2, 43114: 0.5}
+receipt_confirmations = {1: 1, 43114: 1}
+receipt_timeout = 300
+
+# Event-driven mode per chain: absolute NAV delta that starts sizing, blocks between NAV refreshes, and seconds between polls on endpoints without websockets
+event_delta_band = {1: 0.005, 43114: 0.005}
+event_nav_refresh_blocks = {1: 5, 43114: 30}
+event_poll_interval = {1: 2, 43114: 1}
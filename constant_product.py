@@ -0,0 +1,82 @@
+# Import modules
+from fractions import Fraction
+from math import isqrt
+
+
+def get_amount_out(
+    amount_in, reserve_in, reserve_out, fee_numerator=997, fee_denominator=1000
+):
+    # UniswapV2Library.getAmountOut with the pool fee applied to the input
+    amount_in_with_fee = amount_in * fee_numerator
+    return (amount_in_with_fee * reserve_out) // (
+        reserve_in * fee_denominator + amount_in_with_fee
+    )
+
+
+def optimal_nav_arb(
+    reserve_index,
+    reserve_native,
+    nav_price,
+    premium,
+    fee_numerator=997,
+    fee_denominator=1000,
+):
+    # Profit maximising trade against a V2-style pool when the index can be minted or burned at nav_price (native wei per index wei)
+    nav_price = Fraction(nav_price)
+    if premium:
+        # Mint dx index at NAV and sell it into the pool: maximise out(dx) - nav * dx
+        root = isqrt(
+            fee_numerator
+            * fee_denominator
+            * reserve_index
+            * reserve_native
+            * nav_price.denominator
+            // nav_price.numerator
+        )
+        optimum = (root - fee_denominator * reserve_index) // fee_numerator
+
+        def profit(index_amount):
+            output = get_amount_out(
+                index_amount,
+                reserve_index,
+                reserve_native,
+                fee_numerator,
+                fee_denominator,
+            )
+            # Native spent minting the index, rounded up
+            cost = -(-index_amount * nav_price.numerator // nav_price.denominator)
+            return cost, output, output - cost
+
+    else:
+        # Buy index with dy native and burn it at NAV: maximise nav * out(dy) - dy
+        root = isqrt(
+            fee_numerator
+            * fee_denominator
+            * reserve_index
+            * reserve_native
+            * nav_price.numerator
+            // nav_price.denominator
+        )
+        optimum = (root - fee_denominator * reserve_native) // fee_numerator
+
+        def profit(native_amount):
+            output = get_amount_out(
+                native_amount,
+                reserve_native,
+                reserve_index,
+                fee_numerator,
+                fee_denominator,
+            )
+            value = output * nav_price.numerator // nav_price.denominator
+            return native_amount, output, value - native_amount
+
+    if optimum <= 0:
+        return {"size": 0, "output": 0, "profit": 0}
+    # The integer optimum is either side of the floored root
+    size, output, best_profit = max(
+        (profit(optimum), profit(optimum + 1)), key=lambda i: i[2]
+    )
+    if best_profit <= 0:
+        return {"size": 0, "output": 0, "profit": 0}
+    # Size is always the native amount put into the arb
+    return {"size": size, "output": output, "profit": best_profit}
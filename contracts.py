@@ -0,0 +1,86 @@
+# Import modules
+import abis
+import json
+import threading
+from web3 import Web3
+
+# Functions and events the bot uses from each ABI, everything else is trimmed before building contracts
+abi_members = {
+    "uniswap_v3_pool": ["slot0", "liquidity", "fee", "tickSpacing", "Swap"],
+    "index_helper": ["totalEvaluation"],
+    "pdi_token": [
+        "anatomy",
+        "inactiveAnatomy",
+        "registry",
+        "balanceOf",
+        "approve",
+        "Transfer",
+    ],
+    "index_router": ["mintSwapValue", "burnSwapValue", "burnTokensAmount"],
+    "price_oracle": ["lastAssetPerBaseInUQ", "refreshedAssetPerBaseInUQ"],
+    "uniswap_swap_router": ["exactInputSingle"],
+    "uniswap_quoter": ["quoteExactOutputSingle"],
+    "weth": [
+        "deposit",
+        "withdraw",
+        "balanceOf",
+        "approve",
+        "Deposit",
+        "Withdrawal",
+        "Transfer",
+    ],
+    "trader_joe_v1": ["getReserves", "Swap", "Sync"],
+    "trader_joe_v2": [
+        "getActiveId",
+        "getBin",
+        "getStaticFeeParameters",
+        "getVariableFeeParameters",
+        "getSwapIn",
+        "Swap",
+        "DepositedToBins",
+        "WithdrawnFromBins",
+    ],
+    "trader_joe_router": ["swapExactNATIVEForTokens", "swapExactTokensForNATIVE"],
+    "index_registry": ["priceOracle"],
+    "arb_executor": ["execute", "owner"],
+    "multicall3": ["aggregate3", "getBlockNumber", "getCurrentBlockTimestamp"],
+}
+
+
+# Parses each ABI once and hands out cached contract objects per (provider, address, ABI)
+class ContractRegistry:
+    def __init__(self):
+        self.abis = {}
+        self.contracts = {}
+        self.lock = threading.Lock()
+
+    def abi(self, abi_name):
+        if abi_name not in self.abis:
+            parsed = json.loads(getattr(abis, abi_name))
+            members = abi_members.get(abi_name)
+            # Keep only the members we call or decode, ABIs without an entry are kept whole
+            self.abis[abi_name] = (
+                parsed
+                if members is None
+                else [i for i in parsed if i.get("name") in members]
+            )
+        return self.abis[abi_name]
+
+    def get(self, w3_provider, address, abi_name):
+        # Keyed on the endpoint so contracts survive a Web3 object being rebuilt for the same node
+        key = (w3_provider.provider.endpoint_uri, address, abi_name)
+        contract = self.contracts.get(key)
+        if contract is None:
+            with self.lock:
+                contract = self.contracts.get(key)
+                if contract is None:
+                    contract = w3_provider.eth.contract(
+                        address=Web3.to_checksum_address(address),
+                        abi=self.abi(abi_name),
+                    )
+                    self.contracts[key] = contract
+        return contract
+
+
+# Shared by every bot
+registry = ContractRegistry()
@@ -0,0 +1,147 @@
+# Import modules
+import asyncio
+import json
+import queue
+import threading
+import time
+import websockets
+from eth_utils import event_abi_to_log_topic
+from web3 import Web3
+from web3._utils.method_formatters import log_entry_formatter
+from web3.datastructures import AttributeDict
+
+
+# Streams new heads and pool events from a websocket subscription, or from polling eth_getLogs on HTTP-only endpoints
+class EventWatcher:
+    def __init__(self, w3_provider, ws_endpoint, pool_events, poll_interval):
+        self.w3 = w3_provider
+        self.ws_endpoint = ws_endpoint
+        # pool address -> contract events to watch on it
+        self.pool_events = {
+            Web3.to_checksum_address(pool): events
+            for pool, events in pool_events.items()
+        }
+        self.topics = {
+            event_abi_to_log_topic(event.abi): event
+            for events in self.pool_events.values()
+            for event in events
+        }
+        self.poll_interval = poll_interval
+        # ("block", head, None) and ("event", head seen when it arrived, decoded event) in arrival order
+        self.notifications = queue.Queue()
+        self.head_block = None
+        self.thread = None
+
+    def start(self):
+        target = self.subscribe if self.ws_endpoint is not None else self.poll
+        self.thread = threading.Thread(target=target, daemon=True)
+        self.thread.start()
+
+    def decode(self, log):
+        event = self.topics.get(bytes(log["topics"][0]))
+        if event is None or log.get("removed", False):
+            return None
+        return event.process_log(log)
+
+    def notify_head(self, block_number):
+        if self.head_block is None or block_number > self.head_block:
+            self.head_block = block_number
+            self.notifications.put(("block", block_number, None))
+
+    def notify_log(self, log):
+        decoded = self.decode(log)
+        if decoded is not None:
+            # The log's own block can be the head itself or older if it was seen late
+            self.notifications.put(
+                ("event", max(self.head_block or 0, decoded["blockNumber"]), decoded)
+            )
+
+    def log_filter(self):
+        return {
+            "address": list(self.pool_events),
+            "topics": [[Web3.to_hex(i) for i in self.topics]],
+        }
+
+    def poll(self):
+        last_block = None
+        while True:
+            try:
+                head_block = self.w3.eth.block_number
+                if last_block is None:
+                    last_block = head_block
+                elif head_block > last_block:
+                    logs = self.w3.eth.get_logs(
+                        {
+                            **self.log_filter(),
+                            "fromBlock": last_block + 1,
+                            "toBlock": head_block,
+                        }
+                    )
+                    self.notify_head(head_block)
+                    for log in logs:
+                        self.notify_log(log)
+                    last_block = head_block
+            except Exception as e:
+                print(f"Event poll failed: {e}")
+            time.sleep(self.poll_interval)
+
+    def subscribe(self):
+        while True:
+            try:
+                asyncio.run(self.stream())
+            except Exception as e:
+                # Resubscribe after a dropped connection, events missed meanwhile are caught by the next sizing pass
+                print(f"Event subscription dropped: {e}")
+                time.sleep(self.poll_interval)
+
+    async def stream(self):
+        async with websockets.connect(self.ws_endpoint) as websocket:
+            subscriptions = {}
+            for i, params in enumerate([["newHeads"], ["logs", self.log_filter()]]):
+                await websocket.send(
+                    json.dumps(
+                        {
+                            "jsonrpc": "2.0",
+                            "id": i,
+                            "method": "eth_subscribe",
+                            "params": params,
+                        }
+                    )
+                )
+                response = json.loads(await websocket.recv())
+                subscriptions[response["result"]] = params[0]
+            async for message in websocket:
+                params = json.loads(message).get("params")
+                if params is None or params["subscription"] not in subscriptions:
+                    continue
+                if subscriptions[params["subscription"]] == "newHeads":
+                    self.notify_head(int(params["result"]["number"], 16))
+                else:
+                    self.notify_log(
+                        AttributeDict.recursive(log_entry_formatter(params["result"]))
+                    )
+
+
+# Blocks between a pool event and the head when it was seen
+class LatencyStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.lock = threading.Lock()
+
+    def record(self, event_block, seen_block):
+        latency = seen_block - event_block
+        with self.lock:
+            self.count += 1
+            self.total += latency
+            self.max = max(self.max, latency)
+        return latency
+
+    def stats(self):
+        with self.lock:
+            return {
+                "events": self.count,
+                "mean_blocks": self.total / self.count if self.count > 0 else 0,
+                "max_blocks": self.max,
+            }
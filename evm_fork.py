@@ -0,0 +1,406 @@
+# Import modules
+import requests
+from eth.db.account import AccountDB
+from eth.vm.forks.shanghai import ShanghaiVM
+from eth.vm.forks.shanghai.state import ShanghaiState
+from eth_tester import EthereumTester, PyEVMBackend
+from eth_account import Account
+from eth_utils import to_canonical_address, to_checksum_address
+from web3 import Web3
+from web3.providers.eth_tester import EthereumTesterProvider
+
+# Balance given to the simulation account, matches the Ganache fork's -e 100000
+FUNDED_BALANCE = 100000 * 10**18
+
+# Requests that may touch state the fork has not loaded yet
+STATE_METHODS = {
+    "eth_call",
+    "eth_estimateGas",
+    "eth_sendRawTransaction",
+    "eth_sendTransaction",
+    "eth_getBalance",
+    "eth_getCode",
+    "eth_getStorageAt",
+    "eth_getTransactionCount",
+}
+
+# Position of the block tag in the params of the requests that take one
+BLOCK_PARAMS = {
+    "eth_call": 1,
+    "eth_estimateGas": 1,
+    "eth_getBalance": 1,
+    "eth_getCode": 1,
+    "eth_getStorageAt": 2,
+    "eth_getTransactionCount": 1,
+}
+
+# Block tags that are not pinned to a block number
+NAMED_BLOCKS = {"latest", "pending", "earliest", "safe", "finalized"}
+
+
+# Fetches accounts and storage slots from the forked chain in batched JSON-RPC requests
+class StateLoader:
+    def __init__(self, endpoint, block_number):
+        self.endpoint = endpoint
+        self.block = hex(block_number)
+        self.session = requests.Session()
+        # Falls back to loading misses only if the node has no debug_traceCall
+        self.prestate_supported = True
+
+    def batch(self, calls):
+        if len(calls) == 0:
+            return []
+        response = self.session.post(
+            self.endpoint,
+            json=[
+                {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+                for i, (method, params) in enumerate(calls)
+            ],
+        ).json()
+        results = {i["id"]: i for i in response}
+        for i in results.values():
+            if "error" in i:
+                raise ValueError(f"State load failed: {i['error']}")
+        return [results[i]["result"] for i in range(len(calls))]
+
+    def accounts(self, addresses):
+        addresses = list(addresses)
+        results = self.batch(
+            [
+                (method, [to_checksum_address(address), self.block])
+                for address in addresses
+                for method in [
+                    "eth_getBalance",
+                    "eth_getTransactionCount",
+                    "eth_getCode",
+                ]
+            ]
+        )
+        return {
+            address: (
+                int(results[i * 3], 16),
+                int(results[i * 3 + 1], 16),
+                bytes.fromhex(results[i * 3 + 2][2:]),
+            )
+            for i, address in enumerate(addresses)
+        }
+
+    def slots(self, keys):
+        keys = list(keys)
+        results = self.batch(
+            [
+                (
+                    "eth_getStorageAt",
+                    [to_checksum_address(address), hex(slot), self.block],
+                )
+                for address, slot in keys
+            ]
+        )
+        return {key: int(result, 16) for key, result in zip(keys, results)}
+
+    def prestate(self, transaction):
+        # Every account and slot the call touches on the forked chain, in one request
+        if not self.prestate_supported or transaction.get("to") is None:
+            return {}, {}
+        call = {
+            i: transaction[i]
+            for i in ["from", "to", "data", "input", "value", "gas"]
+            if i in transaction
+        }
+        try:
+            (trace,) = self.batch(
+                [
+                    (
+                        "debug_traceCall",
+                        [
+                            call,
+                            self.block,
+                            {
+                                "tracer": "prestateTracer",
+                                # The simulation account is not funded on the real chain
+                                "stateOverrides": {
+                                    call["from"]: {"balance": hex(FUNDED_BALANCE)}
+                                }
+                                if "from" in call
+                                else {},
+                            },
+                        ],
+                    )
+                ]
+            )
+        except ValueError as e:
+            print(f"Prestate prefetch unavailable, loading state on demand: {e}")
+            self.prestate_supported = False
+            return {}, {}
+        accounts = {}
+        slots = {}
+        for address, state in trace.items():
+            address = to_canonical_address(address)
+            accounts[address] = (
+                int(state.get("balance", "0x0"), 16),
+                int(state.get("nonce", 0)),
+                bytes.fromhex(state.get("code", "0x")[2:]),
+            )
+            for slot, value in state.get("storage", {}).items():
+                slots[(address, int(slot, 16))] = int(value, 16)
+        return accounts, slots
+
+
+# Account database that records reads of accounts and slots the fork has not loaded
+class RecordingAccountDB(AccountDB):
+    fork = None
+
+    def _get_encoded_account(self, address, from_journal=True):
+        if address not in self.fork.accounts:
+            self.fork.account_misses.add(address)
+        elif self.fork.loaded_after_pin(self.fork.account_blocks, address):
+            self.fork.stale_reads.add(address)
+        return super()._get_encoded_account(address, from_journal)
+
+    def get_storage(self, address, slot, from_journal=True):
+        if (address, slot) not in self.fork.slots:
+            self.fork.slot_misses.add((address, slot))
+        elif self.fork.loaded_after_pin(self.fork.slot_blocks, (address, slot)):
+            self.fork.stale_reads.add((address, slot))
+        return super().get_storage(address, slot, from_journal)
+
+
+# Loads missing state and re-runs a request until it has touched only loaded state
+class ForkedTesterProvider(EthereumTesterProvider):
+    def __init__(self, fork):
+        super().__init__(fork.tester)
+        self.fork = fork
+        self.endpoint_uri = fork.endpoint
+
+    def make_request(self, method, params):
+        if method not in STATE_METHODS:
+            return super().make_request(method, params)
+        if method in ("eth_call", "eth_estimateGas"):
+            self.fork.prefetch(params[0])
+        sending = method in ("eth_sendRawTransaction", "eth_sendTransaction")
+        for _ in range(self.fork.max_loads):
+            # Loads mine a new block, so the block tag is resolved again on every attempt
+            pinned_params, pinned_block = self.fork.pin(method, params)
+            self.fork.account_misses.clear()
+            self.fork.slot_misses.clear()
+            self.fork.stale_reads.clear()
+            snapshot_id = self.fork.tester.backend.take_snapshot() if sending else None
+            self.fork.pinned_block = pinned_block
+            try:
+                response = super().make_request(method, pinned_params)
+            except Exception:
+                # Reads of unloaded state can make a call fail, retry once it is loaded
+                if (
+                    len(self.fork.account_misses)
+                    + len(self.fork.slot_misses)
+                    + len(self.fork.stale_reads)
+                    == 0
+                ):
+                    raise
+                response = None
+            finally:
+                self.fork.pinned_block = None
+            if len(self.fork.stale_reads) > 0:
+                raise ValueError(
+                    f"{method} at block {pinned_block} reads state loaded after that block, which the fork cannot "
+                    f"write into past blocks"
+                )
+            if len(self.fork.account_misses) + len(self.fork.slot_misses) == 0:
+                if sending:
+                    # Pinned requests before this block no longer see the same state as the head
+                    self.fork.state_block = self.fork.head_block()
+                return response
+            if sending:
+                self.fork.rewind(snapshot_id)
+            self.fork.load_misses()
+        raise ValueError(
+            f"{method} still reads unloaded state after {self.fork.max_loads} loads"
+        )
+
+
+# In-process py-evm fork with the same interface as ForkManager
+class EvmFork:
+    def __init__(self, chain_id, mainnet_endpoint, private_key, max_lag, max_loads):
+        self.chain_id = chain_id
+        self.mainnet_endpoint = mainnet_endpoint
+        # The tester chain signs calls itself so it needs the simulation account's key
+        self.private_key = private_key
+        self.funded_address = to_canonical_address(
+            Account.from_key(private_key).address
+        )
+        self.max_lag = max_lag
+        self.max_loads = max_loads
+        self.endpoint = None
+        self.tester = None
+        self.loader = None
+        self.fork_block = None
+        # Loaded state taken from the forked chain: address -> (balance, nonce, code), (address, slot) -> value
+        self.accounts = {}
+        self.slots = {}
+        # Local block each account and slot was first written into
+        self.account_blocks = {}
+        self.slot_blocks = {}
+        self.account_misses = set()
+        self.slot_misses = set()
+        # Last local block mined by a transaction, blocks after it only add loaded state
+        self.state_block = 0
+        # Block of the request running pinned before state_block, and the loaded state it read that is newer
+        self.pinned_block = None
+        self.stale_reads = set()
+        self.snapshot_id = None
+        self.snapshot_accounts = set()
+        self.snapshot_slots = set()
+        self.snapshot_state_block = 0
+        self.w3 = None
+
+    def is_running(self):
+        return self.tester is not None
+
+    def needs_refork(self, head_block):
+        return not self.is_running() or head_block - self.fork_block > self.max_lag
+
+    def start(self, gas_price, head_block):
+        # The base fee comes from the tester chain, gas_price is only used by Ganache
+        account_db_class = type("ForkAccountDB", (RecordingAccountDB,), {"fork": self})
+        vm_class = ShanghaiVM.configure(
+            __name__="ForkVM",
+            _state_class=ShanghaiState.configure(
+                __name__="ForkState", account_db_class=account_db_class
+            ),
+        )
+        self.accounts = {self.funded_address: (FUNDED_BALANCE, 0, b"")}
+        self.slots = {}
+        self.account_blocks = {self.funded_address: 0}
+        self.slot_blocks = {}
+        self.state_block = 0
+        self.pinned_block = None
+        backend = PyEVMBackend(
+            genesis_state={
+                self.funded_address: {
+                    "balance": FUNDED_BALANCE,
+                    "nonce": 0,
+                    "code": b"",
+                    "storage": {},
+                }
+            },
+            vm_configuration=((0, vm_class),),
+        )
+        backend.add_account(Account.from_key(self.private_key).key)
+        self.tester = EthereumTester(backend)
+        self.loader = StateLoader(self.mainnet_endpoint, head_block)
+        self.fork_block = head_block
+        # A new endpoint per fork so contracts and cached reads keyed on it never reach a discarded chain
+        self.endpoint = f"py-evm://{self.chain_id}/{head_block}"
+        self.snapshot_id = None
+        self.w3 = Web3(ForkedTesterProvider(self))
+
+    def stop(self):
+        self.tester = None
+        self.w3 = None
+        self.snapshot_id = None
+
+    def refork(self, gas_price, head_block):
+        print(f"Forking chain id {self.chain_id} in-process at block {head_block}")
+        self.stop()
+        self.start(gas_price, head_block)
+
+    def web3(self):
+        return self.w3
+
+    def head_block(self):
+        return self.tester.get_block_by_number("latest")["number"]
+
+    def pin(self, method, params):
+        # Loaded state only appears from the block it was mined into. A request pinned to an earlier block runs at the
+        # head while no transaction has been mined since, otherwise it keeps its block and may not read newer loads
+        position = BLOCK_PARAMS.get(method)
+        if position is None or len(params) <= position:
+            return params, None
+        block_tag = params[position]
+        if isinstance(block_tag, int):
+            block_number = block_tag
+        elif block_tag in NAMED_BLOCKS:
+            return params, None
+        elif len(block_tag) == 66:
+            block_number = self.tester.get_block_by_hash(block_tag)["number"]
+        else:
+            block_number = int(block_tag, 16)
+        if block_number >= self.state_block:
+            return (
+                list(params[:position]) + ["latest"] + list(params[position + 1 :]),
+                None,
+            )
+        return params, block_number
+
+    def loaded_after_pin(self, blocks, key):
+        # Only looked up while a pinned request runs, loads record their block once they are mined
+        return self.pinned_block is not None and blocks[key] > self.pinned_block
+
+    def inject(self, accounts, slots):
+        # Write forked state into the pending block and mine it, requests pinned to earlier blocks are handled by pin
+        chain = self.tester.backend.chain
+        state = chain.get_vm().state
+        for address, (balance, nonce, code) in accounts.items():
+            state.set_balance(address, balance)
+            state.set_nonce(address, nonce)
+            state.set_code(address, code)
+        for (address, slot), value in slots.items():
+            state.set_storage(address, slot, value)
+        state.persist()
+        chain.header = chain.header.copy(state_root=state.state_root)
+        self.tester.mine_blocks()
+        block_number = self.head_block()
+        self.account_blocks.update({i: block_number for i in accounts})
+        self.slot_blocks.update({i: block_number for i in slots})
+
+    def load(self, accounts, slots):
+        # State already loaded may have been changed locally and is never overwritten
+        accounts = {i: j for i, j in accounts.items() if i not in self.accounts}
+        slots = {i: j for i, j in slots.items() if i not in self.slots}
+        # Storage of an account is only meaningful once the account itself is loaded
+        accounts.update(
+            self.loader.accounts(
+                {
+                    i[0]
+                    for i in slots
+                    if i[0] not in self.accounts and i[0] not in accounts
+                }
+            )
+        )
+        self.accounts.update(accounts)
+        self.slots.update(slots)
+        self.inject(accounts, slots)
+
+    def load_misses(self):
+        self.load(
+            self.loader.accounts(self.account_misses - set(self.accounts)),
+            self.loader.slots(self.slot_misses - set(self.slots)),
+        )
+
+    def prefetch(self, transaction):
+        accounts, slots = self.loader.prestate(transaction)
+        if len(accounts) + len(slots) > 0:
+            self.load(accounts, slots)
+
+    def rewind(self, block_hash):
+        # Put the state root of an earlier block back in the pending header, the next block mined carries that state.
+        # The chain only moves forward since injected state cannot be replayed from transactions
+        chain = self.tester.backend.chain
+        header = chain.get_block_header_by_hash(block_hash)
+        chain.header = chain.header.copy(state_root=header.state_root)
+
+    def snapshot(self, w3_provider):
+        self.snapshot_id = self.tester.backend.take_snapshot()
+        self.snapshot_accounts = set(self.accounts)
+        self.snapshot_slots = set(self.slots)
+        self.snapshot_state_block = self.state_block
+
+    def revert(self, w3_provider):
+        self.rewind(self.snapshot_id)
+        self.state_block = self.snapshot_state_block
+        # State loaded after the snapshot is still valid fork state, it is put back in the block that restores the
+        # snapshot's state
+        self.inject(
+            {i: j for i, j in self.accounts.items() if i not in self.snapshot_accounts},
+            {i: j for i, j in self.slots.items() if i not in self.snapshot_slots},
+        )
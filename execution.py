@@ -1,17 +1,92 @@
 # Import modules
 from pricing import Pricing
-import abis
+from prices import PriceService
+from sizing import optimize_trade_size
+from routing import water_fill, split_amount
+from venues import venue_registry
+from zero_ex import ZeroExQuoter
+from fork import ForkManager, ForkPool
+from sessions import ModeSession, create_http_session, connection_stats
+from multicall import decode_output
+from tracker import get_tracker, completed
+from fees import FeeOracle
+from accounting import Ledger
+from events import EventWatcher, LatencyStats
+from nav import NavDriftError
+from contracts import registry
+from concurrency import ThreadLocal, run_in_threads
+from concurrent.futures import ThreadPoolExecutor
+from executor import AMOUNT_PLACEHOLDER, executor_call, load_executor
 import config
 import decouple
 from web3 import Web3
-import requests
+from web3.exceptions import ContractLogicError
 import pycoingecko
 import time
-import subprocess
 import sys
+import atexit
+import threading
+
+
+def create_fork_manager(chain_id, w3_endpoint, http_session, port):
+    if config.simulation_backend == "py-evm":
+        # Only needed when simulating in-process
+        from evm_fork import EvmFork
+
+        return EvmFork(
+            chain_id,
+            w3_endpoint,
+            decouple.config("GANACHE_FORK_PK"),
+            config.fork_max_lag[chain_id],
+            config.evm_fork_max_loads,
+        )
+    return ForkManager(
+        chain_id,
+        w3_endpoint,
+        port,
+        config.fork_max_lag[chain_id],
+        http_session,
+    )
+
+
+def create_fork_pool(chain_id, w3_endpoint, http_session):
+    # One fork per configured port, shared by the chain's routes
+    return ForkPool(
+        [
+            create_fork_manager(chain_id, w3_endpoint, http_session, port)
+            for port in config.ganache_fork_ports[chain_id]
+        ]
+    )
+
+
+def create_zero_ex_quoter():
+    return ZeroExQuoter(
+        decouple.config("ZERO_X_KEY"),
+        config.zero_ex_rate_limit,
+        config.zero_ex_burst,
+        config.zero_ex_max_workers,
+        config.zero_ex_max_retries,
+        config.zero_ex_backoff,
+        config.zero_ex_quote_ttl,
+        config.zero_ex_quote_block_window,
+    )
 
 
 class ArbBotBase(Pricing):
+    # Mode state is per thread so each route can switch between the fork and mainnet on its own
+    mode = ThreadLocal()
+    session = ThreadLocal()
+    fork = ThreadLocal()
+    account = ThreadLocal()
+    address = ThreadLocal()
+    private_key = ThreadLocal()
+    nonces = ThreadLocal()
+    fee_oracle = ThreadLocal()
+    ledger = ThreadLocal()
+    index_token_contract = ThreadLocal()
+    index_router_contract = ThreadLocal()
+    wrapped_native_contract = ThreadLocal()
+
     def __init__(
         self,
         mode,
@@ -24,7 +99,13 @@ class ArbBotBase(Pricing):
         index_router_address,
         wrapped_native_address,
         profit_threshold,
+        price_service=None,
+        zero_ex_quoter=None,
+        fork_pool=None,
+        http_session=None,
     ):
+        # Mode each route runs in, threads start without one and switch into it
+        self.home_mode = mode
         self.mode = None
         self.chain_id = chain_id
         self.mainnet_endpoint = w3_endpoint
@@ -38,27 +119,66 @@ class ArbBotBase(Pricing):
         self.account = None
         self.address = None
         self.private_key = None
-        self.cg = pycoingecko.CoinGeckoAPI()
+        self.nonces = None
+        self.fee_oracle = None
+        self.ledger = None
+        # Keys are read once, sessions per mode are built on first use and reused after that
+        self.fork_private_key = decouple.config("GANACHE_FORK_PK")
+        self.prod_private_key = decouple.config("PROD_ACCOUNT_PK")
+        self.sessions = {}
+        self.sessions_lock = threading.Lock()
+        # Keep-alive HTTP session can be shared between bots so connections survive bot rebuilds
+        self.http_session = (
+            http_session
+            if http_session is not None
+            else create_http_session(config.http_pool_size)
+        )
+        self.mainnet_w3 = Web3(
+            Web3.HTTPProvider(
+                endpoint_uri=w3_endpoint,
+                request_kwargs={"timeout": 60},
+                session=self.http_session,
+            )
+        )
+        # Price service can be shared between bots so CoinGecko is queried once for all of them
+        self.prices = (
+            price_service
+            if price_service is not None
+            else PriceService(
+                pycoingecko.CoinGeckoAPI(),
+                config.coingecko_assets,
+                config.price_cache_ttl,
+                config.price_cache_stale_ttl,
+            )
+        )
+        # 0x quoter can be shared between bots so they draw on one rate limit
+        self.zero_ex = (
+            zero_ex_quoter if zero_ex_quoter is not None else create_zero_ex_quoter()
+        )
+        # Warm forks that outlive the bot so preflight setup is only done once per fork
+        self.forks = (
+            fork_pool
+            if fork_pool is not None
+            else create_fork_pool(chain_id, w3_endpoint, self.http_session)
+        )
+        # The premium and discount routes of the chain are evaluated side by side, one worker each
+        self.route_workers = ThreadPoolExecutor(2)
         self.index_token_contract = None
         self.index_router_contract = None
         self.wrapped_native_contract = None
+        # Gas used by each leg in the last fork simulation, per (exchange, premium) for swaps and ("index", premium) for the mint or burn
+        self.gas_estimates = {}
+        # Whether each provider supports debug_traceCall, assumed until a request fails
+        self.trace_call_support = {}
         super().__init__(
-            self.cg, self.w3, self.index_address, self.chain_id, wrapped_native_address
-        )
-        self.change_mode(mode, False)
-        self.change_mode(0, True, self.create_contract_instances)
-        self.profit_threshold = self.w3.to_wei(profit_threshold, "ether")
-
-    # Function that retrieves the correct swapping function based on the pool address
-    def func_for_exchange(self, pool):
-        mapping = {
-            43114: {
-                "0xE5e9d67e93aD363a50cABCB9E931279251bBEFd0": self.swap_via_trader_joe,
-                "0x2219bc1C06e303172d35deEB9C637D074BA4F277": self.swap_via_trader_joe,
-            },
-            1: {"0xF5FE7ea8537CBd9E5e7b81A93828F48037D220c2": self.swap_via_uniswap},
-        }
-        return mapping[self.chain_id][pool]
+            self.prices,
+            self.w3,
+            self.index_address,
+            self.chain_id,
+            wrapped_native_address,
+            exchanges,
+        )
+        self.profit_threshold = Web3.to_wei(profit_threshold, "ether")
 
     # Function allows the bot to switch between a local forked network or mainnet. 
     def change_mode(self, new_mode, switch_back, contract_func=None, *args):
@@ -67,118 +187,160 @@ class ArbBotBase(Pricing):
             return contract_func(*args)
         else:
             self.mode = new_mode
-            if self.mode == 0:
-                # Set up web3 object
-                self.w3 = Web3(
-                    Web3.HTTPProvider(
-                        endpoint_uri=decouple.config("GANACHE_MAINNET_FORK"),
-                        request_kwargs={"timeout": 60},
-                    )
-                )
+            if self.mode in (0, 1):
+                # Swap in the mode's persistent provider, account and contracts
+                session = self.get_session(self.mode)
+                self.session = session
+                self.w3 = session.w3
                 super().update_w3_provider(self.w3)
-                # Importing account
-                self.account = self.w3.eth.account.from_key(
-                    decouple.config("GANACHE_FORK_PK")
-                )
-                # Storing address
-                self.address = self.account.address
-                # Importing private key
-                self.private_key = decouple.config("GANACHE_FORK_PK")
-                # Setting default account
-                self.w3.eth.default_account = self.address
+                self.account = session.account
+                self.address = session.address
+                self.private_key = session.private_key
+                self.nonces = session.nonces
+                self.fee_oracle = session.fee_oracle
+                self.ledger = session.ledger
                 self.create_contract_instances()
-                if contract_func is not None:
-                    response = contract_func(*args)
-                if switch_back:
-                    self.change_mode(initial_mode, False)
-                return response if contract_func is not None else None
-            elif self.mode == 1:
-                # Set up web3 object
-                self.w3 = Web3(
-                    Web3.HTTPProvider(
-                        endpoint_uri=self.mainnet_endpoint,
-                        request_kwargs={"timeout": 60},
-                    )
-                )
-                super().update_w3_provider(self.w3)
-                # Importing account
-                self.account = self.w3.eth.account.from_key(
-                    decouple.config("PROD_ACCOUNT_PK")
+            if contract_func is not None:
+                response = contract_func(*args)
+            if switch_back:
+                self.change_mode(initial_mode, False)
+            return response if contract_func is not None else None
+
+    def get_session(self, mode):
+        # Ganache over HTTP or the in-process EVM for the fork, depending on the simulation backend
+        w3_provider = self.fork.web3() if mode == 0 else self.mainnet_w3
+        # One session per fork in the pool and one for mainnet
+        key = (mode, self.fork) if mode == 0 else mode
+        with self.sessions_lock:
+            return self.get_session_locked(mode, w3_provider, key)
+
+    def get_session_locked(self, mode, w3_provider, key):
+        session = self.sessions.get(key)
+        # The fork's provider only changes when the in-process EVM is re-forked
+        if session is None or session.w3 is not w3_provider:
+            session = ModeSession(
+                w3_provider,
+                self.fork_private_key if mode == 0 else self.prod_private_key,
+                {
+                    "index_token_contract": (self.index_address, "pdi_token"),
+                    "index_router_contract": (
+                        self.index_router_address,
+                        "index_router",
+                    ),
+                    "wrapped_native_contract": (self.wrapped_native_address, "weth"),
+                },
+            )
+            session.fee_oracle = FeeOracle(
+                w3_provider,
+                config.fee_history_blocks[self.chain_id],
+                config.fee_reward_percentile,
+                config.fee_blocks_ahead[self.chain_id],
+                config.priority_fee_profit_share,
+                config.block_number_ttl,
+            )
+            session.ledger = Ledger(
+                session.address,
+                session.contracts["index_token_contract"],
+                session.contracts["wrapped_native_contract"],
+                config.native_payers[self.chain_id],
+                config.ledger_reconcile_interval,
+            )
+            if mode == 1:
+                session.executor_address = config.arb_executor_address.get(
+                    self.chain_id
                 )
-                # Storing address
-                self.address = self.account.address
-                # Importing private key
-                self.private_key = decouple.config("PROD_ACCOUNT_PK")
-                # Setting default account
-                self.w3.eth.default_account = self.address
-                self.create_contract_instances()
-                if contract_func is not None:
-                    response = contract_func(*args)
-                if switch_back:
-                    self.change_mode(initial_mode, False)
-                return response if contract_func is not None else None
+            self.sessions[key] = session
+        return session
 
-    def start_ganache_node(self, gas_price):
-        # Spin up a daemon version of ganche
-        sub_process_response = subprocess.run(
-            f"npx ganache --fork {self.mainnet_endpoint} -q -g {gas_price} --wallet.deterministic --detach -e 100000",
-            shell=True,
-            capture_output=True,
-            text=True,
-        )
-        return sub_process_response.stdout.strip()
+    def prepare_fork(self, gas_price):
+        head_block = self.change_mode(1, True, self.current_block)
+        if self.fork.needs_refork(head_block):
+            self.fork.refork(gas_price, head_block)
+            # The fork starts from the account's mainnet nonce
+            self.get_session(0).nonces.reset()
+            # Set up the new fork once and keep its post-preflight state
+            self.change_mode(0, True, self.preflight_checks)
+            self.change_mode(0, True, self.snapshot_fork)
 
-    def kill_ganache_node(self, instance_name):
-        subprocess.run(["npx", "ganache", "instances", "stop", str(instance_name)])
+    def snapshot_fork(self):
+        self.fork.snapshot(self.w3)
+
+    def revert_fork(self):
+        self.fork.revert(self.w3)
+        # Nonces used after the snapshot are free again
+        self.nonces.reset()
+        # Balances on the fork are back to the snapshot's
+        self.ledger.invalidate()
+        # Reads cached from the discarded fork state are no longer valid
+        self.forget_provider_state()
 
     # Retrieves list of active index assets
     def get_index_anatomy(self):
         # Retrieve index anatomy
-        assets, weights = self.index_token_contract.functions.anatomy().call()
+        assets, weights = self.read(self.index_token_contract, "anatomy")
         # Zip asset and weights lists together
         zipped_list = list(zip(assets, weights))
         return zipped_list
 
     def get_inactive_assets(self):
-        inactive_assets = self.index_token_contract.functions.inactiveAnatomy().call()
+        inactive_assets = self.read(self.index_token_contract, "inactiveAnatomy")
         return inactive_assets
 
+    def quote_block(self):
+        # 0x quotes are priced against mainnet, so they are stamped with the mainnet head even on the fork, whose own
+        # block numbers lag mainnet or start again from zero
+        if self.mode == 1:
+            return self.current_block()
+        return self.mainnet_w3.eth.block_number
+
     # Amount should be in wei
-    def mint(self, amount, flag="CALL"):
-        recipient = self.address
+    def mint(self, amount, flag="CALL", gas=None, recipient=None, fees=None):
+        recipient = self.address if recipient is None else recipient
         # Retrieve index anatomy
         anatomy = self.get_index_anatomy()
         # Array to hold each quote
         mint_quote_params = []
         # Keep track of residual eth amount to ensure the amount of eth traded equals the amount of eth sent
         amount_remaining = amount
-        # Retrieve quote for each asset from 0x API
+        # Build the 0x query for each asset in anatomy order
+        sell_amounts = []
+        query_params_list = []
         for asset, weight in anatomy:
-            # Sleep to avoid API rate limiting
-            time.sleep(1)
-            query_params = {
-                "enableSlippageProtection": "true",
-                "sellToken": self.wrapped_native_address,
-                "slippagePercentage": 0.99
-                if self.mode == 0
-                else config.slippage_threshold,
-            }
-            query_params["buyToken"] = asset
             # If this is the last asset in the list use the remaining eth as the sell amount
-            if asset != self.w3.to_checksum_address(self.wrapped_native_address):
-                query_params["sellAmount"] = (
-                    amount_remaining
-                    if asset == anatomy[-1][0]
-                    else int(amount * weight / 255)
-                )
-                amount_remaining -= query_params["sellAmount"]
-            else:
+            sell_amount = (
+                amount_remaining
+                if asset == anatomy[-1][0]
+                else int(amount * weight / 255)
+            )
+            amount_remaining -= sell_amount
+            sell_amounts.append(sell_amount)
+            if asset == self.w3.to_checksum_address(self.wrapped_native_address):
+                # No swap is required for the wrapped native asset
+                query_params_list.append(None)
+                continue
+            query_params_list.append(
+                {
+                    "enableSlippageProtection": "true",
+                    "sellToken": self.wrapped_native_address,
+                    # Same slippage on the fork and live so the BUILD step can reuse the simulated quotes
+                    "slippagePercentage": config.slippage_threshold,
+                    "buyToken": asset,
+                    "sellAmount": sell_amount,
+                }
+            )
+        # Retrieve every quote from the 0x API at once, reusing fresh quotes from the fork simulation
+        zero_ex_quotes = self.zero_ex.get_quotes(
+            self.zero_ex_base_url,
+            self.chain_id,
+            self.quote_block(),
+            query_params_list,
+        )
+        for sell_amount, zero_ex_quote in zip(sell_amounts, zero_ex_quotes):
+            if zero_ex_quote is None:
                 # Directly create quote bypassing 0x API request since no swap is required
                 quote = {
                     "asset": self.w3.to_checksum_address(self.wrapped_native_address),
-                    "buyAssetMinAmount": amount_remaining
-                    if asset == anatomy[-1][0]
-                    else int(amount * weight / 255),
+                    "buyAssetMinAmount": sell_amount,
                     "swapTarget": self.w3.to_checksum_address(
                         "0x0000000000000000000000000000000000000000"
                     ),
@@ -186,16 +348,8 @@ class ArbBotBase(Pricing):
                         "0x0000000000000000000000000000000000000000"
                     ),
                 }
-                amount_remaining -= quote["buyAssetMinAmount"]
                 mint_quote_params.append(quote)
                 continue
-            # Query 0x API
-            zero_ex_quote = requests.get(
-                self.zero_ex_base_url,
-                query_params,
-                headers={"0x-api-key": decouple.config("ZERO_X_KEY")},
-            )
-            zero_ex_quote = zero_ex_quote.json()
             # Calculate minumum buy amount using guaranteed price
             buy_asset_min_amount = int(
                 int(zero_ex_quote["sellAmount"])
@@ -215,63 +369,58 @@ class ArbBotBase(Pricing):
             "recipient": recipient,
             "quotes": mint_quote_params,
         }
-        # Determine desired return outcome based on flag
-        if flag.upper() == "CALL":
-            # Get output from call static
-            mint_swap_value_params["inputToken"] = self.w3.to_checksum_address(
-                self.wrapped_native_address
-            )
-            mint_swap_value_params["amountInInputToken"] = amount
-            call_static = self.index_router_contract.functions.mintSwapValue(
-                mint_swap_value_params
-            ).call({"value": amount})
-            gas_estimate = int(
-                self.index_router_contract.functions.mintSwapValue(
-                    mint_swap_value_params
-                ).estimate_gas({"value": amount})
-                * config.gas_multiplier
-            )
-            return {"output": call_static, "gas": gas_estimate}
-        elif flag.upper() == "BUILD":
-            # Build transaction dictionary
-            built_transaction = self.index_router_contract.functions.mintSwapValue(
-                mint_swap_value_params
-            ).build_transaction(
-                {
-                    "value": amount,
-                    "nonce": self.w3.eth.get_transaction_count(self.address),
-                    "gas": int(
-                        self.index_router_contract.functions.mintSwapValue(
-                            mint_swap_value_params
-                        ).estimate_gas({"value": amount})
-                        * config.gas_multiplier
-                    ),
-                }
-            )
-            return built_transaction
+        # Simulate once for the output, gas and the transaction
+        return self.prepare_transaction(
+            self.index_router_contract.functions.mintSwapValue(mint_swap_value_params),
+            amount,
+            config.gas_multiplier,
+            flag,
+            fees,
+            gas,
+        )
 
     # Index amount should be in wei
-    def burn(self, index_amount, flag="CALL"):
-        recipient = self.address
+    def burn(self, index_amount, flag="CALL", gas=None, recipient=None, fees=None):
+        recipient = self.address if recipient is None else recipient
         # Retrieve active assets
         assets = self.get_index_anatomy()
         # Remove weights and add inactive assets
         assets = [i[0] for i in assets] + self.get_inactive_assets()
         # Retrieve sell amounts of constituent based on the amount of index tokens burned
-        constituent_sell_amounts = (
-            self.index_router_contract.functions.burnTokensAmount(
-                self.w3.to_checksum_address(self.index_address), index_amount
-            ).call()
+        constituent_sell_amounts = self.read(
+            self.index_router_contract,
+            "burnTokensAmount",
+            self.w3.to_checksum_address(self.index_address),
+            index_amount,
         )
         # Check that both lists are the same length
         assert len(assets) == len(constituent_sell_amounts)
         zipped_list = list(zip(assets, constituent_sell_amounts))
+        # Build the 0x query for each asset, assets with nothing to sell need no quote
+        query_params_list = [
+            None
+            if sell_amount == 0 or asset == self.wrapped_native_address
+            else {
+                "enableSlippageProtection": "true",
+                # Same slippage on the fork and live so the BUILD step can reuse the simulated quotes
+                "slippagePercentage": config.slippage_threshold,
+                "buyToken": self.wrapped_native_address,
+                "sellToken": asset,
+                "sellAmount": int(sell_amount * 0.99999),
+            }
+            for asset, sell_amount in zipped_list
+        ]
+        # Retrieve every quote from the 0x API at once, reusing fresh quotes from the fork simulation
+        zero_ex_quotes = self.zero_ex.get_quotes(
+            self.zero_ex_base_url,
+            self.chain_id,
+            self.quote_block(),
+            query_params_list,
+        )
         # List to hold BurnQuoteParams structs
         burn_quote_params = []
-        for asset, sell_amount in zipped_list:
-            # Sleep to avoid API rate limiting
-            time.sleep(1)
-            if sell_amount == 0 or asset == self.wrapped_native_address:
+        for zero_ex_quote in zero_ex_quotes:
+            if zero_ex_quote is None:
                 quote = {
                     "swapTarget": self.w3.to_checksum_address(
                         "0x0000000000000000000000000000000000000000"
@@ -281,22 +430,6 @@ class ArbBotBase(Pricing):
                 }
                 burn_quote_params.append(quote)
             else:
-                query_params = {
-                    "enableSlippageProtection": "true",
-                    "slippagePercentage": 0.99
-                    if self.mode == 0
-                    else config.slippage_threshold,
-                    "buyToken": self.wrapped_native_address,
-                    "sellToken": asset,
-                    "sellAmount": int(sell_amount * 0.99999),
-                }
-                # Query 0x api
-                zero_ex_quote = requests.get(
-                    self.zero_ex_base_url,
-                    query_params,
-                    headers={"0x-api-key": decouple.config("ZERO_X_KEY")},
-                )
-                zero_ex_quote = zero_ex_quote.json()
                 # Calculate minumum buy amount using guaranteed price
                 buy_asset_min_amount = (
                     0
@@ -321,50 +454,124 @@ class ArbBotBase(Pricing):
             "recipient": recipient,
             "quotes": burn_quote_params,
         }
-        # Determine desired return outcome based on flag
+        # Simulate once for the output, gas and the transaction
+        return self.prepare_transaction(
+            self.index_router_contract.functions.burnSwapValue(burn_swap_params),
+            0,
+            config.gas_multiplier,
+            flag,
+            fees,
+            gas,
+        )
+
+    def prepare_transaction(
+        self, contract_function, value, gas_multiplier, flag, fees=None, gas=None
+    ):
+        if flag.upper() == "ENCODE":
+            # Target, value and calldata for a leg run through the arb executor
+            return {
+                "target": contract_function.address,
+                "value": value,
+                "data": contract_function._encode_transaction_data(),
+            }
+        if gas is None:
+            # Output and gas come from one simulation, the transaction is built around them so nothing is simulated again
+            output, gas_used = self.simulate(contract_function, value)
+            gas = int(gas_used * gas_multiplier)
+        else:
+            # Gas from an earlier simulation, e.g. a leg built before the leg it depends on has been mined
+            output = None
+        # CALL returns the simulated output and gas, BUILD the unsigned transaction and PREPARE all three
         if flag.upper() == "CALL":
-            # Call static burn to get output
-            call_static = self.index_router_contract.functions.burnSwapValue(
-                burn_swap_params
-            ).call()
-            gas_estimate = int(
-                self.index_router_contract.functions.burnSwapValue(
-                    burn_swap_params
-                ).estimate_gas()
-                * config.gas_multiplier
-            )
-            return {"output": call_static, "gas": gas_estimate}
-        elif flag.upper() == "BUILD":
-            # Build transaction dictionary
-            built_transaction = self.index_router_contract.functions.burnSwapValue(
-                burn_swap_params
-            ).build_transaction(
-                {
-                    "nonce": self.w3.eth.get_transaction_count(self.address),
-                    "maxFeePerGas": int(self.w3.eth.gas_price * 10)
-                    if self.mode == 0
-                    else int(self.w3.eth.gas_price * config.gas_multiplier),
-                    "gas": int(
-                        self.index_router_contract.functions.burnSwapValue(
-                            burn_swap_params
-                        ).estimate_gas()
-                        * config.gas_multiplier
-                    ),
-                }
+            return {"output": output, "gas": gas}
+        transaction = contract_function.build_transaction(
+            {
+                "value": value,
+                "gas": gas,
+                # Fees from the oracle unless the caller bid for this transaction
+                **(fees if fees is not None else self.fee_oracle.fees()),
+            }
+        )
+        if flag.upper() == "BUILD":
+            return transaction
+        elif flag.upper() == "PREPARE":
+            return {"output": output, "gas": gas, "transaction": transaction}
+
+    def simulate(self, contract_function, value):
+        endpoint = self.w3.provider.endpoint_uri
+        if self.trace_call_support.get(endpoint, True):
+            # A callTracer trace gives the output and gas used from a single execution
+            response = self.w3.provider.make_request(
+                "debug_traceCall",
+                [
+                    {
+                        "from": self.address,
+                        "to": contract_function.address,
+                        "data": contract_function._encode_transaction_data(),
+                        "value": hex(value),
+                    },
+                    "latest",
+                    {"tracer": "callTracer"},
+                ],
+            )
+            if "error" not in response:
+                trace = response["result"]
+                if "error" in trace:
+                    raise ContractLogicError(
+                        f"execution reverted: {trace.get('revertReason', trace['error'])}"
+                    )
+                output = decode_output(
+                    self.w3,
+                    contract_function.abi,
+                    bytes.fromhex(trace.get("output", "0x")[2:]),
+                )
+                return output, int(
+                    int(trace["gasUsed"], 16) * config.trace_gas_headroom
+                )
+            # Nodes without debug_traceCall, e.g. Ganache, fall back to a call and a gas estimate
+            print(
+                f"debug_traceCall unavailable on {endpoint}, using call and estimate_gas"
             )
-            return built_transaction
+            self.trace_call_support[endpoint] = False
+        output = contract_function.call({"value": value})
+        return output, contract_function.estimate_gas({"value": value})
 
     def execute_transaction(self, transaction):
-        # Sign transaction
-        signed_transaction = self.w3.eth.account.sign_transaction(
-            transaction, self.private_key
-        )
-        # Send to network
-        transaction_hash = self.w3.eth.send_raw_transaction(
-            signed_transaction.rawTransaction
-        )
+        return self.wait_for_receipt(self.send_transaction(transaction))
+
+    def send_transaction(self, transaction):
+        # Nonces are only taken here, so a route that fails while its legs are built leaves no gap. Replacements
+        # keep the nonce of the transaction they replace
+        if "nonce" not in transaction:
+            transaction["nonce"] = self.nonces.reserve()
+        try:
+            # Sign transaction
+            signed_transaction = self.w3.eth.account.sign_transaction(
+                transaction, self.private_key
+            )
+            # Send to network
+            transaction_hash = self.w3.eth.send_raw_transaction(
+                signed_transaction.rawTransaction
+            )
+        except Exception:
+            # The node rejected the nonce or the transaction never used it, resync before the next send
+            self.nonces.reset()
+            raise
+        # The value sent only shows up in the receipt's status, so the ledger keeps it until the receipt arrives
+        self.ledger.expect(transaction_hash, transaction.get("value", 0))
+        # State is about to change so the pinned snapshot is no longer valid
+        self.clear_snapshot()
+        return transaction_hash
+
+    def wait_for_receipt(self, transaction_hash):
         # Wait for reciept confirmation
-        receipt = self.w3.eth.wait_for_transaction_receipt(transaction_hash)
+        tracker = self.receipt_tracker()
+        receipt = (
+            tracker.track(transaction_hash).result()
+            if tracker is not None
+            else self.w3.eth.wait_for_transaction_receipt(transaction_hash)
+        )
+        self.ledger.apply(receipt)
         if receipt["status"] == 0:
             response_dict = {"status": False, "response": receipt}
             print(response_dict)
@@ -373,16 +580,192 @@ class ArbBotBase(Pricing):
             response_dict = {"status": True, "response": receipt}
             return response_dict
 
+    def receipt_tracker(self):
+        # Forks mine on send, Ganache and the in-process EVM alike, so their receipts are waited on directly instead of
+        # on the chain's poll interval. Only mainnet receipts are polled in batches
+        if self.mode == 0:
+            return None
+        endpoint = self.w3.provider.endpoint_uri
+        return get_tracker(
+            endpoint,
+            config.receipt_poll_interval[self.chain_id],
+            config.receipt_confirmations[self.chain_id],
+            config.receipt_timeout,
+        )
+
+    def execute_legs(self, first_legs, dependent_legs):
+        # All legs go out back to back with consecutive nonces so the dependent legs can land in the same block
+        first_hashes = [self.send_transaction(i) for i in first_legs]
+        dependent_hashes = [self.send_transaction(i) for i in dependent_legs]
+        # Only the first legs are waited on here, the dependent legs settle in the background
+        receipts = [self.wait_for_receipt(i) for i in first_hashes]
+        if any(i["status"] == False for i in receipts):
+            for leg, transaction_hash in zip(dependent_legs, dependent_hashes):
+                self.ledger.drop(transaction_hash)
+                self.cancel_transaction(leg)
+        return receipts, dependent_hashes
+
+    def settle_arb(self, transaction_hashes):
+        # Future for the arb's profit, resolved once its last transaction is confirmed
+        session = self.session
+        tracker = self.receipt_tracker()
+
+        def get_receipt(transaction_hash):
+            if tracker is None:
+                return session.w3.eth.wait_for_transaction_receipt(transaction_hash)
+            return tracker.track(transaction_hash).result()
+
+        def profit(receipt):
+            # Earlier legs have lower nonces so they are already mined, receipts the ledger has seen are not counted twice
+            for transaction_hash in transaction_hashes[:-1]:
+                session.ledger.apply(get_receipt(transaction_hash))
+            session.ledger.apply(receipt)
+            # Native and wrapped native moved by the arb's own receipts, gas included
+            deltas = session.ledger.collect(transaction_hashes)
+            # Off the hot path, so this is where the ledger is checked against the chain
+            self.reconcile_ledger(session)
+            if receipt["status"] == 0:
+                print({"status": False, "response": receipt})
+                return None
+            return sum(i["native"] + i["wrapped"] for i in deltas)
+
+        if tracker is None:
+            return completed(profit(get_receipt(transaction_hashes[-1])))
+        return tracker.then(transaction_hashes[-1], profit)
+
+    def reconcile_ledger(self, session):
+        # Read through the mode's own session, the bot may have switched mode by the time this runs
+        if not session.ledger.due():
+            return
+        session.ledger.reconcile(
+            session.w3.eth.get_balance(session.address),
+            session.contracts["wrapped_native_contract"]
+            .functions.balanceOf(session.address)
+            .call(),
+            session.contracts["index_token_contract"]
+            .functions.balanceOf(session.address)
+            .call(),
+        )
+
+    def cancel_transaction(self, transaction):
+        # Replace a pending transaction with an empty transfer to ourselves at the same nonce and higher fees
+        replacement = {
+            "to": self.address,
+            "value": 0,
+            "gas": 21000,
+            "nonce": transaction["nonce"],
+            "chainId": transaction["chainId"],
+        }
+        for i in ["maxFeePerGas", "maxPriorityFeePerGas", "gasPrice"]:
+            if i in transaction:
+                replacement[i] = int(transaction[i] * config.cancel_fee_bump)
+        try:
+            self.execute_transaction(replacement)
+            print(f"Cancelled transaction with nonce {transaction['nonce']}")
+        except ValueError as e:
+            # Already mined, there is nothing left to replace
+            print(
+                f"Could not cancel transaction with nonce {transaction['nonce']}: {e}"
+            )
+        self.nonces.reset()
+
     def set_allowances(self, amount, contract_object, owner, spender):
         amount = 2**256 - 1 if amount == "inf" else amount
         # Build transaction to set allowance to infinity
         build_transaction = contract_object.functions.approve(
             spender, 2**256 - 1
-        ).build_transaction({"nonce": self.w3.eth.get_transaction_count(self.address)})
+        ).build_transaction(self.fee_oracle.fees())
         return build_transaction
 
+    def deploy_executor(self):
+        abi, bytecode = load_executor(config.solc_version)
+        receipt = self.execute_transaction(
+            self.w3.eth.contract(abi=abi, bytecode=bytecode)
+            .constructor()
+            .build_transaction(self.fee_oracle.fees())
+        )
+        self.session.executor_address = receipt["response"]["contractAddress"]
+        print(f"Arb executor deployed at {self.session.executor_address}")
+
+    def live_burn_amount(self, burn_amount, index_bought):
+        # The simulated burn amount keeps the 0x quotes fetched on the fork valid, it is only cut when the live
+        # swaps come in too low to cover it
+        return min(burn_amount, int(index_bought * config.leg_2_amount_share))
+
+    def execute_atomic(self, premium, trade_size, shares, fees, burn_amount):
+        executor_address = self.session.executor_address
+        assert executor_address is not None, "No arb executor for this mode"
+        if premium:
+            # Every swap but the last sells a share of the simulated mint output, the last sells whatever is left
+            # and the executor writes that amount over the placeholder
+            index_bought = self.mint(trade_size)["output"] if len(shares) > 1 else 0
+            routed = split_amount(int(index_bought * config.leg_2_amount_share), shares)
+            calls = [
+                executor_call(
+                    self.mint(trade_size, flag="ENCODE", recipient=executor_address)
+                )
+            ]
+            for i, (exchange, amount) in enumerate(routed):
+                calls.append(
+                    executor_call(
+                        self.venues[exchange].swap(
+                            exchange,
+                            AMOUNT_PLACEHOLDER if i == len(routed) - 1 else amount,
+                            False,
+                            "ENCODE",
+                            recipient=executor_address,
+                        ),
+                        self.index_address,
+                    )
+                )
+        else:
+            # Burn quotes depend on the amount burned, so the simulated amount is kept unless the swap outputs fall short
+            routed = split_amount(trade_size, shares)
+            index_bought = sum(
+                self.venues[exchange].swap(exchange, amount, True)["output"]
+                for exchange, amount in routed
+            )
+            calls = [
+                executor_call(
+                    self.venues[exchange].swap(
+                        exchange, amount, True, "ENCODE", recipient=executor_address
+                    )
+                )
+                for exchange, amount in routed
+            ]
+            calls.append(
+                executor_call(
+                    self.burn(
+                        self.live_burn_amount(burn_amount, index_bought),
+                        flag="ENCODE",
+                        recipient=executor_address,
+                    ),
+                    self.index_address,
+                )
+            )
+        # Revert on-chain unless the arb clears the same threshold the fork simulation was held to
+        min_profit = self.profit_threshold + self.estimate_gas_costs(
+            self.route_gas(premium, shares), self.fee_oracle.effective_gas_price(fees)
+        )
+        try:
+            transaction = self.prepare_transaction(
+                self.contract(executor_address, "arb_executor").functions.execute(
+                    calls, self.wrapped_native_address, self.index_address, min_profit
+                ),
+                trade_size,
+                config.gas_multiplier,
+                "BUILD",
+                fees,
+            )
+        except ContractLogicError as e:
+            print(f"Atomic arb no longer profitable: {e}")
+            return None
+        return self.send_transaction(transaction)
+
     def preflight_checks(self):
         # Run these transactions to set up forked environment - (allowances and asset balances)
+        if config.atomic_execution:
+            self.deploy_executor()
         self.execute_transaction(
             self.set_allowances(
                 "inf",
@@ -451,15 +834,11 @@ class ArbBotBase(Pricing):
             )
 
     def create_contract_instances(self):
-        self.index_token_contract = self.w3.eth.contract(
-            self.index_address, abi=abis.pdi_token
-        )
-        self.index_router_contract = self.w3.eth.contract(
-            self.index_router_address, abi=abis.index_router
-        )
-        self.wrapped_native_contract = self.w3.eth.contract(
-            address=self.wrapped_native_address, abi=abis.weth
-        )
+        # Contracts are bound once per mode session
+        contracts = self.session.contracts
+        self.index_token_contract = contracts["index_token_contract"]
+        self.index_router_contract = contracts["index_router_contract"]
+        self.wrapped_native_contract = contracts["wrapped_native_contract"]
 
     def retrieve_index_balance(self, wei):
         assert type(wei) == bool, "Param should be bool"
@@ -473,101 +852,163 @@ class ArbBotBase(Pricing):
                 )
             )
 
-    def calculate_trade_size(self, premium, exchange):
+    def calculate_route(self, premium, exchanges):
         assert type(premium) == bool, "Premium must be bool"
-        if premium:
-            # Retrieve the correct function for calcualting the optimal trade size based on the pool address
-            calc_trade_size_func = self.get_trade_size_mapping(exchange)
-            # Get the function used to execute trades on the given pool address
-            trading_func = self.func_for_exchange(exchange)
-            # Get the optimal trade size
-            trade_size = calc_trade_size_func(
+        # Start every simulation from the fork's post-preflight state
+        self.revert_fork()
+        # Pin the pool and NAV reads on the fork to a single block
+        self.take_snapshot(*exchanges)
+        # Size that pushes each pool to NAV bounds the search for the most profitable total size
+        nav_trade_sizes = {
+            exchange: self.venues[exchange].size(
                 exchange,
-                self.get_nav_price(self.get_price_mapping(exchange)[0]),
+                self.get_nav_price(self.venues[exchange].quote_asset),
                 premium,
             )
+            for exchange in exchanges
+        }
+        trade_size, shares = self.optimize_route(premium, nav_trade_sizes)
+        if trade_size == 0:
+            print("No profitable trade size after fees and gas")
+            return 0, None, 0, None
+        print(f"Route shares per pool: {shares}")
+        if premium:
             print(
                 f"{trade_size/1e18} {self.native_asset_symbol()} worth of {self.index_symbol} must be minted"
             )
-            # Call the mint and swap functions to assess profit
-            index_bought, gas_leg_1 = self.mint(trade_size).values()
-            native_received, gas_leg_2 = trading_func(
-                exchange, index_bought, False
-            ).values()
-            print(
-                f"Estimate of {self.native_asset_symbol()} received (typically understated): {native_received/1e18}"
-            )
-            # Ensure profit from arb is greater than gas costs
-            is_profitable = (
-                native_received
-                - self.estimate_gas_costs(gas_leg_1, gas_leg_2)
-                - trade_size
-            )
-            if is_profitable < self.profit_threshold:
-                print(
-                    f"Arb not profitable enough using {trade_size/1e18} {self.native_asset_symbol()} with an expected output of {is_profitable/1e18}"
+            # Mint once then sell the index into each pool by its share of the route
+            index_bought, gas_index_leg = self.mint(trade_size).values()
+            native_received = 0
+            for exchange, amount in split_amount(index_bought, shares):
+                output, gas = (
+                    self.venues[exchange].swap(exchange, amount, False).values()
                 )
-                return 0
-            else:
-                print(
-                    f"Arb is profitable using {trade_size/1e18} {self.native_asset_symbol()} with a profit of {is_profitable/1e18}"
-                )
-                return trade_size
+                native_received += output
+                self.gas_estimates[(exchange, premium)] = gas
         else:
-            # Retrieve the correct function for calcualting the optimal trade size based on the pool address
-            calc_trade_size_func = self.get_trade_size_mapping(exchange)
-            # Get the function used to execute trades on the given pool address
-            trading_func = self.func_for_exchange(exchange)
-            # Get the optimal trade size
-            trade_size = calc_trade_size_func(
-                exchange,
-                self.get_nav_price(self.get_price_mapping(exchange)[0]),
-                premium,
-            )
             print(f"Optimal swap is {trade_size/1e18} {self.native_asset_symbol()}")
-            # Call the swap and burn functions to assess profit
-            index_bought, gas_leg_1 = trading_func(exchange, trade_size, True).values()
-            native_received, gas_leg_2 = self.burn(index_bought).values()
+            # Buy the index from each pool by its share of the route then burn it once
+            index_bought = 0
+            for exchange, amount in split_amount(trade_size, shares):
+                output, gas = (
+                    self.venues[exchange].swap(exchange, amount, True).values()
+                )
+                index_bought += output
+                self.gas_estimates[(exchange, premium)] = gas
+            # Burn the amount the live burn will, so its 0x quotes are cached under the same sell amounts
+            burn_amount = int(index_bought * config.leg_2_amount_share)
+            native_received, gas_index_leg = self.burn(burn_amount).values()
+        self.gas_estimates[("index", premium)] = gas_index_leg
+        print(
+            f"Estimate of {self.native_asset_symbol()} received (typically understated): {native_received/1e18}"
+        )
+        # Ensure profit from arb is greater than gas costs
+        is_profitable = (
+            native_received
+            - self.estimate_gas_costs(self.route_gas(premium, shares))
+            - trade_size
+        )
+        if is_profitable < self.profit_threshold:
             print(
-                f"Estimate of {self.native_asset_symbol()} received (typically understated): {native_received/1e18}"
+                f"Arb not profitable enough using {trade_size/1e18} {self.native_asset_symbol()} with an expected output of {is_profitable/1e18}"
             )
-            # Ensure profit from arb is greater than gas costs
-            is_profitable = (
-                native_received
-                - self.estimate_gas_costs(gas_leg_1, gas_leg_2)
-                - trade_size
+            return 0, None, 0, None
+        else:
+            print(
+                f"Arb is profitable using {trade_size/1e18} {self.native_asset_symbol()} with a profit of {is_profitable/1e18}"
             )
-            if is_profitable < self.profit_threshold:
-                print(
-                    f"Arb not profitable enough using {trade_size/1e18} {self.native_asset_symbol()} with an expected output of {is_profitable/1e18}"
-                )
-                return 0
-            else:
-                print(
-                    f"Arb is profitable using {trade_size/1e18} {self.native_asset_symbol()} with a profit of {is_profitable/1e18}"
+            return trade_size, shares, is_profitable, None if premium else burn_amount
+
+    def estimate_gas_costs(self, gas, gas_price=None):
+        # Gas cost in wei so it can be netted against wei amounts
+        gas_price = self.get_gas_price() if gas_price is None else gas_price
+        return int(gas * gas_price)
+
+    def route_gas(self, premium, exchanges):
+        # Mint or burn leg plus one swap per pool in the route, from the last fork simulation or the configured default
+        return self.gas_estimates.get(
+            ("index", premium), config.arb_gas_estimate[self.chain_id]
+        ) + sum(self.gas_estimates.get((i, premium), 0) for i in exchanges)
+
+    def local_route_profit(
+        self, exchanges, premium, trade_size, nav, native_price, gas_price
+    ):
+        # Profit of a total trade size split across the pools, evaluated entirely from local state, in native wei
+        if premium:
+            # Mint at NAV less mint costs then sell the index into the pools
+            routed = int(trade_size * native_price / nav * (1 - config.mint_burn_cost))
+        else:
+            routed = trade_size
+        allocations, outputs = water_fill(
+            [
+                lambda amount, exchange=exchange: self.venues[exchange].quote(
+                    exchange, amount, not premium
                 )
-                return trade_size
+                for exchange in exchanges
+            ],
+            routed,
+            config.route_chunks,
+        )
+        if routed == 0 or sum(allocations) < routed:
+            # Size exceeds the pools' combined liquidity
+            return -float("inf"), None
+        shares = {
+            exchange: allocation / routed
+            for exchange, allocation in zip(exchanges, allocations)
+            if allocation > 0
+        }
+        if premium:
+            native_received = sum(outputs)
+        else:
+            # Burn the index bought from the pools at NAV less burn costs
+            native_received = int(
+                sum(outputs) * nav / native_price * (1 - config.mint_burn_cost)
+            )
+        gas_cost = self.estimate_gas_costs(self.route_gas(premium, shares), gas_price)
+        return native_received - trade_size - gas_cost, shares
 
-    def estimate_gas_costs(self, leg_1, leg_2):
-        gas_cost_in_eth = (leg_1 + leg_2) * self.w3.eth.gas_price / 1e18
-        return gas_cost_in_eth
+    def optimize_route(self, premium, nav_trade_sizes):
+        exchanges = [i for i, j in nav_trade_sizes.items() if j is not None and j > 0]
+        if len(exchanges) == 0:
+            return 0, None
+        nav = self.get_nav_price()
+        native_price = self.get_native_price()
+        gas_price = self.get_gas_price()
+        # The search bound is every pool pushed to NAV at once
+        trade_size, profit = optimize_trade_size(
+            lambda size: self.local_route_profit(
+                exchanges, premium, size, nav, native_price, gas_price
+            )[0],
+            int(
+                sum(nav_trade_sizes[i] for i in exchanges)
+                * config.sizing_search_multiplier
+            ),
+            config.sizing_grid_points,
+            config.sizing_tolerance,
+        )
+        print(
+            f"Most profitable size is {trade_size/1e18} {self.native_asset_symbol()} with an estimated profit of {profit/1e18}"
+        )
+        if profit <= 0:
+            return 0, None
+        return (
+            trade_size,
+            self.local_route_profit(
+                exchanges, premium, trade_size, nav, native_price, gas_price
+            )[1],
+        )
 
     # Function for wrapping and unwrapping the native token
     def wrapped_native(self, amount, is_wrap):
         assert type(is_wrap) == bool, "Please enter a bool"
         if is_wrap:
             return self.wrapped_native_contract.functions.deposit().build_transaction(
-                {
-                    "value": amount,
-                    "nonce": self.w3.eth.get_transaction_count(self.address),
-                }
+                {"value": amount, **self.fee_oracle.fees()}
             )
         else:
             return self.wrapped_native_contract.functions.withdraw(
                 amount
-            ).build_transaction(
-                {"nonce": self.w3.eth.get_transaction_count(self.address)}
-            )
+            ).build_transaction(self.fee_oracle.fees())
 
     def get_total_native_balance(self, wei):
         assert type(wei) == bool, "Param should be bool"
@@ -584,11 +1025,13 @@ class ArbBotBase(Pricing):
             )
         return native + wrapped
 
-    def swap_via_uniswap(self, pool, amount, is_buy, flag="CALL"):
+    def swap_via_uniswap(
+        self, pool, amount, is_buy, flag="CALL", gas=None, recipient=None, fees=None
+    ):
         assert type(is_buy) == bool,"Param should be bool"
         # Instantiate contract address
-        uniswap_router_contract = self.w3.eth.contract(
-            address=config.uniswap_swap_router, abi=abis.uniswap_swap_router
+        uniswap_router_contract = self.contract(
+            config.uniswap_swap_router, "uniswap_swap_router"
         )
         # Create struct
         exact_input_single_params = {}
@@ -598,270 +1041,378 @@ class ArbBotBase(Pricing):
         exact_input_single_params["tokenOut"] = (
             self.index_address if is_buy else self.wrapped_native_address
         )
-        exact_input_single_params["fee"] = int(3000)
-        exact_input_single_params["recipient"] = self.address
+        exact_input_single_params["fee"] = self.venues[pool].fee
+        exact_input_single_params["recipient"] = (
+            self.address if recipient is None else recipient
+        )
         exact_input_single_params["deadline"] = (
             self.w3.eth.get_block("latest")["timestamp"] + 10000
         )
         exact_input_single_params["amountIn"] = int(amount)
         exact_input_single_params["amountOutMinimum"] = 0
         exact_input_single_params["sqrtPriceLimitX96"] = 0
-        if flag.upper() == "CALL":
-            # Call static for output 
-            call_static = uniswap_router_contract.functions.exactInputSingle(
-                exact_input_single_params
-            ).call({"value": amount if is_buy else 0})
-            gas_estimate = int(
-                uniswap_router_contract.functions.exactInputSingle(
-                    exact_input_single_params
-                ).estimate_gas({"value": amount if is_buy else 0})
-                * config.zero_ex_multiplier
-            )
-            return {"output": call_static, "gas": gas_estimate}
-        elif flag.upper() == "BUILD":
-            built_transaction = uniswap_router_contract.functions.exactInputSingle(
+        if flag.upper() == "QUOTE":
+            # Simulate the swap off-chain from the cached pool state
+            return {
+                "output": self.uniswap_v3_get_swap_out(pool, amount, is_buy),
+                "gas": int(config.uniswap_v3_swap_gas * config.zero_ex_multiplier),
+            }
+        # Simulate once for the output, gas and the transaction
+        return self.prepare_transaction(
+            uniswap_router_contract.functions.exactInputSingle(
                 exact_input_single_params
-            ).build_transaction(
-                {
-                    "value": amount if is_buy else 0,
-                    "nonce": self.w3.eth.get_transaction_count(self.address),
-                    "gas": int(
-                        uniswap_router_contract.functions.exactInputSingle(
-                            exact_input_single_params
-                        ).estimate_gas({"value": amount if is_buy else 0})
-                        * config.zero_ex_multiplier
-                    ),
-                }
-            )
-            return built_transaction
+            ),
+            amount if is_buy else 0,
+            config.zero_ex_multiplier,
+            flag,
+            fees,
+            gas,
+        )
 
-    def swap_via_trader_joe(self, pool, amount, is_buy, flag="CALL"):
+    def swap_via_trader_joe(
+        self, pool, amount, is_buy, flag="CALL", gas=None, recipient=None, fees=None
+    ):
         assert type(is_buy) == bool,"Param should be bool"
         # Instantiate contract instance
-        trader_joe_router = self.w3.eth.contract(
-            address=config.trader_joe_router, abi=abis.trader_joe_router
-        )
-        # Create params and struct
+        trader_joe_router = self.contract(config.trader_joe_router, "trader_joe_router")
+        # Create params and struct, the path comes from the pool's declared protocol and bin step
+        venue = self.venues[pool]
         amountOutMin = 0
         path = {
-            "pairBinSteps": [50] if pool == config.cai_tj_v2_pool else [0],
-            "versions": [2] if pool == config.cai_tj_v2_pool else [0],
+            "pairBinSteps": [venue.bin_step or 0],
+            "versions": [venue.router_version],
             "tokenPath": [self.wrapped_native_address, self.index_address]
             if is_buy
             else [self.index_address, self.wrapped_native_address],
         }
-        to = self.address
+        to = self.address if recipient is None else recipient
         deadline = self.w3.eth.get_block("latest")["timestamp"] + 10000
-        if is_buy:
-            if flag.upper() == "CALL":
-                # Call static for output
-                call_static = trader_joe_router.functions.swapExactNATIVEForTokens(
-                    amountOutMin, path, to, deadline
-                ).call({"value": amount})
-                gas_estimate = int(
-                    trader_joe_router.functions.swapExactNATIVEForTokens(
-                        amountOutMin, path, to, deadline
-                    ).estimate_gas({"value": amount})
-                    * config.zero_ex_multiplier
+        # Simulate once for the output, gas and the transaction
+        return self.prepare_transaction(
+            trader_joe_router.functions.swapExactNATIVEForTokens(
+                amountOutMin, path, to, deadline
+            )
+            if is_buy
+            else trader_joe_router.functions.swapExactTokensForNATIVE(
+                amount, amountOutMin, path, to, deadline
+            ),
+            amount if is_buy else 0,
+            config.zero_ex_multiplier,
+            flag,
+            fees,
+            gas,
+        )
+
+    def get_gas_price(self):
+        # Predicted next block base fee plus the typical priority fee
+        return self.fee_oracle.gas_price()
+
+    def select_route(self, premium, exchanges):
+        # Check profitability, size and route across the pools. Switch mode to simulate tx on forked network
+        try:
+            trade_size, shares, expected_profit, burn_amount = self.change_mode(
+                0, True, self.calculate_route, premium, exchanges
+            )
+        except NavDriftError as e:
+            print(f"Skipping the {self.route_name(premium)}: {e}")
+            return
+        if trade_size == 0:
+            return
+        # Every transaction of the route bids the same fees, scaled to the profit the fork simulation expects
+        fees = self.fee_oracle.fees(expected_profit, self.route_gas(premium, shares))
+        print(
+            f"Bidding a priority fee of {fees['maxPriorityFeePerGas']/1e9} gwei with a max fee of {fees['maxFeePerGas']/1e9} gwei"
+        )
+        if config.atomic_execution:
+            # Every leg in one transaction through the arb executor
+            transaction_hash = self.execute_atomic(
+                premium, trade_size, shares, fees, burn_amount
+            )
+            if transaction_hash is None:
+                return
+            return self.settle_arb([transaction_hash])
+        if premium:
+            # Simulate the mint and pre-build the swaps from its output with the gas the fork simulation used
+            first_legs = [self.mint(trade_size, flag="PREPARE", fees=fees)]
+            dependent_legs = [
+                self.venues[exchange].swap(
+                    exchange,
+                    amount,
+                    False,
+                    "BUILD",
+                    self.gas_estimates[(exchange, True)],
+                    fees=fees,
                 )
-                return {"output": call_static, "gas": gas_estimate}
-            elif flag.upper() == "BUILD":
-                built_transaction = (
-                    trader_joe_router.functions.swapExactNATIVEForTokens(
-                        amountOutMin, path, to, deadline
-                    ).build_transaction(
-                        {
-                            "value": amount,
-                            "nonce": self.w3.eth.get_transaction_count(self.address),
-                            "gas": int(
-                                trader_joe_router.functions.swapExactNATIVEForTokens(
-                                    amountOutMin, path, to, deadline
-                                ).estimate_gas({"value": amount if is_buy else 0})
-                                * config.zero_ex_multiplier
-                            ),
-                        }
-                    )
+                for exchange, amount in split_amount(
+                    int(first_legs[0]["output"] * config.leg_2_amount_share), shares
                 )
-                return built_transaction
+            ]
         else:
-            if flag.upper() == "CALL":
-                # Call static for output
-                call_static = trader_joe_router.functions.swapExactTokensForNATIVE(
-                    amount, amountOutMin, path, to, deadline
-                ).call()
-                gas_estimate = int(
-                    trader_joe_router.functions.swapExactTokensForNATIVE(
-                        amount, amountOutMin, path, to, deadline
-                    ).estimate_gas()
-                    * config.zero_ex_multiplier
+            # Simulate the swaps and pre-build the burn from their output with the gas the fork simulation used
+            first_legs = [
+                self.venues[exchange].swap(exchange, amount, True, "PREPARE", fees=fees)
+                for exchange, amount in split_amount(trade_size, shares)
+            ]
+            dependent_legs = [
+                self.burn(
+                    self.live_burn_amount(
+                        burn_amount, sum(i["output"] for i in first_legs)
+                    ),
+                    flag="BUILD",
+                    gas=self.gas_estimates[("index", False)],
+                    fees=fees,
                 )
-                return {"output": call_static, "gas": gas_estimate}
-            elif flag.upper() == "BUILD":
-                built_transaction = (
-                    trader_joe_router.functions.swapExactTokensForNATIVE(
-                        amount, amountOutMin, path, to, deadline
-                    ).build_transaction(
-                        {
-                            "nonce": self.w3.eth.get_transaction_count(self.address),
-                            "gas": int(
-                                trader_joe_router.functions.swapExactTokensForNATIVE(
-                                    amount, amountOutMin, path, to, deadline
-                                ).estimate_gas()
-                                * config.zero_ex_multiplier
-                            ),
-                        }
+            ]
+        # Execute the route's transactions
+        receipts, dependent_hashes = self.execute_legs(
+            [i["transaction"] for i in first_legs], dependent_legs
+        )
+        if any(i["status"] == False for i in receipts):
+            return
+        # Nonces are consecutive, so the last leg confirming settles the whole route
+        return self.settle_arb(
+            [i["response"]["transactionHash"] for i in receipts] + dependent_hashes
+        )
+
+    def get_price_deltas(self):
+        deltas = {}
+        for exchange in self.exchange_addresses:
+            # Get delta between NAV and exchange price
+            deltas[exchange] = self.get_price_delta(exchange)
+            print(f"Current price delta on {exchange} is {deltas[exchange]}")
+        return deltas
+
+    def group_routes(self, deltas):
+        # Pools at a premium share one mint and pools at a discount share one burn
+        routes = {
+            premium: [i for i, j in deltas.items() if j != 0 and (j > 0) == premium]
+            for premium in [True, False]
+        }
+        return {i: j for i, j in routes.items() if len(j) > 0}
+
+    def route_name(self, premium):
+        return f"{'premium' if premium else 'discount'} route"
+
+    def watch_arb(self, ws_endpoint):
+        print(f"Watching {self.index_symbol} pools on chain id {self.chain_id}")
+        # Pool events and NAV are always read from mainnet, in dev mode only the arbs run on the fork
+        pool_events = {}
+        for pool in self.exchange_addresses:
+            venue = self.venues[pool]
+            pool_contract = registry.get(self.mainnet_w3, pool, venue.abi_name)
+            pool_events[pool] = [
+                getattr(pool_contract.events, i)() for i in venue.event_names
+            ]
+        watcher = EventWatcher(
+            self.mainnet_w3,
+            ws_endpoint,
+            pool_events,
+            config.event_poll_interval[self.chain_id],
+        )
+        watcher.start()
+        latency = LatencyStats()
+        # Last price per pool, seeded from a snapshot and then updated from events alone
+        pool_prices = {
+            pool: self.change_mode(1, True, self.get_pool_price, pool)
+            for pool in self.exchange_addresses
+        }
+        nav_price = None
+        nav_block = None
+        # Block each side of NAV was last sized at and the arb it started
+        sized_blocks = {}
+        arbs = {}
+        while True:
+            kind, seen_block, event = watcher.notifications.get()
+            if kind == "block":
+                # Fee history is extended as heads arrive, so bids never wait on it
+                self.get_session(1).fee_oracle.update(seen_block)
+                if (
+                    nav_block is not None
+                    and seen_block - nav_block
+                    < config.event_nav_refresh_blocks[self.chain_id]
+                ):
+                    continue
+                # NAV can move without pool activity, so every pool is rechecked against the new one
+                nav_block = seen_block
+                try:
+                    nav_price = self.change_mode(1, True, self.get_nav_price)
+                except NavDriftError as e:
+                    # Nothing is sized until a later refresh agrees with totalEvaluation again
+                    print(f"Not trading {self.index_symbol}: {e}")
+                    nav_price = None
+                    continue
+                triggered = [(pool, None) for pool in self.exchange_addresses]
+            else:
+                pool = Web3.to_checksum_address(event["address"])
+                venue = self.venues[pool]
+                pool_prices[pool] = self.change_mode(
+                    1,
+                    True,
+                    venue.event_price,
+                    pool,
+                    event["args"],
+                    venue.quote_asset,
+                )
+                triggered = [(pool, event)]
+            if nav_price is None:
+                continue
+            deltas = {pool: pool_prices[pool] / nav_price - 1 for pool in pool_prices}
+            for pool, event in triggered:
+                delta = deltas[pool]
+                premium = delta > 0
+                # Size only outside the band, once per block and not while an arb on the same side is in flight
+                if (
+                    abs(delta) < config.event_delta_band[self.chain_id]
+                    or sized_blocks.get(premium, -1) >= seen_block
+                    or (premium in arbs and not arbs[premium].done())
+                ):
+                    continue
+                if event is not None:
+                    blocks = latency.record(event["blockNumber"], seen_block)
+                    print(
+                        f"{event['event']} on {pool} in block {event['blockNumber']} seen at block {seen_block} ({blocks} blocks), delta {delta}"
                     )
+                sized_blocks[premium] = seen_block
+                # Routed across every pool on the same side of NAV on a worker so events keep being handled meanwhile
+                arbs[premium] = self.route_workers.submit(
+                    self.watch_route,
+                    premium,
+                    self.group_routes(deltas)[premium],
+                    self.change_mode(1, True, self.get_gas_price),
                 )
-                return built_transaction
+                print(f"Detection latency stats: {latency.stats()}")
 
-    def get_gas_price(self):
-        return self.w3.eth.gas_price
-
-    def select_arb_type(self, exchange_address):
-        # Get delta between NAV and exchange price
-        delta = super().get_price_delta(exchange_address)
-        print(f"Current price delta is {delta}")
-        if delta > 0:
-            # Check profitability and trade size. Switch mode to simulate tx on forked network.
-            trade_size = self.change_mode(
-                0, True, self.calculate_trade_size, True, exchange_address
-            )
-            if trade_size == 0:
-                return
-            # Get native asset balance before arb
-            native_balance_before = self.get_total_native_balance(True)
-            # Get index balance before
-            index_balance_before = self.retrieve_index_balance(True)
-            # Execute mint transaction
-            tx1 = self.execute_transaction(self.mint(trade_size, flag="build"))
-            if tx1["status"] == False:
-                return
-            # Retrieve index balance
-            index_balance_after = self.retrieve_index_balance(True)
-            # Calculate net index tokens gained
-            diff = index_balance_after - index_balance_before
-            # Execute swap transaction
-            trading_func = self.func_for_exchange(exchange_address)
-            tx2 = self.execute_transaction(
-                trading_func(exchange_address, diff, False, "build")
-            )
-            if tx2["status"] == False:
-                return
-            # Get native asset balance after arb
-            native_balance_after = self.get_total_native_balance(True)
-            profit = native_balance_after - native_balance_before
-            return profit
-        elif delta < 0:
-            # Check profitability and trade size. Switch mode to simulate tx on forked network
-            trade_size = self.change_mode(
-                0, True, self.calculate_trade_size, False, exchange_address
-            )
-            if trade_size == 0:
-                return
-            # Get native asset balance before arb
-            native_balance_before = self.get_total_native_balance(True)
-            # Get index balance before
-            index_balance_before = self.retrieve_index_balance(True)
-            # Execute swap transaction
-            trading_func = self.func_for_exchange(exchange_address)
-            tx1 = self.execute_transaction(
-                trading_func(exchange_address, trade_size, True, "build")
-            )
-            if tx1["status"] == False:
-                return
-            # Retrieve index balance after
-            index_balance_after = self.retrieve_index_balance(True)
-            # Calculate net index tokens gained
-            diff = index_balance_after - index_balance_before
-            # Execute burn transaction
-            tx2 = self.execute_transaction(self.burn(diff, flag="build"))
-            if tx2["status"] == False:
-                return
-            # Get native balance after arb
-            native_balance_after = self.get_total_native_balance(True)
-            profit = native_balance_after - native_balance_before
-            return profit
+    def run_route(self, premium, exchanges, gas_price):
+        print(
+            f"Assessing the {self.route_name(premium)} across {exchanges} on chain id {self.chain_id}"
+        )
+        # Each route simulates on a fork of its own, routes beyond the pool size wait for one to free up
+        with self.forks.acquire() as fork:
+            self.fork = fork
+            try:
+                self.prepare_fork(gas_price)
+                arb = self.change_mode(
+                    self.home_mode, True, self.select_route, premium, exchanges
+                )
+                # In dev the arb runs on the fork, so it has to settle before the next route reverts it
+                if self.home_mode == 0 and arb is not None:
+                    arb.result()
+                return arb
+            finally:
+                self.fork = None
+
+    def watch_route(self, premium, exchanges, gas_price):
+        self.report_arb(premium, self.run_route(premium, exchanges, gas_price))
+
+    def report_arb(self, premium, arb):
+        arb = arb.result() if arb is not None else None
+        if arb is not None:
+            print(
+                f"Arb on the {self.route_name(premium)} was successful with a profit of {arb/1e18} {self.native_asset_symbol()}"
+            )
+        else:
+            print(f"Arb on the {self.route_name(premium)} was unsuccessful")
 
     def query_arb(self):
         print(
-            f"Starting {self.index_symbol} arb bot in {'dev mode' if self.mode == 0 else 'production mode' }"
+            f"Starting {self.index_symbol} arb bot in {'dev mode' if self.home_mode == 0 else 'production mode' }"
         )
         gas_price = self.change_mode(1, True, self.get_gas_price)
         print(f"Current gas price is {gas_price/1e9}")
-        print("Spinning up ganache mainnet fork instance")
-        ganache_instance = self.start_ganache_node(gas_price)
-        self.change_mode(0, True, self.preflight_checks)
-        for exchange in self.exchange_addresses:
-            print(f"Assessing {exchange} on chain id {self.chain_id}")
-            arb = self.select_arb_type(exchange)
-            if arb is not None:
-                print(
-                    f"Arb on exchange {exchange} was successful with a profit of {arb/1e18} {self.native_asset_symbol()}"
-                )
-            else:
-                print(f"Arb on exchange {exchange} was unsuccessful")
-        print("Killing ganache mainnet fork instance")
-        self.kill_ganache_node(ganache_instance)
+        # Pools are grouped by side of NAV from mainnet prices, each side is routed on its own fork
+        try:
+            routes = self.group_routes(self.change_mode(1, True, self.get_price_deltas))
+        except NavDriftError as e:
+            print(f"Not trading {self.index_symbol} this cycle: {e}")
+            return
+        # Both sides are assessed side by side and arbs settle in the background
+        arbs = {
+            premium: self.route_workers.submit(
+                self.run_route, premium, exchanges, gas_price
+            )
+            for premium, exchanges in routes.items()
+        }
+        for premium, arb in arbs.items():
+            self.report_arb(premium, arb.result())
+        print(f"Price cache stats: {self.prices.stats()}")
+        print(f"Block cache stats: {self.block_cache.stats()}")
+        print(f"0x quote cache stats: {self.zero_ex.stats()}")
+        print(f"Connection stats: {connection_stats(self.http_session)}")
+        print(f"Ledger balances: {self.get_session(1).ledger.balances}")
+
+
+# Shared by every bot so prices are fetched once per TTL across chains
+price_service = PriceService(
+    pycoingecko.CoinGeckoAPI(),
+    config.coingecko_assets,
+    config.price_cache_ttl,
+    config.price_cache_stale_ttl,
+)
+
+# Shared by every bot so all 0x requests draw on the one API key's rate limit
+zero_ex_quoter = create_zero_ex_quoter()
+
+# Shared by every bot so node connections are kept alive across cycles
+http_session = create_http_session(config.http_pool_size)
+
+# Warm forks per chain kept across cycles
+forks = {}
+for index in venue_registry.indices:
+    if index.chain_id not in forks:
+        forks[index.chain_id] = create_fork_pool(
+            index.chain_id, decouple.config(index.endpoint), http_session
+        )
+for fork_pool in forks.values():
+    atexit.register(fork_pool.stop)
 
 
+def create_bots(mode):
+    # One bot per index in the venue file, dev bots run their arbs on the forks
+    return [
+        ArbBotBase(
+            mode,
+            index.chain_id,
+            decouple.config(index.endpoint),
+            index.zero_ex_base_url,
+            venue_registry.pools(index.chain_id, index.symbol),
+            index.address,
+            index.symbol,
+            index.router,
+            index.wrapped_native,
+            index.profit_threshold["dev" if mode == 0 else "prod"],
+            price_service,
+            zero_ex_quoter,
+            forks[index.chain_id],
+            http_session,
+        )
+        for index in venue_registry.indices
+    ]
+
+
+if len(sys.argv) > 2 and sys.argv[2] == "watch":
+    # Event-driven mode, each index reacts to its own pool events
+    bots = create_bots(0 if sys.argv[1] == "dev" else 1)
+    run_in_threads(
+        *[
+            lambda bot=bot, index=index: bot.watch_arb(
+                decouple.config(index.ws_endpoint, default=None)
+            )
+            for bot, index in zip(bots, venue_registry.indices)
+        ]
+    )
+
 while True:
     if sys.argv[1] == "dev":
         # Create instances of the arb bot that run on the local forked network
-        arb_bot_avax = ArbBotBase(
-            0,
-            43114,
-            decouple.config("AVALANCHE_INFURA_URL"),
-            config.zero_ex_base_url_avax,
-            [config.cai_tj_v1_pool, config.cai_tj_v2_pool],
-            config.cai_address,
-            "CAI",
-            config.index_router_avax,
-            config.wavax,
-            1,
-        )
-        arb_bot_eth = ArbBotBase(
-            0,
-            1,
-            decouple.config("ETHEREUM_INFURA_URL"),
-            config.zero_ex_base_url,
-            [config.pdi_weth_pool],
-            config.pdi_address,
-            "PDI",
-            config.index_router,
-            config.weth,
-            0.02,
-        )
-        arb_bot_eth.query_arb()
-        arb_bot_avax.query_arb()
+        bots = create_bots(0)
+        # Each index runs on its own thread, a cycle takes as long as the slowest one
+        run_in_threads(*[bot.query_arb for bot in bots])
         print("Arb bot will retry in 60 minutes")
         time.sleep(3600)
     elif sys.argv[1] == "prod":
         # Create instances of the arb bot that run on mainnet
-        arb_bot_avax = ArbBotBase(
-            1,
-            43114,
-            decouple.config("AVALANCHE_INFURA_URL"),
-            config.zero_ex_base_url_avax,
-            [config.cai_tj_v1_pool, config.cai_tj_v2_pool],
-            config.cai_address,
-            "CAI",
-            config.index_router_avax,
-            config.wavax,
-            0.5,
-        )
-        arb_bot_eth = ArbBotBase(
-            1,
-            1,
-            decouple.config("ETHEREUM_INFURA_URL"),
-            config.zero_ex_base_url,
-            [config.pdi_weth_pool],
-            config.pdi_address,
-            "PDI",
-            config.index_router,
-            config.weth,
-            0.02,
-        )
-        arb_bot_avax.query_arb()
-        arb_bot_eth.query_arb()
+        bots = create_bots(1)
+        # Each index runs on its own thread, a cycle takes as long as the slowest one
+        run_in_threads(*[bot.query_arb for bot in bots])
         print("Arb bot will retry in 60 minutes")
         time.sleep(3600)
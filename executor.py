@@ -0,0 +1,118 @@
+# Import modules
+import hashlib
+import json
+import os
+import sys
+import abis
+import config
+from eth_utils import keccak
+
+# Amount written into leg 2 calldata where the executor patches in what leg 1 produced
+AMOUNT_PLACEHOLDER = int.from_bytes(keccak(text="ArbExecutor.amount"), "big")
+
+# Amount offset for calls the executor sends unchanged, matches NO_PATCH in the contract
+NO_PATCH = 2**256 - 1
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+SOURCE_PATH = os.path.join(os.path.dirname(__file__), "solidity", "ArbExecutor.sol")
+
+# Compiled bytecode and the compiler it was built with, built by running this module and committed next to the source
+ARTIFACT_PATH = os.path.join(os.path.dirname(__file__), "solidity", "ArbExecutor.json")
+
+# Compiler settings are pinned with the version so a rebuild gives the same bytecode
+OPTIMIZER_RUNS = 200
+EVM_VERSION = "paris"
+
+
+def source_hash():
+    with open(SOURCE_PATH, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def executor_abi():
+    # abis.arb_executor is the only copy of the ABI, the build checks it against the compiler's
+    return json.loads(abis.arb_executor)
+
+
+def compile_executor(solc_version):
+    # Only needed to build the executor, so py-solc-x is imported on first use
+    import solcx
+
+    if solc_version not in [str(i) for i in solcx.get_installed_solc_versions()]:
+        solcx.install_solc(solc_version)
+    compiled = solcx.compile_files(
+        [SOURCE_PATH],
+        output_values=["abi", "bin"],
+        solc_version=solc_version,
+        optimize=True,
+        optimize_runs=OPTIMIZER_RUNS,
+        evm_version=EVM_VERSION,
+    )
+    artifact = compiled[f"{SOURCE_PATH}:ArbExecutor"]
+    if sorted(map(json.dumps, artifact["abi"])) != sorted(
+        map(json.dumps, executor_abi())
+    ):
+        raise ValueError("abis.arb_executor does not match the compiled ArbExecutor")
+    return artifact["bin"]
+
+
+def build_executor(solc_version):
+    bytecode = compile_executor(solc_version)
+    with open(ARTIFACT_PATH, "w") as f:
+        json.dump(
+            {
+                "solc_version": solc_version,
+                "optimizer_runs": OPTIMIZER_RUNS,
+                "evm_version": EVM_VERSION,
+                "source_sha256": source_hash(),
+                "bin_keccak256": keccak(hexstr=bytecode).hex(),
+                "bin": bytecode,
+            },
+            f,
+            indent=1,
+        )
+        f.write("\n")
+    return bytecode
+
+
+def load_executor(solc_version):
+    # Bytecode from the committed artifact, which must come from the current source and the pinned compiler
+    if not os.path.exists(ARTIFACT_PATH):
+        raise FileNotFoundError(
+            f"{ARTIFACT_PATH} is missing, build it with python executor.py"
+        )
+    with open(ARTIFACT_PATH) as f:
+        artifact = json.load(f)
+    if (
+        artifact["solc_version"] != solc_version
+        or artifact["optimizer_runs"] != OPTIMIZER_RUNS
+        or artifact["evm_version"] != EVM_VERSION
+        or artifact["source_sha256"] != source_hash()
+    ):
+        raise ValueError(
+            f"{ARTIFACT_PATH} was not built from the current source with solc {solc_version}, rebuild it"
+        )
+    if keccak(hexstr=artifact["bin"]).hex() != artifact["bin_keccak256"]:
+        raise ValueError(f"{ARTIFACT_PATH} bytecode does not match its hash")
+    return executor_abi(), artifact["bin"]
+
+
+def executor_call(encoded_call, token=None):
+    # Executor Call struct for an encoded leg, patched when its calldata holds the amount placeholder
+    data = bytes.fromhex(encoded_call["data"][2:])
+    offset = data.find(AMOUNT_PLACEHOLDER.to_bytes(32, "big"))
+    return (
+        encoded_call["target"],
+        encoded_call["value"],
+        data,
+        token if token is not None else ZERO_ADDRESS,
+        offset if offset >= 0 else NO_PATCH,
+    )
+
+
+if __name__ == "__main__":
+    # python executor.py [solc version] rebuilds the committed artifact
+    solc_version = sys.argv[1] if len(sys.argv) > 1 else config.solc_version
+    build_executor(solc_version)
+    print(f"Built {ARTIFACT_PATH} with solc {solc_version}")
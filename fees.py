@@ -0,0 +1,112 @@
+# Import modules
+import threading
+import time
+from collections import deque
+
+# Largest change in the base fee from one block to the next under EIP-1559
+BASE_FEE_MAX_CHANGE = 1 / 8
+
+
+def next_base_fee(base_fee, gas_used_ratio):
+    # Base fee of the following block, blocks target half their gas limit
+    return int(base_fee * (1 + BASE_FEE_MAX_CHANGE * (gas_used_ratio - 0.5) / 0.5))
+
+
+# Fee history of one endpoint, extended only by the blocks that arrived since the last update, and the EIP-1559 fees bid from it
+class FeeOracle:
+    def __init__(
+        self,
+        w3_provider,
+        history_blocks,
+        reward_percentile,
+        blocks_ahead,
+        profit_share,
+        head_ttl,
+    ):
+        self.w3 = w3_provider
+        self.history_blocks = history_blocks
+        self.reward_percentile = reward_percentile
+        self.blocks_ahead = blocks_ahead
+        self.profit_share = profit_share
+        self.head_ttl = head_ttl
+        # Priority fee paid at the percentile in each recent block, oldest first
+        self.rewards = deque(maxlen=history_blocks)
+        self.head = None
+        self.head_checked = 0
+        # Base fee of the block after the head
+        self.base_fee = None
+        # Whether the endpoint serves eth_feeHistory, assumed until a request fails
+        self.fee_history_support = True
+        self.lock = threading.Lock()
+
+    def update(self, head=None):
+        with self.lock:
+            if head is None:
+                # The head block number is briefly reused so back to back builds share one lookup
+                if (
+                    self.head is not None
+                    and time.time() - self.head_checked < self.head_ttl
+                ):
+                    return
+                head = self.w3.eth.block_number
+            self.head_checked = time.time()
+            if head == self.head:
+                return
+            if self.head is None or head < self.head:
+                # First update or the chain went back, e.g. a fork revert, so the history is rebuilt
+                self.rewards.clear()
+                block_count = self.history_blocks
+            else:
+                block_count = min(head - self.head, self.history_blocks)
+            if self.fee_history_support:
+                response = self.w3.provider.make_request(
+                    "eth_feeHistory",
+                    [hex(block_count), hex(head), [self.reward_percentile]],
+                )
+                if "error" not in response:
+                    history = response["result"]
+                    self.rewards.extend(int(i[0], 16) for i in history["reward"])
+                    # The last base fee returned is already the next block's
+                    self.base_fee = int(history["baseFeePerGas"][-1], 16)
+                    self.head = head
+                    return
+                # Nodes without eth_feeHistory, e.g. Ganache, fall back to the head block and the node's suggested tip
+                print(
+                    f"eth_feeHistory unavailable on {self.w3.provider.endpoint_uri}, using the head block"
+                )
+                self.fee_history_support = False
+            block = self.w3.eth.get_block(head)
+            self.base_fee = next_base_fee(
+                block["baseFeePerGas"], block["gasUsed"] / block["gasLimit"]
+            )
+            self.rewards.append(self.w3.eth.max_priority_fee)
+            self.head = head
+
+    def priority_fee(self):
+        # Typical priority fee, the median of the recent rewards at the percentile
+        rewards = sorted(self.rewards)
+        return rewards[len(rewards) // 2] if len(rewards) > 0 else 0
+
+    def gas_price(self):
+        # Expected price per gas in the next block
+        self.update()
+        return self.base_fee + self.priority_fee()
+
+    def fees(self, profit=None, gas=None):
+        self.update()
+        priority_fee = self.priority_fee()
+        if profit is not None and profit > 0 and gas:
+            # A share of the expected profit per unit of gas is bid on top, so more profitable arbs outbid for the next block
+            priority_fee += int(profit * self.profit_share / gas)
+        return {
+            # Covers the base fee rising at the maximum rate for every block the transaction may wait
+            "maxFeePerGas": int(
+                self.base_fee * (1 + BASE_FEE_MAX_CHANGE) ** self.blocks_ahead
+            )
+            + priority_fee,
+            "maxPriorityFeePerGas": priority_fee,
+        }
+
+    def effective_gas_price(self, fees):
+        # Price per gas actually paid if the transaction lands in the next block
+        return min(fees["maxFeePerGas"], self.base_fee + fees["maxPriorityFeePerGas"])
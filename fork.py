@@ -0,0 +1,93 @@
+# Import modules
+import queue
+import subprocess
+from contextlib import contextmanager
+from web3 import Web3
+
+
+# Keeps one warm Ganache fork per chain and restores its post-preflight state before each simulation
+class ForkManager:
+    def __init__(self, chain_id, mainnet_endpoint, port, max_lag, http_session):
+        self.chain_id = chain_id
+        self.mainnet_endpoint = mainnet_endpoint
+        self.port = port
+        self.max_lag = max_lag
+        self.endpoint = f"http://127.0.0.1:{port}"
+        self.instance = None
+        # Mainnet head when the fork was started
+        self.fork_block = None
+        self.snapshot_id = None
+        # One provider for the life of the manager, the port stays the same across re-forks
+        self.w3 = Web3(
+            Web3.HTTPProvider(
+                endpoint_uri=self.endpoint,
+                request_kwargs={"timeout": 60},
+                session=http_session,
+            )
+        )
+
+    def is_running(self):
+        if self.instance is None:
+            return False
+        return self.w3.is_connected()
+
+    def needs_refork(self, head_block):
+        # Re-fork only when the fork has fallen too far behind the head
+        return not self.is_running() or head_block - self.fork_block > self.max_lag
+
+    def start(self, gas_price, head_block):
+        # Spin up a daemon version of ganache on this chain's port
+        sub_process_response = subprocess.run(
+            f"npx ganache --fork {self.mainnet_endpoint} -q -g {gas_price} --wallet.deterministic --detach -e 100000 -p {self.port}",
+            shell=True,
+            capture_output=True,
+            text=True,
+        )
+        self.instance = sub_process_response.stdout.strip()
+        self.fork_block = head_block
+        self.snapshot_id = None
+
+    def stop(self):
+        if self.instance is not None:
+            subprocess.run(["npx", "ganache", "instances", "stop", str(self.instance)])
+        self.instance = None
+        self.snapshot_id = None
+
+    def refork(self, gas_price, head_block):
+        print(f"Forking chain id {self.chain_id} at block {head_block}")
+        self.stop()
+        self.start(gas_price, head_block)
+
+    def web3(self):
+        return self.w3
+
+    def snapshot(self, w3_provider):
+        self.snapshot_id = w3_provider.provider.make_request("evm_snapshot", [])[
+            "result"
+        ]
+
+    def revert(self, w3_provider):
+        # Ganache drops a snapshot once it is reverted to, so a new one is taken straight away
+        w3_provider.provider.make_request("evm_revert", [self.snapshot_id])
+        self.snapshot(w3_provider)
+
+
+# Forks of one chain, each handed to one route at a time so routes can simulate side by side
+class ForkPool:
+    def __init__(self, forks):
+        self.forks = forks
+        self.available = queue.Queue()
+        for fork in forks:
+            self.available.put(fork)
+
+    @contextmanager
+    def acquire(self):
+        fork = self.available.get()
+        try:
+            yield fork
+        finally:
+            self.available.put(fork)
+
+    def stop(self):
+        for fork in self.forks:
+            fork.stop()
@@ -0,0 +1,87 @@
+# Import modules
+import config
+from contracts import registry
+from eth_utils.abi import collapse_if_tuple
+from web3._utils.abi import map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+
+
+def decode_output(w3_provider, fn_abi, return_data):
+    output_types = [collapse_if_tuple(i) for i in fn_abi["outputs"]]
+    # Normalize the same way contract calls do, e.g. checksummed addresses
+    decoded = map_abi_data(
+        BASE_RETURN_NORMALIZERS,
+        output_types,
+        w3_provider.codec.decode(output_types, return_data),
+    )
+    return decoded[0] if len(decoded) == 1 else list(decoded)
+
+
+# Batches view calls into a single Multicall3 aggregate3 call pinned to one block
+class Snapshot:
+    def __init__(self, w3_provider, block_number=None):
+        self.w3 = w3_provider
+        self.block_number = block_number
+        self.timestamp = None
+        self.calls = {}
+        self.results = {}
+
+    @staticmethod
+    def key(contract, fn_name, args):
+        # Args can contain structs passed as dicts so key on their repr
+        return (contract.address, fn_name, repr(tuple(args)))
+
+    def add(self, contract, fn_name, *args):
+        # Queue a call, duplicate calls are only sent once
+        self.calls[self.key(contract, fn_name, args)] = (contract, fn_name, args)
+        return self
+
+    def contains(self, contract, fn_name, *args):
+        return self.key(contract, fn_name, args) in self.results
+
+    def get(self, contract, fn_name, *args):
+        return self.results[self.key(contract, fn_name, args)]
+
+    def execute(self):
+        multicall_contract = registry.get(self.w3, config.multicall3, "multicall3")
+        calls = list(self.calls.values())
+        # Read the block number and timestamp inside the batch so the pin costs no extra round trip
+        call_structs = [
+            {
+                "target": config.multicall3,
+                "allowFailure": False,
+                "callData": multicall_contract.encodeABI(fn_name="getBlockNumber"),
+            },
+            {
+                "target": config.multicall3,
+                "allowFailure": False,
+                "callData": multicall_contract.encodeABI(
+                    fn_name="getCurrentBlockTimestamp"
+                ),
+            },
+        ]
+        for contract, fn_name, args in calls:
+            call_structs.append(
+                {
+                    "target": contract.address,
+                    "allowFailure": True,
+                    "callData": contract.encodeABI(fn_name=fn_name, args=list(args)),
+                }
+            )
+        responses = multicall_contract.functions.aggregate3(call_structs).call(
+            block_identifier=self.block_number
+            if self.block_number is not None
+            else "latest"
+        )
+        self.block_number = self.w3.codec.decode(["uint256"], responses[0][1])[0]
+        self.timestamp = self.w3.codec.decode(["uint256"], responses[1][1])[0]
+        for (contract, fn_name, args), (success, return_data) in zip(
+            calls, responses[2:]
+        ):
+            # Failed calls are left out so the getter falls back to a direct call at the pinned block
+            if not success:
+                continue
+            self.results[self.key(contract, fn_name, args)] = decode_output(
+                self.w3, contract.get_function_by_name(fn_name).abi, return_data
+            )
+        return self
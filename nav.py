@@ -0,0 +1,149 @@
+# Import modules
+import config
+import threading
+
+Q112 = 2**112
+
+
+# The off-chain NAV has drifted from totalEvaluation by more than nav_drift_tolerance
+class NavDriftError(ValueError):
+    pass
+
+
+# Constituent balances, quotes and check state of one endpoint, block numbers are only comparable within it
+class NavState:
+    def __init__(self):
+        self.assets = []
+        # asset -> amount held per index token
+        self.balances = {}
+        # asset -> last refreshedAssetPerBaseInUQ quote
+        self.quotes = {}
+        # asset -> base value per index token
+        self.values = {}
+        self.nav = 0
+        self.balances_block = None
+        self.checked_block = None
+
+
+# Off-chain index NAV from per-unit constituent balances and price oracle quotes, checked against totalEvaluation
+class NavEngine:
+    def __init__(self, pricing):
+        self.pricing = pricing
+        self.oracle_address = None
+        # Forks and mainnet are priced through the same engine, each endpoint keeps its own state
+        self.states = {}
+        # Venues priced concurrently share the engine
+        self.lock = threading.RLock()
+
+    def state(self):
+        endpoint = self.pricing.w3.provider.endpoint_uri
+        with self.lock:
+            if endpoint not in self.states:
+                self.states[endpoint] = NavState()
+            return self.states[endpoint]
+
+    def forget(self, endpoint):
+        # The endpoint's chain was rewound, its block numbers now point at different state
+        with self.lock:
+            self.states.pop(endpoint, None)
+
+    def index_contract(self):
+        return self.pricing.contract(self.pricing.index_address, "pdi_token")
+
+    def oracle_contract(self):
+        if self.oracle_address is None:
+            # Resolve the oracle the index itself is priced with
+            registry_address = self.pricing.read(self.index_contract(), "registry")
+            self.oracle_address = self.pricing.read(
+                self.pricing.contract(registry_address, "index_registry"),
+                "priceOracle",
+            )
+        return self.pricing.contract(self.oracle_address, "price_oracle")
+
+    def add_snapshot_calls(self, snapshot):
+        index_contract = self.index_contract()
+        snapshot.add(index_contract, "anatomy")
+        snapshot.add(index_contract, "inactiveAnatomy")
+        oracle_contract = self.oracle_contract()
+        # The refreshed quote is what the index is minted and burned at, the stored one can be blocks old. It writes
+        # the oracle's storage, which is fine inside the multicall's eth_call
+        for asset in self.state().assets:
+            snapshot.add(oracle_contract, "refreshedAssetPerBaseInUQ", asset)
+
+    def current_assets(self):
+        index_contract = self.index_contract()
+        assets, _ = self.pricing.read(index_contract, "anatomy")
+        return list(assets) + list(self.pricing.read(index_contract, "inactiveAnatomy"))
+
+    def load_balances(self, state, assets, block_number):
+        # Constituent amounts backing one index token, in the anatomy then inactive anatomy order
+        amounts = self.pricing.read(
+            self.pricing.contract(self.pricing.index_listing.router, "index_router"),
+            "burnTokensAmount",
+            self.pricing.index_address,
+            10**18,
+        )
+        assert len(assets) == len(amounts)
+        state.assets = assets
+        state.balances = dict(zip(assets, amounts))
+        state.quotes = {}
+        state.values = {}
+        state.nav = 0
+        state.balances_block = block_number
+
+    def update_prices(self, state):
+        oracle_contract = self.oracle_contract()
+        for asset in state.assets:
+            quote = self.pricing.read(
+                oracle_contract, "refreshedAssetPerBaseInUQ", asset
+            )
+            if quote == state.quotes.get(asset):
+                continue
+            # Only the constituents whose quote moved are repriced
+            value = state.balances[asset] * Q112 // quote if quote > 0 else 0
+            state.nav += value - state.values.get(asset, 0)
+            state.quotes[asset] = quote
+            state.values[asset] = value
+
+    def check(self, state, block_number):
+        # Compare against the on-chain evaluation, a NAV that has drifted is never traded on
+        _, onchain_nav = self.pricing.read(
+            self.pricing.contract(self.pricing.get_index_helper(), "index_helper"),
+            "totalEvaluation",
+            self.pricing.index_address,
+        )
+        if onchain_nav > 0:
+            drift = state.nav / onchain_nav - 1
+        else:
+            drift = 0 if state.nav == 0 else float("inf")
+        if abs(drift) > config.nav_drift_tolerance:
+            # Left unchecked so the next call checks again and trading resumes once the two agree
+            state.checked_block = None
+            raise NavDriftError(
+                f"Off-chain NAV differs from totalEvaluation by {drift * 100:.4f}% at block {block_number}"
+            )
+        state.checked_block = block_number
+
+    def get_nav(self):
+        # NAV per index token in base currency units
+        with self.lock:
+            state = self.state()
+            block_number = self.pricing.current_block()
+            assets = self.current_assets()
+            if (
+                assets != state.assets
+                or state.balances_block is None
+                or not 0
+                <= block_number - state.balances_block
+                < config.nav_balance_refresh_blocks
+            ):
+                self.load_balances(state, assets, block_number)
+            self.update_prices(state)
+            if (
+                state.checked_block is None
+                or not 0
+                <= block_number - state.checked_block
+                < config.nav_check_interval
+            ):
+                self.check(state, block_number)
+            return state.nav
@@ -0,0 +1,27 @@
+# Import modules
+import threading
+
+
+# Hands out consecutive nonces for one account without asking the node each time
+class NonceManager:
+    def __init__(self, w3_provider, address):
+        self.w3 = w3_provider
+        self.address = address
+        self.next_nonce = None
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        with self.lock:
+            if self.next_nonce is None:
+                # Pending count includes transactions already in the mempool
+                self.next_nonce = self.w3.eth.get_transaction_count(
+                    self.address, "pending"
+                )
+            nonce = self.next_nonce
+            self.next_nonce += 1
+            return nonce
+
+    def reset(self):
+        # Resync from the node on the next reserve, e.g. after a failed send or a fork revert
+        with self.lock:
+            self.next_nonce = None
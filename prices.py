@@ -0,0 +1,81 @@
+# Import modules
+import threading
+import time
+
+
+# Shared CoinGecko price cache with a TTL and stale-while-revalidate refreshes
+class PriceService:
+    def __init__(self, cg_provider, assets, ttl, stale_ttl):
+        self.cg = cg_provider
+        self.assets = set(assets)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        # asset -> (usd price, time fetched)
+        self.prices = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshing = False
+        self.lock = threading.Lock()
+        # Held for the whole CoinGecko request so only one refresh runs at a time
+        self.refresh_lock = threading.Lock()
+
+    def refresh(self):
+        # Fetch every tracked asset in one multi-id request
+        with self.lock:
+            assets = sorted(self.assets)
+        response = self.cg.get_price(ids=assets, vs_currencies="usd")
+        fetched_at = time.time()
+        with self.lock:
+            for asset, price in response.items():
+                self.prices[asset] = (float(price["usd"]), fetched_at)
+
+    def refresh_in_background(self):
+        try:
+            with self.refresh_lock:
+                self.refresh()
+        except Exception as e:
+            print(f"Background price refresh failed: {e}")
+        finally:
+            with self.lock:
+                self.refreshing = False
+
+    def get_price(self, asset):
+        with self.lock:
+            self.assets.add(asset)
+            cached = self.prices.get(asset)
+            age = time.time() - cached[1] if cached is not None else None
+            if cached is not None and age <= self.ttl:
+                self.hits += 1
+                return cached[0]
+            if cached is not None and age <= self.stale_ttl:
+                # Serve the stale price and refresh it without blocking the caller
+                self.stale_hits += 1
+                if not self.refreshing:
+                    self.refreshing = True
+                    threading.Thread(
+                        target=self.refresh_in_background, daemon=True
+                    ).start()
+                return cached[0]
+            self.misses += 1
+        with self.refresh_lock:
+            # Callers that missed together wait for the first one's refresh instead of each sending their own
+            with self.lock:
+                cached = self.prices.get(asset)
+            if cached is None or time.time() - cached[1] > self.ttl:
+                self.refresh()
+        with self.lock:
+            cached = self.prices.get(asset)
+            if cached is None:
+                # CoinGecko leaves out ids it does not know, stop asking for this one
+                self.assets.discard(asset)
+                raise ValueError(f"CoinGecko has no price for unknown asset id {asset}")
+            return cached[0]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+            }
@@ -1,20 +1,60 @@
 # Import modules
-import abis
 import config
+from multicall import Snapshot
+from block_cache import BlockCache
+from nav import NavEngine
+from concurrency import ThreadLocal
+from contracts import registry
+from uniswap_v3 import InsufficientLiquidity, TickLadder, PoolState
+from trader_joe_v2 import SCALE, LiquidityBook, get_id_from_price, get_price_from_id
+from constant_product import get_amount_out, optimal_nav_arb
+from venues import FEE_DENOMINATOR, VenueAdapter, venue_registry
+from eth_utils import event_abi_to_log_topic
 import requests
 import math
+from fractions import Fraction
+import threading
+import time
 
 # Pricing Class
 
 class Pricing:
+    # Provider and pinned reads are per thread, venues priced concurrently each pin their own block
+    w3 = ThreadLocal()
+    snapshot = ThreadLocal()
+    latest_block = ThreadLocal()
+
     def __init__(
-        self, cg_provider, w3_provider, index_address, chain_id, wrapped_native_address
+        self,
+        price_service,
+        w3_provider,
+        index_address,
+        chain_id,
+        wrapped_native_address,
+        exchanges,
     ):
-        self.cg = cg_provider
+        self.prices = price_service
         self.w3 = w3_provider
         self.index_address = index_address
+        # Router and other per-index addresses come from the index's listing in the venue file
+        self.index_listing = venue_registry.index(chain_id, index_address)
         self.wrapped_native_address = wrapped_native_address
         self.chain_id = chain_id
+        self.snapshot = None
+        self.latest_block = None
+        self.block_cache = BlockCache(config.block_cache_size)
+        self.tick_ladders = {}
+        # When each pool's tick ladder was loaded from the subgraph
+        self.tick_ladder_times = {}
+        self.tj_v2_books = {}
+        # Books are created and dropped by one route at a time
+        self.tj_v2_lock = threading.Lock()
+        self.uniswap_v3_states = {}
+        # Adapter per pool from the venue registry, built once so dispatch needs no per-call mapping
+        self.venues = {
+            i: VenueAdapter(venue_registry.get(chain_id, i), self) for i in exchanges
+        }
+        self.nav_engine = NavEngine(self)
 
     def native_asset_symbol(self):
         if self.chain_id == 1:
@@ -24,9 +64,107 @@ class Pricing:
 
     def update_w3_provider(self, new_provider):
         self.w3 = new_provider
+        # A snapshot is only valid for the provider it was taken on
+        self.clear_snapshot()
+
+    def contract(self, address, abi_name):
+        # Cached contract object for the current provider
+        return registry.get(self.w3, address, abi_name)
+
+    def clear_snapshot(self):
+        self.snapshot = None
+        # The cached head block is stale as well
+        self.latest_block = None
+
+    def forget_provider_state(self):
+        # Used when the provider's chain is rewound, block numbers are reused with different state
+        endpoint = self.w3.provider.endpoint_uri
+        self.clear_snapshot()
+        self.block_cache.invalidate(self.chain_id, endpoint)
+        self.nav_engine.forget(endpoint)
+        with self.tj_v2_lock:
+            for key in [i for i in list(self.tj_v2_books) if i[0] == endpoint]:
+                del self.tj_v2_books[key]
+
+    def current_block(self):
+        # Block reads are pinned to, the snapshot block or a briefly cached head block
+        if self.snapshot is not None:
+            block_number = self.snapshot.block_number
+        elif (
+            self.latest_block is not None
+            and time.time() - self.latest_block[1] < config.block_number_ttl
+        ):
+            block_number = self.latest_block[0]
+        else:
+            block_number = self.w3.eth.block_number
+            self.latest_block = (block_number, time.time())
+        self.block_cache.advance(
+            self.chain_id, self.w3.provider.endpoint_uri, block_number
+        )
+        return block_number
+
+    def read(self, contract, fn_name, *args):
+        # Serve the read from the snapshot if it was part of the batch
+        if self.snapshot is not None and self.snapshot.contains(
+            contract, fn_name, *args
+        ):
+            return self.snapshot.get(contract, fn_name, *args)
+        if fn_name not in config.block_memoized_calls:
+            # Pin the call to the snapshot block so all reads share one state
+            return contract.functions[fn_name](*args).call(
+                block_identifier=self.snapshot.block_number
+                if self.snapshot is not None
+                else "latest"
+            )
+        # Calls that only change between blocks are memoized per block
+        block_number = self.current_block()
+        key = BlockCache.key(
+            self.chain_id,
+            self.w3.provider.endpoint_uri,
+            block_number,
+            contract,
+            fn_name,
+            args,
+        )
+        hit, value = self.block_cache.get(key)
+        if not hit:
+            value = contract.functions[fn_name](*args).call(
+                block_identifier=block_number
+            )
+            self.block_cache.set(key, value)
+        return value
+
+    def take_snapshot(self, *exchanges):
+        # Batch every read needed to price the exchanges and the index NAV into one call
+        snapshot = Snapshot(self.w3)
+        self.nav_engine.add_snapshot_calls(snapshot)
+        for exchange in exchanges:
+            self.venues[exchange].snapshot(snapshot, exchange)
+        self.snapshot = snapshot.execute()
+        self.block_cache.advance(
+            self.chain_id, self.w3.provider.endpoint_uri, self.snapshot.block_number
+        )
+        return self.snapshot
+
+    def add_uniswap_v3_snapshot_calls(self, snapshot, pool):
+        pool_contract = self.contract(pool, "uniswap_v3_pool")
+        snapshot.add(pool_contract, "slot0")
+        snapshot.add(pool_contract, "liquidity")
+        snapshot.add(pool_contract, "fee")
+        snapshot.add(pool_contract, "tickSpacing")
+
+    def add_tj_v1_snapshot_calls(self, snapshot, pool):
+        pool_contract = self.contract(pool, "trader_joe_v1")
+        snapshot.add(pool_contract, "getReserves")
+
+    def add_tj_v2_snapshot_calls(self, snapshot, pool):
+        pool_contract = self.contract(pool, "trader_joe_v2")
+        snapshot.add(pool_contract, "getActiveId")
+        snapshot.add(pool_contract, "getStaticFeeParameters")
+        snapshot.add(pool_contract, "getVariableFeeParameters")
 
     def get_price(self, asset):
-        return float(self.cg.get_price(asset, "usd")[asset]["usd"])
+        return self.prices.get_price(asset)
 
     def get_native_price(self):
         if self.chain_id == 1:
@@ -41,46 +179,29 @@ class Pricing:
         }
         return mapping.get(self.chain_id)
 
-    def get_price_mapping(self, pool):
-        # Get pricing function given a pool address
-        mapping = {
-            43114: {
-                "0xE5e9d67e93aD363a50cABCB9E931279251bBEFd0": [
-                    "avalanche-2",
-                    self.get_tj_v1_price,
-                ],
-                "0x2219bc1C06e303172d35deEB9C637D074BA4F277": [
-                    "avalanche-2",
-                    self.get_tj_v2_price,
-                ],
-            },
-            1: {
-                "0xF5FE7ea8537CBd9E5e7b81A93828F48037D220c2": [
-                    "ethereum",
-                    self.get_uniswap_v3_price,
-                ]
-            },
-        }
-        return mapping[self.chain_id][pool]
+    def get_uniswap_v3_event_price(self, pool, args, quote):
+        # Swap carries the pool's new sqrt price
+        return (args["sqrtPriceX96"] ** 2) / (2**192) * self.get_price(quote)
 
-    def get_trade_size_mapping(self, pool):
-        # Returns the correct trade size function for calculating the optimal trade given a pool address
-        mapping = {
-            43114: {
-                "0xE5e9d67e93aD363a50cABCB9E931279251bBEFd0": self.calculate_tj_v1_trade_size,
-                "0x2219bc1C06e303172d35deEB9C637D074BA4F277": self.calculate_tj_v2_trade_size,
-            },
-            1: {
-                "0xF5FE7ea8537CBd9E5e7b81A93828F48037D220c2": self.calculate_uni_v3_trade_size
-            },
-        }
-        return mapping[self.chain_id][pool]
+    def get_tj_v1_event_price(self, pool, args, quote):
+        # Sync carries the reserves after every swap, mint and burn
+        return args["reserve1"] / args["reserve0"] * self.get_price(quote)
+
+    def get_tj_v2_event_price(self, pool, args, quote):
+        # Swap carries the active bin id it ended in
+        return self.tj_v2_bin_price(pool, args["id"]) * self.get_price(quote)
+
+    def get_pool_price(self, pool):
+        # Pool price in USD from a fresh snapshot
+        self.take_snapshot(pool)
+        venue = self.venues[pool]
+        return venue.price(pool, venue.quote_asset)
 
     def get_uniswap_v3_price(self, pool, quote):
         # Create pool contract
-        pool_contract = self.w3.eth.contract(address=pool, abi=abis.uniswap_v3_pool)
+        pool_contract = self.contract(pool, "uniswap_v3_pool")
         # Retrieve slot 0 data
-        (sqrt_price_x96, _, _, _, _, _, _) = pool_contract.functions.slot0().call()
+        (sqrt_price_x96, _, _, _, _, _, _) = self.read(pool_contract, "slot0")
         # Retrieve ethereum usd price
         quote_price = self.get_price(quote)
         # Compute price of PDI in usd
@@ -88,43 +209,119 @@ class Pricing:
         return token_0_price
 
     def get_tj_v1_price(self, exchange, quote):
-        pool_contract = self.w3.eth.contract(address=exchange, abi=abis.trader_joe_v1)
-        x, y, _ = pool_contract.functions.getReserves().call()
+        pool_contract = self.contract(exchange, "trader_joe_v1")
+        x, y, _ = self.read(pool_contract, "getReserves")
         return y / x * self.get_price(quote)
 
     def get_tj_v2_price(self, pool, quote):
-        pool_contract = self.w3.eth.contract(address=pool, abi=abis.trader_joe_v2)
-        bin_id = pool_contract.functions.getActiveId().call()
-        raw_price = pool_contract.functions.getPriceFromId(bin_id).call()
-        return raw_price / (2**128) * self.get_price(quote)
+        pool_contract = self.contract(pool, "trader_joe_v2")
+        bin_id = self.read(pool_contract, "getActiveId")
+        # Price of the active bin from the declared bin step so it can be served from the snapshot
+        return self.tj_v2_bin_price(pool, bin_id) * self.get_price(quote)
+
+    def tj_v2_bin_price(self, pool, bin_id):
+        # Exact 128.128 price of the bin as the pair computes it, in Y per X
+        return get_price_from_id(bin_id, self.venues[pool].bin_step) / SCALE
+
+    def read_tj_v2_bins(self, pool, bin_ids, block_number):
+        # Read the reserves of a set of bins in one batched call
+        pool_contract = self.contract(pool, "trader_joe_v2")
+        snapshot = Snapshot(self.w3, block_number)
+        for bin_id in bin_ids:
+            snapshot.add(pool_contract, "getBin", bin_id)
+        snapshot.execute()
+        return {
+            bin_id: snapshot.get(pool_contract, "getBin", bin_id) for bin_id in bin_ids
+        }
+
+    def tj_v2_book(self, pool):
+        # Books are kept per provider since the fork and mainnet have different state
+        if self.snapshot is None:
+            self.take_snapshot(pool)
+        key = (self.w3.provider.endpoint_uri, pool)
+        with self.tj_v2_lock:
+            book = self.tj_v2_books.get(key)
+            if book is None or book.block_number > self.snapshot.block_number:
+                pool_contract = self.contract(pool, "trader_joe_v2")
+                self.tj_v2_books[key] = LiquidityBook(
+                    self.venues[pool].bin_step,
+                    self.read(pool_contract, "getActiveId"),
+                    self.read(pool_contract, "getStaticFeeParameters"),
+                    self.read(pool_contract, "getVariableFeeParameters"),
+                    self.snapshot.block_number,
+                    self.snapshot.timestamp,
+                    lambda bin_ids, block_number: self.read_tj_v2_bins(
+                        pool, bin_ids, block_number
+                    ),
+                    config.tj_v2_bin_window,
+                    config.tj_v2_max_bins,
+                )
+                return self.tj_v2_books[key]
+        # Only one route brings a shared book forward at a time
+        with book.lock:
+            return self.sync_tj_v2_book(pool, book)
+
+    def sync_tj_v2_book(self, pool, book):
+        if book.block_number == self.snapshot.block_number:
+            return book
+        pool_contract = self.contract(pool, "trader_joe_v2")
+        # Find the bins changed by swaps and liquidity updates since the book was last synced
+        events = [
+            pool_contract.events.Swap(),
+            pool_contract.events.DepositedToBins(),
+            pool_contract.events.WithdrawnFromBins(),
+        ]
+        logs = self.w3.eth.get_logs(
+            {
+                "address": pool,
+                "fromBlock": book.block_number + 1,
+                "toBlock": self.snapshot.block_number,
+                "topics": [[event_abi_to_log_topic(i.abi) for i in events]],
+            }
+        )
+        touched_bins = set()
+        for log in logs:
+            for event in events:
+                if log["topics"][0] == event_abi_to_log_topic(event.abi):
+                    args = event.process_log(log)["args"]
+                    touched_bins.update(args["ids"] if "ids" in args else [args["id"]])
+        book.apply_update(
+            self.read(pool_contract, "getActiveId"),
+            self.read(pool_contract, "getVariableFeeParameters"),
+            self.read_tj_v2_bins(pool, touched_bins, self.snapshot.block_number)
+            if len(touched_bins) > 0
+            else {},
+            self.snapshot.block_number,
+            self.snapshot.timestamp,
+        )
+        return book
 
     def tj_v2_get_swap_in(self, pool, amount, premium):
         assert type(premium) == bool, "is_buy param should be bool"
-        pool_contract = self.w3.eth.contract(address=pool, abi=abis.trader_joe_v2)
+        # Compute getSwapIn from the local liquidity book
+        swap_in_amount, amount_out_left, _ = self.tj_v2_book(pool).get_swap_in(
+            int(amount), premium
+        )
+        if amount_out_left > 0:
+            # The bins cannot supply the amount, no size is given rather than the price of a partial fill
+            return None
         if premium:
             # If premium is true we need to convert the swap in amount to native tokens
-            swap_in_amount, _, _ = pool_contract.functions.getSwapIn(
-                amount, premium
-            ).call()
             convert_to_native = (
                 swap_in_amount * self.get_nav_price()
             ) / self.get_native_price()
             return int(convert_to_native)
         else:
-            swap_in_amount, _, _ = pool_contract.functions.getSwapIn(
-                amount, premium
-            ).call()
             return int(swap_in_amount)
 
+    def tj_v2_get_swap_out(self, pool, amount, is_buy):
+        # Buying the index swaps Y (native) for X (index)
+        _, amount_out, _ = self.tj_v2_book(pool).get_swap_out(int(amount), not is_buy)
+        return amount_out
+
     def get_nav_price(self, currency="usd"):
-        # Create index helper contract
-        index_helper_contract = self.w3.eth.contract(
-            address=self.get_index_helper(), abi=abis.index_helper
-        )
-        # Retrieve nav price
-        _, price = index_helper_contract.functions.totalEvaluation(
-            self.index_address
-        ).call()
+        # Off-chain NAV, checked against the index helper's totalEvaluation every few blocks
+        price = self.nav_engine.get_nav()
         # Divide by appropriate decimal places
         if currency == "usd":
             return price / config.index_helper_decimals
@@ -132,10 +329,12 @@ class Pricing:
             return price / config.index_helper_decimals / self.get_price(currency)
 
     def get_price_delta(self, exchange):
+        # Pin all reads for this exchange to one block
+        self.take_snapshot(exchange)
         # Get correct function to price exchange
-        quote, func = self.get_price_mapping(exchange)
+        venue = self.venues[exchange]
         # Compute difference between nav price and exchange price
-        delta = func(exchange, quote) / self.get_nav_price() - 1
+        delta = venue.price(exchange, venue.quote_asset) / self.get_nav_price() - 1
         # If delta is positive then exchange price is at a premium. If negative then exchange price is at a discount.
         return delta
 
@@ -152,177 +351,140 @@ class Pricing:
 
     def price_to_sqrt_price(self, price, quote_currency="eth"):
         if quote_currency == "eth":
-            price = (
-                price / self.cg.get_price("ethereum", "usd")["ethereum"]["usd"]
-            ) ** 0.5
+            price = (price / self.get_price("ethereum")) ** 0.5
             return price
 
-    def pool_liquidity(self):
-        pool_contract = self.w3.eth.contract(
-            address=config.pdi_weth_pool, abi=abis.uniswap_v3_pool
-        )
-        return pool_contract.functions.liquidity().call()
+    def pool_liquidity(self, pool):
+        # Any Uniswap v3 pool of the bot's venues, not only the PDI/WETH one
+        pool_contract = self.contract(pool, self.venues[pool].abi_name)
+        return self.read(pool_contract, "liquidity")
 
-    def get_current_sqrt_price(self):
-        pool_contract = self.w3.eth.contract(
-            address=config.pdi_weth_pool, abi=abis.uniswap_v3_pool
-        )
-        return (pool_contract.functions.slot0().call()[0] ** 2 / 2**192) ** 0.5
+    def get_current_sqrt_price(self, pool):
+        pool_contract = self.contract(pool, self.venues[pool].abi_name)
+        return (self.read(pool_contract, "slot0")[0] ** 2 / 2**192) ** 0.5
 
     def calculate_tj_v1_trade_size(self, pool, target_price, premium):
-        pool_contract = self.w3.eth.contract(address=pool, abi=abis.trader_joe_v1)
-        x, y, _ = pool_contract.functions.getReserves().call()
-        k = x * y
-        new_x = (k / target_price) ** 0.5
-        new_y = (k * target_price) ** 0.5
-        delta_x = new_x - x
-        delta_y = new_y - y
-        if premium:
-            # If premium is true we need to convert the swap in amount to native tokens
-            if delta_x > 0:
-                convert_to_avax = int(
-                    (delta_x * self.get_nav_price()) / self.get_native_price()
-                )
-                return convert_to_avax
-        else:
-            return int(delta_y)
+        pool_contract = self.contract(pool, "trader_joe_v1")
+        x, y, _ = self.read(pool_contract, "getReserves")
+        # Fee-adjusted optimum in native wei, X is the index and Y the native token
+        arb = optimal_nav_arb(
+            x,
+            y,
+            Fraction(target_price).limit_denominator(10**18),
+            premium,
+            FEE_DENOMINATOR - self.venues[pool].fee,
+            FEE_DENOMINATOR,
+        )
+        return arb["size"]
 
-    def calculate_tj_v2_trade_size(self, pool, target_price, premium):
-        pool_contract = self.w3.eth.contract(address=pool, abi=abis.trader_joe_v2)
-        active_bin = int(pool_contract.functions.getActiveId().call())
-        bin_step = pool_contract.functions.getBinStep().call()
-        target_bin = (
-            round(
-                (math.log(target_price) / math.log(1 + bin_step / 10000) + 8388608) / 5
-            )
-            * 5
+    def tj_v1_get_swap_out(self, pool, amount, is_buy):
+        pool_contract = self.contract(pool, "trader_joe_v1")
+        x, y, _ = self.read(pool_contract, "getReserves")
+        reserve_in, reserve_out = (y, x) if is_buy else (x, y)
+        return get_amount_out(
+            int(amount),
+            reserve_in,
+            reserve_out,
+            FEE_DENOMINATOR - self.venues[pool].fee,
+            FEE_DENOMINATOR,
         )
-        print(active_bin, target_bin)
-        current_bin = active_bin
-        output = 0
-        if target_bin > current_bin:
-            while current_bin != target_bin:
-                x, y = pool_contract.functions.getBin(current_bin).call()
-                output += x
-                next_bin = int(
-                    pool_contract.functions.getNextNonEmptyBin(
-                        False, current_bin
-                    ).call()
-                )
-                if next_bin != 0 and next_bin < target_bin:
-                    current_bin = next_bin
-                elif next_bin == target_bin:
-                    x, y = pool_contract.functions.getBin(next_bin).call()
-                    output += x
-                    current_bin = target_bin
-                else:
-                    current_bin = target_bin
-        elif target_bin < current_bin:
-            while current_bin != target_bin:
-                x, y = pool_contract.functions.getBin(current_bin).call()
-                output += y
-                next_bin = int(
-                    pool_contract.functions.getNextNonEmptyBin(True, current_bin).call()
+
+    def calculate_tj_v2_trade_size(self, pool, target_price, premium):
+        book = self.tj_v2_book(pool)
+        # The active bin and the reserves walked must come from the same update of the book
+        with book.lock:
+            # Exact bin holding the target price
+            target_bin = get_id_from_price(target_price, book.bin_step)
+            output = 0
+            if target_bin != book.active_id:
+                # Pushing the price up consumes X from the bins above, pushing it down consumes Y from the bins below
+                output = book.reserves_between(
+                    book.active_id, target_bin, use_x=target_bin > book.active_id
                 )
-                if next_bin != 0 and next_bin > target_bin:
-                    current_bin = next_bin
-                elif next_bin == target_bin:
-                    x, y = pool_contract.functions.getBin(next_bin).call()
-                    output += x
-                    current_bin = target_bin
-                else:
-                    current_bin = target_bin
-        return self.tj_v2_get_swap_in(pool, output, premium)
+            return self.tj_v2_get_swap_in(pool, output, premium)
 
-    def calculate_uni_v3_trade_size(self, pool, target_price, premium):
-        pool_contract = self.w3.eth.contract(
-            address=self.w3.to_checksum_address(pool), abi=abis.uniswap_v3_pool
-        )
-        url = "https://api.thegraph.com/subgraphs/name/uniswap/uniswap-v3"
-        query = f"""query{{pool(id:\"{pool.lower()}\"){{
-                        ticks {{
+    def load_tick_ladder(self, pool):
+        # Page through the pool's initialized ticks ordered by tick index
+        ticks = []
+        last_tick = -887273
+        while True:
+            query = f"""query{{ticks(first:1000, orderBy:tickIdx, orderDirection:asc,
+                        where:{{pool:\"{pool.lower()}\", tickIdx_gt:{last_tick}}}){{
                         tickIdx
+                        liquidityGross
                         liquidityNet
-                        }} }}
-                    }}"""
-        tick_array = requests.post(url=url, json={"query": query}).json()["data"][
-            "pool"
-        ]["ticks"]
-        sorted_tick_array = [
-            {"tickIdx": int(i["tickIdx"]), "liquidityNet": int(i["liquidityNet"])}
-            for i in tick_array
-            if int(i["liquidityNet"]) != 0
-        ]
-        sorted_tick_array = sorted(sorted_tick_array, key=lambda x: x["tickIdx"])
-        target_tick = int(math.log(target_price, 1.0001))
-        _, current_tick, _, _, _, _, _ = pool_contract.functions.slot0().call()
-        current_liquidity = self.pool_liquidity()
-        output = 0
-        while current_tick != target_tick:
-            if target_tick > current_tick:
-                next_tick, next_liquiidty = list(
-                    filter(lambda x: x["tickIdx"] > current_tick, sorted_tick_array)
-                )[0].values()
-                if target_tick < next_tick:
-                    output += self.x_in_range(
-                        current_liquidity,
-                        self.tick_to_price(current_tick) ** 0.5,
-                        self.tick_to_price(target_tick) ** 0.5,
-                    )
-                    current_tick = target_tick
-                elif target_tick > next_tick:
-                    output += self.x_in_range(
-                        current_liquidity,
-                        self.tick_to_price(current_tick) ** 0.5,
-                        self.tick_to_price(next_tick) ** 0.5,
-                    )
-                    current_tick = next_tick
-                    current_liquidity += next_liquiidty
-            elif target_tick < current_tick:
-                next_tick = list(
-                    filter(lambda x: x["tickIdx"] < current_tick, sorted_tick_array)
-                )
-                next_tick.reverse()
-                next_tick, next_liquiidty = next_tick[0].values()
-                if target_tick > next_tick:
-                    output += self.y_in_range(
-                        current_liquidity,
-                        self.tick_to_price(current_tick) ** 0.5,
-                        self.tick_to_price(target_tick) ** 0.5,
-                    )
-                    current_tick = target_tick
-                elif target_tick < next_tick:
-                    output += self.y_in_range(
-                        current_liquidity,
-                        self.tick_to_price(current_tick) ** 0.5,
-                        self.tick_to_price(next_tick) ** 0.5,
-                    )
-                    current_tick = next_tick
-                    current_liquidity += next_liquiidty
-        return self.uniswap_v3_get_swap_in(output, premium)
-
-    def uniswap_v3_get_swap_in(self, amount, premium):
-        uniswap_quoter_contract = self.w3.eth.contract(
-            address=config.uniswap_quoter, abi=abis.uniswap_quoter
+                        }} }}"""
+            page = requests.post(
+                url=config.uniswap_v3_subgraph, json={"query": query}
+            ).json()["data"]["ticks"]
+            ticks += page
+            if len(page) < 1000:
+                break
+            last_tick = int(page[-1]["tickIdx"])
+        # Keep every initialized tick, zero net ticks still bound swap steps on-chain
+        ticks = [i for i in ticks if int(i["liquidityGross"]) != 0]
+        self.tick_ladders[pool] = TickLadder(
+            [int(i["tickIdx"]) for i in ticks],
+            [int(i["liquidityNet"]) for i in ticks],
         )
-        QuoteExactOutputSingleParams = {}
-        QuoteExactOutputSingleParams["tokenIn"] = (
-            self.index_address if premium else self.wrapped_native_address
+        self.tick_ladder_times[pool] = time.time()
+        return self.tick_ladders[pool]
+
+    def get_tick_ladder(self, pool):
+        # Initialized ticks only change on mints and burns, so the ladder is reloaded once it is older than its TTL
+        if (
+            pool not in self.tick_ladders
+            or time.time() - self.tick_ladder_times[pool] > config.tick_ladder_ttl
+        ):
+            return self.load_tick_ladder(pool)
+        return self.tick_ladders[pool]
+
+    def calculate_uni_v3_trade_size(self, pool, target_price, premium):
+        pool_contract = self.contract(pool, "uniswap_v3_pool")
+        tick_ladder = self.get_tick_ladder(pool)
+        target_tick = int(math.log(target_price, 1.0001))
+        _, current_tick, _, _, _, _, _ = self.read(pool_contract, "slot0")
+        current_liquidity = self.read(pool_contract, "liquidity")
+        # Token amount held between the current and target tick, summed over every crossed range
+        output = tick_ladder.amount_to_tick(
+            current_tick, current_liquidity, target_tick
         )
-        QuoteExactOutputSingleParams["tokenOut"] = (
-            self.wrapped_native_address if premium else self.index_address
+        return self.uniswap_v3_get_swap_in(pool, output, premium)
+
+    def uniswap_v3_pool_state(self, pool):
+        # Build the swap simulator from the pool reads and the cached tick ladder
+        pool_contract = self.contract(pool, "uniswap_v3_pool")
+        sqrt_price_x96, tick, _, _, _, _, _ = self.read(pool_contract, "slot0")
+        tick_ladder = self.get_tick_ladder(pool)
+        # Reuse the state while the pool and its ticks are unchanged
+        key = (sqrt_price_x96, tick, self.read(pool_contract, "liquidity"), tick_ladder)
+        cached = self.uniswap_v3_states.get(pool)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        state = PoolState(
+            sqrt_price_x96,
+            tick,
+            self.read(pool_contract, "liquidity"),
+            self.read(pool_contract, "fee"),
+            self.read(pool_contract, "tickSpacing"),
+            tick_ladder,
         )
-        QuoteExactOutputSingleParams["amount"] = int(amount)
-        QuoteExactOutputSingleParams["fee"] = 3000
-        QuoteExactOutputSingleParams["sqrtPriceLimitX96"] = 0
-        (
-            swap_in_amount,
-            _,
-            _,
-            _,
-        ) = uniswap_quoter_contract.functions.quoteExactOutputSingle(
-            QuoteExactOutputSingleParams
-        ).call()
+        self.uniswap_v3_states[pool] = (key, state)
+        return state
+
+    def uniswap_v3_get_swap_in(self, pool, amount, premium):
+        token_in = self.index_address if premium else self.wrapped_native_address
+        token_out = self.wrapped_native_address if premium else self.index_address
+        # Token0 is the token with the lower address
+        zero_for_one = int(token_in, 16) < int(token_out, 16)
+        # Simulate QuoterV2.quoteExactOutputSingle locally
+        try:
+            swap_in_amount = self.uniswap_v3_pool_state(pool).quote_exact_output_single(
+                zero_for_one, int(amount)
+            )
+        except InsufficientLiquidity:
+            # The pool cannot supply the amount, no size is given as with TraderJoe v2
+            return None
         if premium:
             convert_to_native = (
                 swap_in_amount * self.get_nav_price()
@@ -330,3 +492,12 @@ class Pricing:
             return int(convert_to_native)
         else:
             return int(swap_in_amount)
+
+    def uniswap_v3_get_swap_out(self, pool, amount, is_buy):
+        token_in = self.wrapped_native_address if is_buy else self.index_address
+        token_out = self.index_address if is_buy else self.wrapped_native_address
+        zero_for_one = int(token_in, 16) < int(token_out, 16)
+        # Simulate SwapRouter.exactInputSingle locally
+        return self.uniswap_v3_pool_state(pool).exact_input_single(
+            zero_for_one, int(amount)
+        )
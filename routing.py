@@ -0,0 +1,37 @@
+# Import modules
+from uniswap_v3 import InsufficientLiquidity
+
+
+def water_fill(quote_funcs, total, chunks):
+    # Split total across pools a chunk at a time, each chunk going to the pool with the best marginal output
+    if len(quote_funcs) == 1:
+        try:
+            return [total], [quote_funcs[0](total)]
+        except InsufficientLiquidity:
+            return [0], [0]
+    allocations = [0] * len(quote_funcs)
+    outputs = [0] * len(quote_funcs)
+    chunk = total // chunks
+    for i in range(chunks):
+        size = chunk if i < chunks - 1 else total - chunk * (chunks - 1)
+        best = None
+        for j, quote_func in enumerate(quote_funcs):
+            try:
+                output = quote_func(allocations[j] + size)
+            except InsufficientLiquidity:
+                # The pool cannot take any more
+                continue
+            if best is None or output - outputs[j] > best[1]:
+                best = (j, output - outputs[j], output)
+        if best is None:
+            break
+        allocations[best[0]] += size
+        outputs[best[0]] = best[2]
+    return allocations, outputs
+
+
+def split_amount(total, shares):
+    # Amount per pool by its share of the route, the last pool takes the rounding remainder
+    pools = list(shares)
+    amounts = [int(total * shares[i]) for i in pools[:-1]]
+    return list(zip(pools, amounts + [total - sum(amounts)]))
@@ -0,0 +1,53 @@
+# Import modules
+import requests
+from contracts import registry
+from nonces import NonceManager
+
+
+def create_http_session(pool_size):
+    # Keep-alive connection pools shared by every provider that uses the session
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def connection_stats(session):
+    # Requests and connections opened per host, requests above connections were served on reused connections
+    stats = {}
+    for adapter in {id(i): i for i in session.adapters.values()}.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            stats[pool.host] = {
+                "requests": pool.num_requests,
+                "connections": pool.num_connections,
+                "reused": pool.num_requests - pool.num_connections,
+            }
+    return stats
+
+
+# Provider, account and contracts for one mode, built once and swapped in on every mode change
+class ModeSession:
+    def __init__(self, w3_provider, private_key, address_book):
+        self.w3 = w3_provider
+        self.private_key = private_key
+        self.account = w3_provider.eth.account.from_key(private_key)
+        self.address = self.account.address
+        # Setting default account
+        self.w3.eth.default_account = self.address
+        self.nonces = NonceManager(w3_provider, self.address)
+        # Fee oracle for the session's endpoint, set up by the bot with its chain's settings
+        self.fee_oracle = None
+        # Running balances from the session's own receipts, set up by the bot with its chain's settings
+        self.ledger = None
+        # Arb executor on this session's chain, deployed during preflight on forks
+        self.executor_address = None
+        # address_book maps attribute name -> (address, abi name)
+        self.contracts = {
+            name: registry.get(w3_provider, address, abi_name)
+            for name, (address, abi_name) in address_book.items()
+        }
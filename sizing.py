@@ -0,0 +1,44 @@
+# Import modules
+import math
+
+INVERSE_GOLDEN_RATIO = (math.sqrt(5) - 1) / 2
+
+
+def golden_section_search(profit_func, low, high, tolerance, max_iterations=100):
+    # Maximise a unimodal function on [low, high]
+    a, b = low, high
+    c = b - INVERSE_GOLDEN_RATIO * (b - a)
+    d = a + INVERSE_GOLDEN_RATIO * (b - a)
+    profit_c, profit_d = profit_func(c), profit_func(d)
+    for _ in range(max_iterations):
+        if b - a <= tolerance:
+            break
+        if profit_c > profit_d:
+            b, d, profit_d = d, c, profit_c
+            c = b - INVERSE_GOLDEN_RATIO * (b - a)
+            profit_c = profit_func(c)
+        else:
+            a, c, profit_c = c, d, profit_d
+            d = a + INVERSE_GOLDEN_RATIO * (b - a)
+            profit_d = profit_func(d)
+    return (c, profit_c) if profit_c > profit_d else (d, profit_d)
+
+
+def optimize_trade_size(profit_func, upper_bound, grid_points, tolerance):
+    # Coarse grid over (0, upper_bound] to bracket the peak, then golden-section refinement
+    # Each point runs a scalar pool simulation, so the grid is evaluated point by point
+    if upper_bound <= 0:
+        return 0, 0
+    sizes = [upper_bound * i / grid_points for i in range(grid_points + 1)]
+    profits = [0.0] + [profit_func(int(i)) for i in sizes[1:]]
+    best = max(range(len(profits)), key=lambda i: profits[i])
+    if best == 0:
+        return 0, 0
+    low = sizes[best - 1]
+    high = sizes[min(best + 1, grid_points)]
+    size, profit = golden_section_search(
+        lambda x: profit_func(int(x)), low, high, tolerance
+    )
+    if profit < profits[best]:
+        return int(sizes[best]), profits[best]
+    return int(size), profit
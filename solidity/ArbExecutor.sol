@@ -0,0 +1,84 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.19;
+
+interface IERC20 {
+    function balanceOf(address account) external view returns (uint256);
+
+    function approve(address spender, uint256 amount) external returns (bool);
+
+    function transfer(address to, uint256 amount) external returns (bool);
+}
+
+// Runs both legs of an index arb in one transaction and reverts unless they return the value sent plus minProfit
+contract ArbExecutor {
+    // Amount offset for calls whose calldata is sent unchanged
+    uint256 private constant NO_PATCH = type(uint256).max;
+
+    struct Call {
+        address target;
+        uint256 value;
+        bytes data;
+        // Token the call spends, approved to the target for the executor's whole balance, zero address for none
+        address token;
+        // Byte offset in data where that balance is written as the amount to spend, NO_PATCH to leave data as is
+        uint256 amountOffset;
+    }
+
+    address public immutable owner;
+
+    constructor() {
+        owner = msg.sender;
+    }
+
+    // Native proceeds from routers and unwrapping
+    receive() external payable {}
+
+    function execute(
+        Call[] calldata calls,
+        address wrappedNative,
+        address indexToken,
+        uint256 minProfit
+    ) external payable {
+        require(msg.sender == owner, "ArbExecutor: not owner");
+        for (uint256 i = 0; i < calls.length; i++) {
+            bytes memory data = calls[i].data;
+            if (calls[i].token != address(0)) {
+                // Leg 2 spends exactly what leg 1 produced
+                uint256 amount = IERC20(calls[i].token).balanceOf(address(this));
+                IERC20(calls[i].token).approve(calls[i].target, amount);
+                uint256 offset = calls[i].amountOffset;
+                if (offset != NO_PATCH) {
+                    require(offset + 32 <= data.length, "ArbExecutor: bad offset");
+                    assembly {
+                        mstore(add(add(data, 32), offset), amount)
+                    }
+                }
+            }
+            (bool success, bytes memory result) = calls[i].target.call{
+                value: calls[i].value
+            }(data);
+            if (!success) {
+                // Bubble up the leg's revert reason
+                assembly {
+                    revert(add(result, 32), mload(result))
+                }
+            }
+        }
+        // The executor holds nothing between arbs, so everything it has now came out of the legs
+        uint256 wrappedBalance = IERC20(wrappedNative).balanceOf(address(this));
+        require(
+            address(this).balance + wrappedBalance >= msg.value + minProfit,
+            "ArbExecutor: profit below threshold"
+        );
+        // Return the proceeds and any index dust to the owner
+        if (wrappedBalance > 0) {
+            IERC20(wrappedNative).transfer(owner, wrappedBalance);
+        }
+        uint256 indexBalance = IERC20(indexToken).balanceOf(address(this));
+        if (indexBalance > 0) {
+            IERC20(indexToken).transfer(owner, indexBalance);
+        }
+        (bool sent, ) = owner.call{value: address(this).balance}("");
+        require(sent, "ArbExecutor: transfer failed");
+    }
+}
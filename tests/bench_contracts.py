@@ -0,0 +1,144 @@
+# Import modules
+import json
+import os
+import sys
+import timeit
+
+# Run as a script from the tests directory, the bot's modules live at the top level of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import abis
+import config
+import contracts
+import decouple
+import pycoingecko
+import statistics
+from contracts import ContractRegistry, abi_members
+from prices import PriceService
+from pricing import Pricing
+from venues import venue_registry
+from web3 import Web3
+
+# Any address works, contract objects are built without touching the chain
+ADDRESS = "0x0000000000000000000000000000000000000001"
+
+# Constructions timed per ABI
+NUMBER = 50
+
+# Pricing cycles timed with and without the contract registry
+CYCLES = 20
+
+
+# Answers each request from the node once, then from memory, so the cycles time the bot and not the network
+class ReplayProvider(Web3.HTTPProvider):
+    def __init__(self, endpoint_uri):
+        super().__init__(endpoint_uri)
+        self.responses = {}
+
+    def make_request(self, method, params):
+        key = (method, json.dumps(params, default=str))
+        if key not in self.responses:
+            self.responses[key] = super().make_request(method, params)
+        return self.responses[key]
+
+
+def full_abi_contract(w3_provider, address, abi_name):
+    # How reads built their contracts before the registry, from the whole ABI on every call
+    return w3_provider.eth.contract(
+        address=Web3.to_checksum_address(address),
+        abi=json.loads(getattr(abis, abi_name)),
+    )
+
+
+def pricing_cycle(pricing, pools):
+    # The pricing half of query_arb for every pool: snapshot, pool price against NAV, then the push-to-NAV size
+    pricing.forget_provider_state()
+    pricing.uniswap_v3_states.clear()
+    for pool in pools:
+        venue = pricing.venues[pool]
+        delta = pricing.get_price_delta(pool)
+        venue.size(pool, pricing.get_nav_price(venue.quote_asset), delta > 0)
+
+
+def time_cycles(pricing, pools):
+    times = []
+    for _ in range(CYCLES):
+        start = timeit.default_timer()
+        pricing_cycle(pricing, pools)
+        times.append(timeit.default_timer() - start)
+    return statistics.median(times)
+
+
+def bench_pricing_cycle(endpoint):
+    index = next(i for i in venue_registry.indices if i.chain_id == 1)
+    pools = venue_registry.pools(1, index.symbol)
+    w3 = Web3(ReplayProvider(endpoint))
+    pricing = Pricing(
+        PriceService(
+            pycoingecko.CoinGeckoAPI(),
+            config.coingecko_assets,
+            config.price_cache_ttl,
+            config.price_cache_stale_ttl,
+        ),
+        w3,
+        index.address,
+        1,
+        index.wrapped_native,
+        pools,
+    )
+    # The first cycle records every response at the head block, the timed ones replay them
+    pricing_cycle(pricing, pools)
+    after = time_cycles(pricing, pools)
+    # The shared registry hands out per-read contracts from the full ABI, as reads did before it existed
+    contracts.registry.get = full_abi_contract
+    try:
+        before = time_cycles(pricing, pools)
+    finally:
+        del contracts.registry.get
+    print(
+        f"Pricing cycle of {index.symbol}: {(before - after) * 1e3:.1f} ms saved per cycle by the contract registry "
+        f"({before * 1e3:.1f} ms building contracts per read, {after * 1e3:.1f} ms with the registry)"
+    )
+
+
+def time_construction(w3_provider, abi):
+    return (
+        min(
+            timeit.repeat(
+                lambda: w3_provider.eth.contract(address=ADDRESS, abi=abi),
+                number=NUMBER,
+                repeat=3,
+            )
+        )
+        / NUMBER
+    )
+
+
+if __name__ == "__main__":
+    # python tests/bench_contracts.py, time per contract object built from the full and the trimmed ABI
+    # Contracts are keyed on the endpoint, nothing is sent to it
+    w3 = Web3(Web3.HTTPProvider("http://127.0.0.1:8545"))
+    registry = ContractRegistry()
+    for abi_name in abi_members:
+        full = json.loads(getattr(abis, abi_name))
+        trimmed = registry.abi(abi_name)
+        full_time = time_construction(w3, full)
+        trimmed_time = time_construction(w3, trimmed)
+        print(
+            f"{abi_name}: {len(full)} -> {len(trimmed)} entries, full {full_time * 1e3:.3f} ms, "
+            f"trimmed {trimmed_time * 1e3:.3f} ms ({full_time / trimmed_time:.1f}x)"
+        )
+    # What every read after the first pays, a registry hit
+    registry.get(w3, ADDRESS, "trader_joe_v2")
+    lookup_time = min(
+        timeit.repeat(
+            lambda: registry.get(w3, ADDRESS, "trader_joe_v2"), number=10000, repeat=5
+        )
+    )
+    print(f"Registry lookup: {lookup_time / 10000 * 1e6:.3f} us")
+    # A whole pricing cycle needs the chain's state, so it only runs against a node
+    endpoint = decouple.config("ETHEREUM_INFURA_URL", default=None)
+    if endpoint is None:
+        print("Set ETHEREUM_INFURA_URL to time a full pricing cycle")
+    else:
+        bench_pricing_cycle(endpoint)
@@ -0,0 +1,76 @@
+# Import modules
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from eth_tester import EthereumTester, PyEVMBackend
+
+# The bot's modules live at the top level of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evm_fork import EvmFork
+
+# Key of the simulation account, any key works since the fork funds it
+PRIVATE_KEY = "0x" + "11" * 32
+
+
+# Serves the state requests of StateLoader from a local tester chain standing in for mainnet
+class MainnetHandler(BaseHTTPRequestHandler):
+    tester = None
+    methods = {
+        "eth_getBalance",
+        "eth_getTransactionCount",
+        "eth_getCode",
+        "eth_getStorageAt",
+    }
+
+    def do_POST(self):
+        calls = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        body = json.dumps([self.handle_call(i) for i in calls]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_call(self, call):
+        method, params = call["method"], call["params"]
+        # Nothing else is served, e.g. debug_traceCall, so the fork loads state on demand
+        if method not in self.methods:
+            return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32601}}
+        block_number = int(params[-1], 16)
+        if method == "eth_getBalance":
+            result = hex(self.tester.get_balance(params[0], block_number))
+        elif method == "eth_getTransactionCount":
+            result = hex(self.tester.get_nonce(params[0], block_number))
+        elif method == "eth_getCode":
+            result = self.tester.get_code(params[0], block_number)
+        else:
+            result = self.tester.get_storage_at(
+                params[0], int(params[1], 16), block_number
+            )
+        return {"jsonrpc": "2.0", "id": call["id"], "result": result}
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mainnet():
+    tester = EthereumTester(PyEVMBackend())
+    handler = type("Handler", (MainnetHandler,), {"tester": tester})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield tester, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture
+def fork(mainnet):
+    tester, endpoint = mainnet
+    fork = EvmFork(1, endpoint, PRIVATE_KEY, 25, 50)
+    fork.start(0, tester.get_block_by_number("latest")["number"])
+    yield fork
+    fork.stop()
@@ -0,0 +1,130 @@
+# Import modules
+import json
+import os
+import sys
+
+# Run as a script from the tests directory, the bot's modules live at the top level of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import decouple
+import requests
+from contracts import registry
+from venues import venue_registry
+from web3 import Web3
+
+# Recorded fixtures read by test_uniswap_v3.py
+FIXTURES_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "fixtures", "uniswap_v3_quotes.json"
+)
+
+# Outputs quoted in each direction, as shares of the pool's virtual reserve of the output token
+OUTPUT_SHARES = [0.0001, 0.001, 0.01, 0.05, 0.2]
+
+
+def load_ticks(pool, block_number):
+    # Initialized ticks at the recorded block, paged the same way Pricing.load_tick_ladder does
+    ticks = []
+    last_tick = -887273
+    while True:
+        query = f"""query{{ticks(block:{{number:{block_number}}}, first:1000, orderBy:tickIdx, orderDirection:asc,
+                    where:{{pool:\"{pool.lower()}\", tickIdx_gt:{last_tick}}}){{
+                    tickIdx
+                    liquidityGross
+                    liquidityNet
+                    }} }}"""
+        page = requests.post(
+            url=config.uniswap_v3_subgraph, json={"query": query}
+        ).json()["data"]["ticks"]
+        ticks += page
+        if len(page) < 1000:
+            break
+        last_tick = int(page[-1]["tickIdx"])
+    return [
+        [int(i["tickIdx"]), str(i["liquidityNet"])]
+        for i in ticks
+        if int(i["liquidityGross"]) != 0
+    ]
+
+
+def record(w3, pool, block_number):
+    pool_contract = registry.get(w3, pool, "uniswap_v3_pool")
+    quoter_contract = registry.get(w3, config.uniswap_quoter, "uniswap_quoter")
+    sqrt_price_x96, tick, _, _, _, _, _ = pool_contract.functions.slot0().call(
+        block_identifier=block_number
+    )
+    liquidity = pool_contract.functions.liquidity().call(block_identifier=block_number)
+    fee = pool_contract.functions.fee().call(block_identifier=block_number)
+    # Token addresses are not in the trimmed pool ABI, they are read straight from their getters
+    token0, token1 = [
+        Web3.to_checksum_address(
+            w3.eth.call({"to": pool, "data": selector}, block_identifier=block_number)[
+                -20:
+            ]
+        )
+        for selector in ["0x0dfe1681", "0xd21220a7"]
+    ]
+    quotes = []
+    for zero_for_one in [True, False]:
+        # Virtual reserve of the output token at the current price
+        reserve = (
+            liquidity * sqrt_price_x96 // 2**96
+            if zero_for_one
+            else liquidity * 2**96 // sqrt_price_x96
+        )
+        for share in OUTPUT_SHARES:
+            amount_out = int(reserve * share)
+            amount_in, _, _, _ = quoter_contract.functions.quoteExactOutputSingle(
+                {
+                    "tokenIn": token0 if zero_for_one else token1,
+                    "tokenOut": token1 if zero_for_one else token0,
+                    "amount": amount_out,
+                    "fee": fee,
+                    "sqrtPriceLimitX96": 0,
+                }
+            ).call(block_identifier=block_number)
+            quotes.append(
+                {
+                    "zero_for_one": zero_for_one,
+                    "amount_out": str(amount_out),
+                    "amount_in": str(amount_in),
+                }
+            )
+    return {
+        "pool": pool,
+        "block": block_number,
+        "sqrt_price_x96": str(sqrt_price_x96),
+        "tick": tick,
+        "liquidity": str(liquidity),
+        "fee": fee,
+        "tick_spacing": pool_contract.functions.tickSpacing().call(
+            block_identifier=block_number
+        ),
+        "ticks": load_ticks(pool, block_number),
+        "quotes": quotes,
+    }
+
+
+if __name__ == "__main__":
+    # python tests/record_uniswap_v3_quotes.py [pool] [block], defaults to the first Ethereum Uniswap v3 venue at the head
+    w3 = Web3(Web3.HTTPProvider(decouple.config("ETHEREUM_INFURA_URL")))
+    pool = Web3.to_checksum_address(
+        sys.argv[1]
+        if len(sys.argv) > 1
+        else next(
+            i.address
+            for i in venue_registry.venues.values()
+            if i.chain_id == 1 and i.protocol == "uniswap_v3"
+        )
+    )
+    block_number = int(sys.argv[2]) if len(sys.argv) > 2 else w3.eth.block_number
+    fixtures = []
+    if os.path.exists(FIXTURES_FILE):
+        with open(FIXTURES_FILE) as f:
+            fixtures = json.load(f)
+    # Recording a pool again at the same block replaces its entry
+    fixtures = [i for i in fixtures if (i["pool"], i["block"]) != (pool, block_number)]
+    fixtures.append(record(w3, pool, block_number))
+    with open(FIXTURES_FILE, "w") as f:
+        json.dump(fixtures, f, indent=1)
+    print(f"Recorded {pool} at block {block_number} to {FIXTURES_FILE}")
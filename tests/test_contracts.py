@@ -0,0 +1,13 @@
+# Import modules
+import json
+import abis
+import pytest
+from contracts import ContractRegistry, abi_members
+
+
+@pytest.mark.parametrize("abi_name", list(abi_members))
+def test_trimmed_abi_keeps_every_member(abi_name):
+    trimmed = ContractRegistry().abi(abi_name)
+    # A misspelt member would silently drop a function the bot calls
+    assert {i["name"] for i in trimmed} == set(abi_members[abi_name])
+    assert len(trimmed) <= len(json.loads(getattr(abis, abi_name)))
@@ -0,0 +1,331 @@
+# Import modules
+import os
+import shutil
+import time
+import config
+import pytest
+import requests
+from conftest import PRIVATE_KEY
+from contracts import registry
+from evm_fork import EvmFork
+from executor import ZERO_ADDRESS
+from fork import ForkManager
+from venues import venue_registry
+from web3 import Web3
+from zero_ex import ZeroExQuoter
+
+# WETH and the selectors of symbol() and decimals(), state that is the same on any recent block
+WETH = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+WETH_CALLS = ["0x95d89b41", "0x313ce567"]
+
+
+def test_pinned_read_sees_state_loaded_after_its_block(mainnet, fork):
+    tester, _ = mainnet
+    account = tester.get_accounts()[0]
+    w3 = fork.web3()
+    block_number = w3.eth.block_number
+    # The account is loaded into a block after the one the read is pinned to
+    assert w3.eth.get_balance(account, block_number) == tester.get_balance(account)
+    assert w3.eth.block_number > block_number
+    assert w3.eth.get_balance(account, block_number) == w3.eth.get_balance(account)
+
+
+def test_pinned_read_before_a_transaction_refuses_newer_loads(mainnet, fork):
+    tester, _ = mainnet
+    w3 = fork.web3()
+    sender = w3.eth.account.from_key(PRIVATE_KEY).address
+    block_number = w3.eth.block_number
+    w3.eth.send_transaction({"from": sender, "to": sender, "value": 1})
+    # The fork cannot write the account into a block that a transaction was mined after
+    with pytest.raises(ValueError):
+        w3.eth.get_balance(tester.get_accounts()[1], block_number)
+    assert w3.eth.get_balance(tester.get_accounts()[1]) == tester.get_balance(
+        tester.get_accounts()[1]
+    )
+
+
+def test_revert_keeps_pinned_reads_at_the_head(mainnet, fork):
+    tester, _ = mainnet
+    w3 = fork.web3()
+    sender = w3.eth.account.from_key(PRIVATE_KEY).address
+    fork.snapshot(w3)
+    w3.eth.send_transaction({"from": sender, "to": sender, "value": 1})
+    account = tester.get_accounts()[2]
+    w3.eth.get_balance(account)
+    fork.revert(w3)
+    # State loaded after the snapshot is back and the discarded transaction no longer pins reads
+    block_number = w3.eth.block_number
+    assert w3.eth.get_balance(account, block_number) == tester.get_balance(account)
+    assert w3.eth.get_balance(tester.get_accounts()[3], block_number - 1) == (
+        tester.get_balance(tester.get_accounts()[3])
+    )
+
+
+def test_revert_discards_transactions_and_keeps_the_chain(fork):
+    w3 = fork.web3()
+    sender = w3.eth.account.from_key(PRIVATE_KEY).address
+    receiver = w3.eth.account.create().address
+    fork.snapshot(w3)
+    snapshot_block = w3.eth.block_number
+    balance = w3.eth.get_balance(sender)
+    nonce = w3.eth.get_transaction_count(sender)
+    w3.eth.send_transaction({"from": sender, "to": receiver, "value": 10**18})
+    fork.revert(w3)
+    # The snapshot's state is back in a new block, the blocks mined since are still in the chain
+    assert w3.eth.block_number > snapshot_block + 1
+    assert w3.eth.get_balance(receiver) == 0
+    assert w3.eth.get_balance(sender) == balance
+    assert w3.eth.get_transaction_count(sender) == nonce
+    # The fork keeps sending from the restored nonce
+    w3.eth.send_transaction({"from": sender, "to": receiver, "value": 1})
+    assert w3.eth.get_balance(receiver) == 1
+
+
+# Both simulation backends forked from a real endpoint, only run when one is given and Ganache is installed
+mainnet_endpoint = os.environ.get("FORK_TEST_ENDPOINT")
+requires_ganache = pytest.mark.skipif(
+    mainnet_endpoint is None or shutil.which("npx") is None,
+    reason="FORK_TEST_ENDPOINT and npx ganache are needed to compare against Ganache",
+)
+# The mint leg buys the constituents through 0x like the bot does, so it also needs an API key
+requires_zero_ex = pytest.mark.skipif(
+    os.environ.get("ZERO_X_KEY") is None,
+    reason="ZERO_X_KEY is needed to quote the mint leg",
+)
+
+# Account 0 of Ganache's deterministic wallet, the py-evm fork funds the same one so both send from one address
+GANACHE_KEY = "0x4f3edf983ac636a65a842ce7c78d9aa706d3b113bce9c46f30d7d21715b23b1d"
+MAX_UINT = 2**256 - 1
+# ETH spent by the legs, and how many times each backend runs a cycle for the latency comparison
+LEG_AMOUNT = 10**17
+LATENCY_CYCLES = 5
+
+
+@pytest.fixture
+def backends():
+    session = requests.Session()
+    ganache = ForkManager(1, mainnet_endpoint, 8599, 25, session)
+    ganache.start(0, None)
+    # Ganache forks a few blocks behind the endpoint's head, the py-evm fork starts from the same block
+    fork_block = ganache.web3().eth.block_number
+    ganache.fork_block = fork_block
+    evm = EvmFork(1, mainnet_endpoint, GANACHE_KEY, 25, 50)
+    evm.start(0, fork_block)
+    yield ganache, evm
+    ganache.stop()
+    evm.stop()
+
+
+def pdi_listing():
+    return next(i for i in venue_registry.indices if i.symbol == "PDI")
+
+
+def pdi_pool():
+    return venue_registry.get(1, venue_registry.pools(1, "PDI")[0])
+
+
+def transact(w3, contract_function, value=0):
+    # Output from a call at the head, then the same call mined, as the bot simulates and sends each leg
+    sender = w3.eth.account.from_key(GANACHE_KEY).address
+    output = contract_function.call({"from": sender, "value": value})
+    receipt = w3.eth.wait_for_transaction_receipt(
+        contract_function.transact({"from": sender, "value": value})
+    )
+    assert receipt["status"] == 1
+    return output, receipt["gasUsed"]
+
+
+def approve(w3, token, spender):
+    transact(
+        w3, registry.get(w3, token, "pdi_token").functions.approve(spender, MAX_UINT)
+    )
+
+
+def swap_leg(w3, amount, is_buy):
+    listing = pdi_listing()
+    router = registry.get(w3, config.uniswap_swap_router, "uniswap_swap_router")
+    params = {
+        "tokenIn": listing.wrapped_native if is_buy else listing.address,
+        "tokenOut": listing.address if is_buy else listing.wrapped_native,
+        "fee": pdi_pool().fee,
+        "recipient": w3.eth.account.from_key(GANACHE_KEY).address,
+        "deadline": w3.eth.get_block("latest")["timestamp"] + 10000,
+        "amountIn": amount,
+        "amountOutMinimum": 0,
+        "sqrtPriceLimitX96": 0,
+    }
+    return transact(
+        w3, router.functions.exactInputSingle(params), amount if is_buy else 0
+    )
+
+
+def constituent_balances(w3):
+    listing = pdi_listing()
+    index = registry.get(w3, listing.address, "pdi_token")
+    owner = w3.eth.account.from_key(GANACHE_KEY).address
+    assets = (
+        index.functions.anatomy().call()[0] + index.functions.inactiveAnatomy().call()
+    )
+    return {
+        i: registry.get(w3, i, "weth").functions.balanceOf(owner).call() for i in assets
+    }
+
+
+def swap_then_burn(w3):
+    # Buy the index on Uniswap and redeem it for its constituents through the index router
+    listing = pdi_listing()
+    bought, swap_gas = swap_leg(w3, LEG_AMOUNT, True)
+    approve(w3, listing.address, listing.router)
+    before = constituent_balances(w3)
+    router = registry.get(w3, listing.router, "index_router")
+    owner = w3.eth.account.from_key(GANACHE_KEY).address
+    _, burn_gas = transact(
+        w3,
+        router.functions.burn(
+            {"index": listing.address, "amount": bought, "recipient": owner}
+        ),
+    )
+    after = constituent_balances(w3)
+    return {
+        "bought": bought,
+        "swap_gas": swap_gas,
+        "redeemed": {i: after[i] - before[i] for i in after},
+        "burn_gas": burn_gas,
+    }
+
+
+def mint_quotes(w3, fork_block):
+    # 0x quotes for each constituent split by weight as in ArbBotBase.mint, fetched once for both forks
+    listing = pdi_listing()
+    anatomy = list(
+        zip(*registry.get(w3, listing.address, "pdi_token").functions.anatomy().call())
+    )
+    sell_amounts = [int(LEG_AMOUNT * weight / 255) for _, weight in anatomy]
+    sell_amounts[-1] = LEG_AMOUNT - sum(sell_amounts[:-1])
+    quoter = ZeroExQuoter(
+        os.environ["ZERO_X_KEY"],
+        config.zero_ex_rate_limit,
+        config.zero_ex_burst,
+        config.zero_ex_max_workers,
+        config.zero_ex_max_retries,
+        config.zero_ex_backoff,
+        config.zero_ex_quote_ttl,
+        config.zero_ex_quote_block_window,
+    )
+    zero_ex_quotes = quoter.get_quotes(
+        listing.zero_ex_base_url,
+        1,
+        fork_block,
+        [
+            None
+            if asset == listing.wrapped_native
+            else {
+                "enableSlippageProtection": "true",
+                "sellToken": listing.wrapped_native,
+                "slippagePercentage": config.slippage_threshold,
+                "buyToken": asset,
+                "sellAmount": sell_amount,
+            }
+            for (asset, _), sell_amount in zip(anatomy, sell_amounts)
+        ],
+    )
+    return [
+        {
+            "asset": asset,
+            "swapTarget": ZERO_ADDRESS,
+            "buyAssetMinAmount": sell_amount,
+            "assetQuote": ZERO_ADDRESS,
+        }
+        if quote is None
+        else {
+            "asset": asset,
+            "swapTarget": Web3.to_checksum_address(quote["to"]),
+            "buyAssetMinAmount": 0,
+            "assetQuote": quote["data"],
+        }
+        for (asset, _), sell_amount, quote in zip(anatomy, sell_amounts, zero_ex_quotes)
+    ]
+
+
+def mint_then_swap(w3, quotes):
+    # Mint the index from ETH through the same 0x calldata on both forks and sell it on Uniswap
+    listing = pdi_listing()
+    router = registry.get(w3, listing.router, "index_router")
+    owner = w3.eth.account.from_key(GANACHE_KEY).address
+    minted, mint_gas = transact(
+        w3,
+        router.functions.mintSwapValue(
+            {"index": listing.address, "recipient": owner, "quotes": quotes}
+        ),
+        LEG_AMOUNT,
+    )
+    approve(w3, listing.address, config.uniswap_swap_router)
+    sold, swap_gas = swap_leg(w3, minted, False)
+    return {"minted": minted, "mint_gas": mint_gas, "sold": sold, "swap_gas": swap_gas}
+
+
+@requires_ganache
+def test_reads_match_ganache(backends):
+    ganache, evm = backends
+    ganache_w3, evm_w3 = ganache.web3(), evm.web3()
+    assert evm_w3.eth.get_code(WETH) == ganache_w3.eth.get_code(WETH)
+    for data in WETH_CALLS:
+        assert evm_w3.eth.call({"to": WETH, "data": data}) == ganache_w3.eth.call(
+            {"to": WETH, "data": data}
+        )
+
+
+@requires_ganache
+def test_pinned_reads_match_ganache(backends):
+    ganache, evm = backends
+    ganache_w3, evm_w3 = ganache.web3(), evm.web3()
+    # Each fork is pinned to its own head before anything is loaded on the py-evm fork
+    ganache_block = ganache_w3.eth.block_number
+    evm_block = evm_w3.eth.block_number
+    for data in WETH_CALLS:
+        assert evm_w3.eth.call(
+            {"to": WETH, "data": data}, evm_block
+        ) == ganache_w3.eth.call({"to": WETH, "data": data}, ganache_block)
+    assert evm_w3.eth.get_code(WETH, evm_block) == ganache_w3.eth.get_code(
+        WETH, ganache_block
+    )
+
+
+@requires_ganache
+def test_swap_then_burn_matches_ganache(backends):
+    ganache, evm = backends
+    assert swap_then_burn(evm.web3()) == swap_then_burn(ganache.web3())
+
+
+@requires_ganache
+@requires_zero_ex
+def test_mint_then_swap_matches_ganache(backends):
+    ganache, evm = backends
+    quotes = mint_quotes(ganache.web3(), ganache.fork_block)
+    assert mint_then_swap(evm.web3(), quotes) == mint_then_swap(ganache.web3(), quotes)
+
+
+@requires_ganache
+def test_cycle_latency_against_ganache(backends, record_property):
+    # One cycle is what calculate_route does per route: revert to the snapshot, run the legs and read the result
+    latencies = {}
+    for name, fork in zip(["ganache", "py-evm"], backends):
+        w3 = fork.web3()
+        fork.snapshot(w3)
+        cycles = []
+        for _ in range(LATENCY_CYCLES):
+            start = time.perf_counter()
+            fork.revert(w3)
+            swap_then_burn(w3)
+            cycles.append(time.perf_counter() - start)
+        # The first cycle loads the state the legs touch, the rest run on the warm fork
+        latencies[name] = {"first": cycles[0], "warm": min(cycles[1:])}
+        record_property(f"{name}_first_cycle_ms", round(cycles[0] * 1000, 1))
+        record_property(f"{name}_warm_cycle_ms", round(min(cycles[1:]) * 1000, 1))
+    print(
+        "Per-cycle latency, first / warm: "
+        + ", ".join(
+            f"{name} {i['first'] * 1000:.1f} / {i['warm'] * 1000:.1f} ms"
+            for name, i in latencies.items()
+        )
+    )
@@ -0,0 +1,186 @@
+# Import modules
+import json
+import os
+import pytest
+from record_uniswap_v3_quotes import FIXTURES_FILE
+from uniswap_v3 import (
+    InsufficientLiquidity,
+    MAX_SQRT_RATIO,
+    MAX_TICK,
+    MIN_SQRT_RATIO,
+    MIN_TICK,
+    PoolState,
+    TickLadder,
+    compute_swap_step,
+    get_sqrt_ratio_at_tick,
+    get_tick_at_sqrt_ratio,
+)
+
+# Reference values from the Uniswap v3-core TickMath and SwapMath test suites
+SQRT_PRICE_1_1 = 79228162514264337593543950336
+SQRT_PRICE_101_100 = 79623317895830914510639640423
+SQRT_PRICE_1000_100 = 250541448375047931186413801569
+SQRT_PRICE_10000_100 = 792281625142643375935439503360
+SQRT_PRICE_INTERMEDIATE = 20282409603651670423947251286016
+
+# (sqrt price, target sqrt price, liquidity, amount remaining, fee pips) -> (sqrt price after, amount in, amount out, fee)
+SWAP_STEPS = [
+    (
+        (SQRT_PRICE_1_1, SQRT_PRICE_101_100, 2 * 10**18, 10**18, 600),
+        (SQRT_PRICE_101_100, 9975124224178055, 9925619580021728, 5988667735148),
+    ),
+    (
+        (SQRT_PRICE_1_1, SQRT_PRICE_101_100, 2 * 10**18, -(10**18), 600),
+        (SQRT_PRICE_101_100, 9975124224178055, 9925619580021728, 5988667735148),
+    ),
+    (
+        (SQRT_PRICE_1_1, SQRT_PRICE_1000_100, 2 * 10**18, 10**18, 600),
+        (
+            118818475322642227089037862318,
+            999400000000000000,
+            666399946655997866,
+            600000000000000,
+        ),
+    ),
+    (
+        (SQRT_PRICE_1_1, SQRT_PRICE_10000_100, 2 * 10**18, -(10**18), 600),
+        (
+            158456325028528675187087900672,
+            2000000000000000000,
+            10**18,
+            1200720432259356,
+        ),
+    ),
+    (
+        (
+            417332158212080721273783715441582,
+            1452870262520218020823638996,
+            159344665391607089467575320103,
+            -1,
+            1,
+        ),
+        (417332158212080721273783715441581, 1, 1, 1),
+    ),
+    (
+        (2, 1, 1, 3915081100057732413702495386755767, 1),
+        (1, 39614081257132168796771975168, 0, 39614120871253040049813),
+    ),
+    (
+        (2413, 79887613182836312, 1985041575832132834610021537970, 10, 1872),
+        (2413, 0, 0, 10),
+    ),
+    (
+        (
+            SQRT_PRICE_INTERMEDIATE,
+            SQRT_PRICE_INTERMEDIATE * 11 // 10,
+            1024,
+            -4,
+            3000,
+        ),
+        (SQRT_PRICE_INTERMEDIATE * 11 // 10, 26215, 0, 79),
+    ),
+    (
+        (
+            SQRT_PRICE_INTERMEDIATE,
+            SQRT_PRICE_INTERMEDIATE * 9 // 10,
+            1024,
+            -263000,
+            3000,
+        ),
+        (SQRT_PRICE_INTERMEDIATE * 9 // 10, 1, 26214, 1),
+    ),
+]
+
+
+def load_fixtures():
+    if not os.path.exists(FIXTURES_FILE):
+        return []
+    with open(FIXTURES_FILE) as f:
+        return json.load(f)
+
+
+def pool_state(fixture):
+    return PoolState(
+        int(fixture["sqrt_price_x96"]),
+        fixture["tick"],
+        int(fixture["liquidity"]),
+        fixture["fee"],
+        fixture["tick_spacing"],
+        TickLadder(
+            [i[0] for i in fixture["ticks"]], [int(i[1]) for i in fixture["ticks"]]
+        ),
+    )
+
+
+def test_sqrt_ratio_at_tick_bounds():
+    assert get_sqrt_ratio_at_tick(MIN_TICK) == MIN_SQRT_RATIO
+    assert get_sqrt_ratio_at_tick(MAX_TICK) == MAX_SQRT_RATIO
+    assert get_sqrt_ratio_at_tick(0) == SQRT_PRICE_1_1
+
+
+@pytest.mark.parametrize("tick", [MIN_TICK, -50000, -1, 0, 1, 50, 50000, MAX_TICK - 1])
+def test_tick_at_sqrt_ratio_inverts_sqrt_ratio_at_tick(tick):
+    sqrt_ratio = get_sqrt_ratio_at_tick(tick)
+    assert get_tick_at_sqrt_ratio(sqrt_ratio) == tick
+    # Any price up to the next tick's ratio still belongs to the tick
+    assert get_tick_at_sqrt_ratio(get_sqrt_ratio_at_tick(tick + 1) - 1) == tick
+
+
+@pytest.mark.parametrize("step, expected", SWAP_STEPS)
+def test_compute_swap_step(step, expected):
+    assert compute_swap_step(*step) == expected
+
+
+def test_exact_output_quote_buys_the_output():
+    # Full range liquidity plus a narrow position the swaps cross out of
+    state = PoolState(
+        SQRT_PRICE_1_1,
+        0,
+        3 * 10**18,
+        3000,
+        60,
+        TickLadder(
+            [-887220, -600, 600, 887220],
+            [10**18, 2 * 10**18, -2 * 10**18, -(10**18)],
+        ),
+    )
+    for zero_for_one in [True, False]:
+        for amount_out in [10**15, 10**17, 5 * 10**17]:
+            amount_in = state.quote_exact_output_single(zero_for_one, amount_out)
+            assert state.exact_input_single(zero_for_one, amount_in) >= amount_out
+            assert state.exact_input_single(zero_for_one, amount_in - 1) < amount_out
+
+
+def test_exact_output_beyond_the_liquidity_raises():
+    state = PoolState(
+        SQRT_PRICE_1_1,
+        0,
+        10**18,
+        3000,
+        60,
+        TickLadder([-600, 600], [10**18, -(10**18)]),
+    )
+    # The range holds about 3% of the liquidity in each token
+    assert state.quote_exact_output_single(True, 10**16) > 10**16
+    with pytest.raises(InsufficientLiquidity):
+        state.quote_exact_output_single(True, 10**17)
+
+
+def test_quoter_fixtures_are_recorded():
+    # The port is only checked against the deployed Quoter once quotes are committed, CI requires them
+    if len(load_fixtures()) == 0:
+        message = (
+            "No recorded quotes, record them with tests/record_uniswap_v3_quotes.py"
+        )
+        if os.environ.get("CI"):
+            pytest.fail(message)
+        pytest.skip(message)
+
+
+@pytest.mark.parametrize("fixture", load_fixtures())
+def test_quote_exact_output_single_matches_quoter(fixture):
+    state = pool_state(fixture)
+    for quote in fixture["quotes"]:
+        assert state.quote_exact_output_single(
+            quote["zero_for_one"], int(quote["amount_out"])
+        ) == int(quote["amount_in"])
@@ -0,0 +1,115 @@
+# Import modules
+import asyncio
+import threading
+import aiohttp
+from concurrent.futures import Future
+from web3._utils.method_formatters import receipt_formatter
+from web3 import Web3
+from web3.datastructures import AttributeDict
+
+
+# Watches submitted transactions on one endpoint, polling every pending receipt in a single batched request
+class ReceiptTracker:
+    def __init__(self, endpoint, poll_interval, confirmations, timeout):
+        self.endpoint = endpoint
+        self.poll_interval = poll_interval
+        self.confirmations = confirmations
+        self.timeout = timeout
+        # transaction hash -> future resolved with its receipt once confirmed
+        self.pending = {}
+        self.poller = None
+        # The loop runs in its own thread so callers only block on the futures they choose to
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    def track(self, transaction_hash):
+        return asyncio.run_coroutine_threadsafe(self.wait(transaction_hash), self.loop)
+
+    def then(self, transaction_hash, callback):
+        # Run a blocking callback on the confirmed receipt without holding up the caller
+        return asyncio.run_coroutine_threadsafe(
+            self.wait_then(transaction_hash, callback), self.loop
+        )
+
+    async def wait_then(self, transaction_hash, callback):
+        receipt = await self.wait(transaction_hash)
+        return await self.loop.run_in_executor(None, callback, receipt)
+
+    async def wait(self, transaction_hash):
+        key = Web3.to_hex(transaction_hash)
+        future = self.pending.get(key)
+        if future is None:
+            future = self.loop.create_future()
+            self.pending[key] = future
+        if self.poller is None or self.poller.done():
+            self.poller = self.loop.create_task(self.poll())
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.pending.pop(key, None)
+            raise TimeoutError(f"Transaction {key} not confirmed after {self.timeout}s")
+
+    async def poll(self):
+        async with aiohttp.ClientSession() as session:
+            while len(self.pending) > 0:
+                hashes = list(self.pending)
+                try:
+                    results = await self.batch(
+                        session,
+                        [("eth_blockNumber", [])]
+                        + [("eth_getTransactionReceipt", [i]) for i in hashes],
+                    )
+                except (aiohttp.ClientError, ValueError) as e:
+                    print(f"Receipt poll failed on {self.endpoint}: {e}")
+                    results = None
+                if results is not None:
+                    head_block = int(results[0], 16)
+                    for transaction_hash, receipt in zip(hashes, results[1:]):
+                        # Reverted transactions resolve too, the caller checks the status
+                        if (
+                            receipt is not None
+                            and head_block - int(receipt["blockNumber"], 16) + 1
+                            >= self.confirmations
+                        ):
+                            future = self.pending.pop(transaction_hash, None)
+                            if future is not None and not future.done():
+                                future.set_result(
+                                    AttributeDict.recursive(receipt_formatter(receipt))
+                                )
+                await asyncio.sleep(self.poll_interval)
+
+    async def batch(self, session, calls):
+        async with session.post(
+            self.endpoint,
+            json=[
+                {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+                for i, (method, params) in enumerate(calls)
+            ],
+        ) as response:
+            response = await response.json(content_type=None)
+        results = {i["id"]: i for i in response}
+        for i in results.values():
+            if "error" in i:
+                raise ValueError(i["error"])
+        return [results[i]["result"] for i in range(len(calls))]
+
+
+def completed(result):
+    # Already resolved future, for callers that had to wait synchronously
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+# One tracker per endpoint, shared by every bot on it so all their in-flight transactions are polled together
+trackers = {}
+trackers_lock = threading.Lock()
+
+
+def get_tracker(endpoint, poll_interval, confirmations, timeout):
+    with trackers_lock:
+        if endpoint not in trackers:
+            trackers[endpoint] = ReceiptTracker(
+                endpoint, poll_interval, confirmations, timeout
+            )
+        return trackers[endpoint]
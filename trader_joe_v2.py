@@ -0,0 +1,300 @@
+# Import modules
+import math
+import threading
+
+# Constants from the Liquidity Book v2.1 contracts
+SCALE_OFFSET = 128
+SCALE = 1 << SCALE_OFFSET
+REAL_ID_SHIFT = 1 << 23
+BASIS_POINT_MAX = 10000
+PRECISION = 10**18
+MAX_UINT256 = 2**256 - 1
+
+
+def get_price_from_id(bin_id, bin_step):
+    # Uint128x128Math.pow(getBase(binStep), getExponent(id)) as a 128.128 fixed point number
+    base = SCALE + (bin_step << SCALE_OFFSET) // BASIS_POINT_MAX
+    exponent = bin_id - REAL_ID_SHIFT
+    if exponent == 0:
+        return SCALE
+    invert = exponent < 0
+    abs_exponent = abs(exponent)
+    assert abs_exponent < 0x100000, "Exponent too large"
+    result = SCALE
+    squared = base
+    # Bases above 1 are inverted so every intermediate product fits in 256 bits
+    if base > 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF:
+        squared = MAX_UINT256 // squared
+        invert = not invert
+    for bit in range(20):
+        if abs_exponent & (1 << bit):
+            result = (result * squared) >> 128
+        squared = (squared * squared) >> 128
+    assert result != 0, "Price underflow"
+    return MAX_UINT256 // result if invert else result
+
+
+def get_id_from_price(price, bin_step):
+    # Id of the bin whose price range contains the price, corrected against the exact on-chain price
+    price_x128 = int(price * SCALE)
+    bin_id = (
+        math.floor(math.log(price) / math.log(1 + bin_step / BASIS_POINT_MAX))
+        + REAL_ID_SHIFT
+    )
+    while get_price_from_id(bin_id, bin_step) > price_x128:
+        bin_id -= 1
+    while get_price_from_id(bin_id + 1, bin_step) <= price_x128:
+        bin_id += 1
+    return bin_id
+
+
+def shift_div_round_up(x, offset, y):
+    return -(-(x << offset) // y)
+
+
+def shift_div_round_down(x, offset, y):
+    return (x << offset) // y
+
+
+def mul_shift_round_up(x, y, offset):
+    return -(-(x * y) >> offset)
+
+
+def mul_shift_round_down(x, y, offset):
+    return (x * y) >> offset
+
+
+def get_fee_amount(amount, total_fee):
+    # Fee to add on top of an amount that excludes fees
+    denominator = PRECISION - total_fee
+    return (amount * total_fee + denominator - 1) // denominator
+
+
+def get_fee_amount_from(amount_with_fees, total_fee):
+    # Fee included in an amount that already contains fees
+    return (amount_with_fees * total_fee + PRECISION - 1) // PRECISION
+
+
+# Local copy of a Liquidity Book pair's bins around the active id
+class LiquidityBook:
+    def __init__(
+        self,
+        bin_step,
+        active_id,
+        static_fee_parameters,
+        variable_fee_parameters,
+        block_number,
+        timestamp,
+        fetch_bins,
+        window,
+        max_bins,
+    ):
+        self.bin_step = bin_step
+        self.active_id = active_id
+        self.block_number = block_number
+        self.timestamp = timestamp
+        # Callable returning {id: (reserve_x, reserve_y)} for a list of ids at a block in one batched read
+        self.fetch_bins = fetch_bins
+        self.window = window
+        self.max_bins = max_bins
+        # Routes priced side by side share the book, walks and updates take it in turn
+        self.lock = threading.RLock()
+        self.bins = {}
+        # Range of ids whose reserves are known, empty bins included
+        self.lowest_id = active_id
+        self.highest_id = active_id - 1
+        self.update_fee_parameters(static_fee_parameters, variable_fee_parameters)
+        self.ensure_range(active_id - window, active_id + window)
+
+    def update_fee_parameters(self, static_fee_parameters, variable_fee_parameters):
+        (
+            self.base_factor,
+            self.filter_period,
+            self.decay_period,
+            self.reduction_factor,
+            self.variable_fee_control,
+            self.protocol_share,
+            self.max_volatility_accumulator,
+        ) = static_fee_parameters
+        (
+            self.volatility_accumulator,
+            self.volatility_reference,
+            self.id_reference,
+            self.time_of_last_update,
+        ) = variable_fee_parameters
+
+    def load_bins(self, bins):
+        for bin_id, reserves in bins.items():
+            self.bins[bin_id] = tuple(reserves)
+        if len(bins) > 0:
+            self.lowest_id = min(self.lowest_id, min(bins))
+            self.highest_id = max(self.highest_id, max(bins))
+
+    def ensure_range(self, low, high):
+        # Grow the known range contiguously, fetching only the ids that are not already known
+        with self.lock:
+            if self.highest_id >= self.lowest_id:
+                low, high = min(low, self.lowest_id), max(high, self.highest_id)
+            missing = [
+                i
+                for i in range(max(low, 0), min(high, 2**24 - 1) + 1)
+                if i < self.lowest_id or i > self.highest_id
+            ]
+            if len(missing) > 0:
+                self.load_bins(self.fetch_bins(missing, self.block_number))
+
+    def get_bin(self, bin_id):
+        with self.lock:
+            if bin_id < self.lowest_id or bin_id > self.highest_id:
+                self.ensure_range(bin_id - self.window, bin_id + self.window)
+            return self.bins.get(bin_id, (0, 0))
+
+    def next_non_empty_bin(self, swap_for_y, bin_id):
+        # Swapping X for Y moves down to lower ids, Y for X moves up
+        step = -1 if swap_for_y else 1
+        next_id = bin_id + step
+        while abs(next_id - self.active_id) <= self.max_bins:
+            if self.get_bin(next_id) != (0, 0):
+                return next_id
+            next_id += step
+        return None
+
+    def reserves_between(self, start_id, end_id, use_x):
+        # Total reserve of one token across an inclusive range of bins
+        with self.lock:
+            low, high = min(start_id, end_id), max(start_id, end_id)
+            self.ensure_range(low, high)
+            return sum(self.get_bin(i)[0 if use_x else 1] for i in range(low, high + 1))
+
+    def reference_parameters(self):
+        # Fee references as updateReferences would set them at the book's timestamp
+        id_reference = self.id_reference
+        volatility_reference = self.volatility_reference
+        dt = self.timestamp - self.time_of_last_update
+        if dt >= self.filter_period:
+            id_reference = self.active_id
+            volatility_reference = (
+                self.volatility_accumulator * self.reduction_factor // BASIS_POINT_MAX
+                if dt < self.decay_period
+                else 0
+            )
+        return id_reference, volatility_reference
+
+    def get_total_fee(self, bin_id, id_reference, volatility_reference):
+        # Base fee plus the variable fee from the volatility accumulated up to this bin
+        volatility_accumulator = min(
+            volatility_reference + abs(bin_id - id_reference) * BASIS_POINT_MAX,
+            self.max_volatility_accumulator,
+        )
+        base_fee = self.base_factor * self.bin_step * 10**10
+        variable_fee = 0
+        if self.variable_fee_control != 0:
+            product = volatility_accumulator * self.bin_step
+            variable_fee = (product * product * self.variable_fee_control + 99) // 100
+        return base_fee + variable_fee
+
+    def get_swap_in(self, amount_out, swap_for_y):
+        # Same result as LBPair.getSwapIn
+        with self.lock:
+            amount_in = 0
+            amount_out_left = amount_out
+            fee = 0
+            id_reference, volatility_reference = self.reference_parameters()
+            bin_id = self.active_id
+            while True:
+                bin_reserves = self.get_bin(bin_id)[1 if swap_for_y else 0]
+                if bin_reserves > 0:
+                    price = get_price_from_id(bin_id, self.bin_step)
+                    amount_out_of_bin = min(bin_reserves, amount_out_left)
+                    amount_in_without_fee = (
+                        shift_div_round_up(amount_out_of_bin, SCALE_OFFSET, price)
+                        if swap_for_y
+                        else mul_shift_round_up(amount_out_of_bin, price, SCALE_OFFSET)
+                    )
+                    fee_amount = get_fee_amount(
+                        amount_in_without_fee,
+                        self.get_total_fee(bin_id, id_reference, volatility_reference),
+                    )
+                    amount_in += amount_in_without_fee + fee_amount
+                    amount_out_left -= amount_out_of_bin
+                    fee += fee_amount
+                if amount_out_left == 0:
+                    break
+                bin_id = self.next_non_empty_bin(swap_for_y, bin_id)
+                if bin_id is None:
+                    break
+            return amount_in, amount_out_left, fee
+
+    def get_swap_out(self, amount_in, swap_for_y):
+        # Same result as LBPair.getSwapOut
+        with self.lock:
+            amount_in_left = amount_in
+            amount_out = 0
+            fee = 0
+            id_reference, volatility_reference = self.reference_parameters()
+            bin_id = self.active_id
+            while True:
+                bin_reserve_out = self.get_bin(bin_id)[1 if swap_for_y else 0]
+                if bin_reserve_out > 0:
+                    price = get_price_from_id(bin_id, self.bin_step)
+                    total_fee = self.get_total_fee(
+                        bin_id, id_reference, volatility_reference
+                    )
+                    max_amount_in = (
+                        shift_div_round_up(bin_reserve_out, SCALE_OFFSET, price)
+                        if swap_for_y
+                        else mul_shift_round_up(bin_reserve_out, price, SCALE_OFFSET)
+                    )
+                    max_fee = get_fee_amount(max_amount_in, total_fee)
+                    max_amount_in += max_fee
+                    if amount_in_left >= max_amount_in:
+                        fee_amount = max_fee
+                        amount_in_of_bin = max_amount_in
+                        amount_out_of_bin = bin_reserve_out
+                    else:
+                        fee_amount = get_fee_amount_from(amount_in_left, total_fee)
+                        amount_in_of_bin = amount_in_left
+                        amount_in_less_fee = amount_in_left - fee_amount
+                        amount_out_of_bin = min(
+                            mul_shift_round_down(
+                                amount_in_less_fee, price, SCALE_OFFSET
+                            )
+                            if swap_for_y
+                            else shift_div_round_down(
+                                amount_in_less_fee, SCALE_OFFSET, price
+                            ),
+                            bin_reserve_out,
+                        )
+                    if amount_in_of_bin > 0:
+                        amount_in_left -= amount_in_of_bin
+                        amount_out += amount_out_of_bin
+                        fee += fee_amount
+                if amount_in_left == 0:
+                    break
+                bin_id = self.next_non_empty_bin(swap_for_y, bin_id)
+                if bin_id is None:
+                    break
+            return amount_in_left, amount_out, fee
+
+    def apply_update(
+        self, active_id, variable_fee_parameters, bins, block_number, timestamp
+    ):
+        # Refresh the book with the state of the bins touched since the last sync
+        with self.lock:
+            self.active_id = active_id
+            (
+                self.volatility_accumulator,
+                self.volatility_reference,
+                self.id_reference,
+                self.time_of_last_update,
+            ) = variable_fee_parameters
+            # Bins outside the known range are fetched lazily when a walk reaches them
+            self.load_bins(
+                {
+                    bin_id: reserves
+                    for bin_id, reserves in bins.items()
+                    if self.lowest_id <= bin_id <= self.highest_id
+                }
+            )
+            self.block_number = block_number
+            self.timestamp = timestamp
@@ -0,0 +1,406 @@
+# Import modules
+import itertools
+import numpy as np
+
+
+# Sorted view of a pool's initialized ticks used to walk liquidity without re-filtering
+class TickLadder:
+    def __init__(self, ticks, liquidity_nets):
+        # Sort ticks once and keep net liquidity aligned with them
+        order = sorted(range(len(ticks)), key=lambda i: ticks[i])
+        self.ticks = np.array([ticks[i] for i in order], dtype=np.int64)
+        self.liquidity_net = [liquidity_nets[i] for i in order]
+        # Cumulative net liquidity before each tick, c[j] = sum(liquidity_net[:j]). Summed as ints as nets exceed int64
+        self.cumulative_net = np.array(
+            [0] + list(itertools.accumulate(self.liquidity_net)), dtype=np.float64
+        )
+        # Precompute sqrt prices at every initialized tick
+        self.sqrt_prices = self.sqrt_price(self.ticks)
+
+    def __len__(self):
+        return len(self.ticks)
+
+    @staticmethod
+    def sqrt_price(tick):
+        return 1.0001 ** (np.asarray(tick, dtype=np.float64) / 2)
+
+    def amount_to_tick(self, current_tick, current_liquidity, target_tick):
+        # Amount of token0 (price moving up) or token1 (price moving down) held in the ranges between the two ticks
+        if target_tick == current_tick:
+            return 0.0
+        if target_tick > current_tick:
+            # Ticks crossed on the way up are current < tick < target
+            start = int(np.searchsorted(self.ticks, current_tick, side="right"))
+            end = int(np.searchsorted(self.ticks, target_tick, side="left"))
+            start = min(start, end)
+            # Crossing tick j upwards adds liquidity_net[j]
+            liquidity = np.concatenate(
+                (
+                    [current_liquidity],
+                    current_liquidity
+                    + self.cumulative_net[start + 1 : end + 1]
+                    - self.cumulative_net[start],
+                )
+            )
+            bounds = np.concatenate(
+                (
+                    [self.sqrt_price(current_tick)],
+                    self.sqrt_prices[start:end],
+                    [self.sqrt_price(target_tick)],
+                )
+            )
+            lower, upper = bounds[:-1], bounds[1:]
+            return float(np.sum(liquidity * (upper - lower) / (lower * upper)))
+        else:
+            # Ticks crossed on the way down are target < tick < current, walked from the top
+            end = int(np.searchsorted(self.ticks, current_tick, side="left"))
+            start = int(np.searchsorted(self.ticks, target_tick, side="right"))
+            start = min(start, end)
+            # Crossing tick j downwards removes liquidity_net[j]
+            liquidity = np.concatenate(
+                (
+                    [current_liquidity],
+                    current_liquidity
+                    - self.cumulative_net[end]
+                    + self.cumulative_net[start:end][::-1],
+                )
+            )
+            bounds = np.concatenate(
+                (
+                    [self.sqrt_price(current_tick)],
+                    self.sqrt_prices[start:end][::-1],
+                    [self.sqrt_price(target_tick)],
+                )
+            )
+            upper, lower = bounds[:-1], bounds[1:]
+            return float(np.sum(liquidity * (upper - lower)))
+
+
+# Integer ports of the Uniswap v3 core libraries so swaps can be simulated without the Quoter
+MIN_TICK = -887272
+MAX_TICK = 887272
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+Q96 = 2**96
+MAX_UINT256 = 2**256 - 1
+
+# TickMath.getSqrtRatioAtTick multipliers for each bit of the absolute tick
+TICK_RATIO_MULTIPLIERS = [
+    (0x2, 0xFFF97272373D413259A46990580E213A),
+    (0x4, 0xFFF2E50F5F656932EF12357CF3C7FDCC),
+    (0x8, 0xFFE5CACA7E10E4E61C3624EAA0941CD0),
+    (0x10, 0xFFCB9843D60F6159C9DB58835C926644),
+    (0x20, 0xFF973B41FA98C081472E6896DFB254C0),
+    (0x40, 0xFF2EA16466C96A3843EC78B326B52861),
+    (0x80, 0xFE5DEE046A99A2A811C461F1969C3053),
+    (0x100, 0xFCBE86C7900A88AEDCFFC83B479AA3A4),
+    (0x200, 0xF987A7253AC413176F2B074CF7815E54),
+    (0x400, 0xF3392B0822B70005940C7A398E4B70F3),
+    (0x800, 0xE7159475A2C29B7443B29C7FA6E889D9),
+    (0x1000, 0xD097F3BDFD2022B8845AD8F792AA5825),
+    (0x2000, 0xA9F746462D870FDF8A65DC1F90E061E5),
+    (0x4000, 0x70D869A156D2A1B890BB3DF62BAF32F7),
+    (0x8000, 0x31BE135F97D08FD981231505542FCFA6),
+    (0x10000, 0x9AA508B5B7A84E1C677DE54F3E99BC9),
+    (0x20000, 0x5D6AF8DEDB81196699C329225EE604),
+    (0x40000, 0x2216E584F5FA1EA926041BEDFE98),
+    (0x80000, 0x48A170391F7DC42444E8FA2),
+]
+
+
+# The pool's liquidity cannot supply the output asked for
+class InsufficientLiquidity(Exception):
+    pass
+
+
+def mul_div(a, b, denominator):
+    return a * b // denominator
+
+
+def mul_div_rounding_up(a, b, denominator):
+    return -(-a * b // denominator)
+
+
+def div_rounding_up(a, b):
+    return -(-a // b)
+
+
+def get_sqrt_ratio_at_tick(tick):
+    abs_tick = abs(tick)
+    assert abs_tick <= MAX_TICK, "Tick out of range"
+    ratio = (
+        0xFFFCB933BD6FAD37AA2D162D1A594001
+        if abs_tick & 0x1 != 0
+        else 0x100000000000000000000000000000000
+    )
+    for bit, multiplier in TICK_RATIO_MULTIPLIERS:
+        if abs_tick & bit != 0:
+            ratio = (ratio * multiplier) >> 128
+    if tick > 0:
+        ratio = MAX_UINT256 // ratio
+    # Round up when converting from Q128.128 to Q64.96
+    return (ratio >> 32) + (0 if ratio % (1 << 32) == 0 else 1)
+
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96):
+    # Greatest tick whose sqrt ratio is <= the input, which is what TickMath computes with its log2 approximation
+    assert MIN_SQRT_RATIO <= sqrt_price_x96 < MAX_SQRT_RATIO, "Sqrt ratio out of range"
+    tick = int(np.floor(2 * np.log(sqrt_price_x96 / Q96) / np.log(1.0001)))
+    tick = max(MIN_TICK, min(MAX_TICK, tick))
+    while tick > MIN_TICK and get_sqrt_ratio_at_tick(tick) > sqrt_price_x96:
+        tick -= 1
+    while tick < MAX_TICK and get_sqrt_ratio_at_tick(tick + 1) <= sqrt_price_x96:
+        tick += 1
+    return tick
+
+
+def get_next_sqrt_price_from_amount0_rounding_up(
+    sqrt_price_x96, liquidity, amount, add
+):
+    if amount == 0:
+        return sqrt_price_x96
+    numerator1 = liquidity << 96
+    product = amount * sqrt_price_x96
+    if add:
+        # Use the precise formula unless the Solidity intermediate values overflow
+        if product <= MAX_UINT256 and numerator1 + product <= MAX_UINT256:
+            return mul_div_rounding_up(numerator1, sqrt_price_x96, numerator1 + product)
+        return div_rounding_up(numerator1, numerator1 // sqrt_price_x96 + amount)
+    if product > MAX_UINT256 or numerator1 <= product:
+        raise InsufficientLiquidity("Insufficient liquidity")
+    return mul_div_rounding_up(numerator1, sqrt_price_x96, numerator1 - product)
+
+
+def get_next_sqrt_price_from_amount1_rounding_down(
+    sqrt_price_x96, liquidity, amount, add
+):
+    if add:
+        return sqrt_price_x96 + (amount << 96) // liquidity
+    quotient = div_rounding_up(amount << 96, liquidity)
+    if sqrt_price_x96 <= quotient:
+        raise InsufficientLiquidity("Insufficient liquidity")
+    return sqrt_price_x96 - quotient
+
+
+def get_next_sqrt_price_from_input(sqrt_price_x96, liquidity, amount_in, zero_for_one):
+    if zero_for_one:
+        return get_next_sqrt_price_from_amount0_rounding_up(
+            sqrt_price_x96, liquidity, amount_in, True
+        )
+    return get_next_sqrt_price_from_amount1_rounding_down(
+        sqrt_price_x96, liquidity, amount_in, True
+    )
+
+
+def get_next_sqrt_price_from_output(
+    sqrt_price_x96, liquidity, amount_out, zero_for_one
+):
+    if zero_for_one:
+        return get_next_sqrt_price_from_amount1_rounding_down(
+            sqrt_price_x96, liquidity, amount_out, False
+        )
+    return get_next_sqrt_price_from_amount0_rounding_up(
+        sqrt_price_x96, liquidity, amount_out, False
+    )
+
+
+def get_amount0_delta(sqrt_ratio_a_x96, sqrt_ratio_b_x96, liquidity, round_up):
+    if sqrt_ratio_a_x96 > sqrt_ratio_b_x96:
+        sqrt_ratio_a_x96, sqrt_ratio_b_x96 = sqrt_ratio_b_x96, sqrt_ratio_a_x96
+    numerator1 = liquidity << 96
+    numerator2 = sqrt_ratio_b_x96 - sqrt_ratio_a_x96
+    if round_up:
+        return div_rounding_up(
+            mul_div_rounding_up(numerator1, numerator2, sqrt_ratio_b_x96),
+            sqrt_ratio_a_x96,
+        )
+    return mul_div(numerator1, numerator2, sqrt_ratio_b_x96) // sqrt_ratio_a_x96
+
+
+def get_amount1_delta(sqrt_ratio_a_x96, sqrt_ratio_b_x96, liquidity, round_up):
+    if sqrt_ratio_a_x96 > sqrt_ratio_b_x96:
+        sqrt_ratio_a_x96, sqrt_ratio_b_x96 = sqrt_ratio_b_x96, sqrt_ratio_a_x96
+    if round_up:
+        return mul_div_rounding_up(liquidity, sqrt_ratio_b_x96 - sqrt_ratio_a_x96, Q96)
+    return mul_div(liquidity, sqrt_ratio_b_x96 - sqrt_ratio_a_x96, Q96)
+
+
+def compute_swap_step(
+    sqrt_ratio_current_x96, sqrt_ratio_target_x96, liquidity, amount_remaining, fee_pips
+):
+    zero_for_one = sqrt_ratio_current_x96 >= sqrt_ratio_target_x96
+    exact_in = amount_remaining >= 0
+    if exact_in:
+        amount_remaining_less_fee = mul_div(
+            amount_remaining, 10**6 - fee_pips, 10**6
+        )
+        amount_in = (
+            get_amount0_delta(
+                sqrt_ratio_target_x96, sqrt_ratio_current_x96, liquidity, True
+            )
+            if zero_for_one
+            else get_amount1_delta(
+                sqrt_ratio_current_x96, sqrt_ratio_target_x96, liquidity, True
+            )
+        )
+        if amount_remaining_less_fee >= amount_in:
+            sqrt_ratio_next_x96 = sqrt_ratio_target_x96
+        else:
+            sqrt_ratio_next_x96 = get_next_sqrt_price_from_input(
+                sqrt_ratio_current_x96,
+                liquidity,
+                amount_remaining_less_fee,
+                zero_for_one,
+            )
+    else:
+        amount_out = (
+            get_amount1_delta(
+                sqrt_ratio_target_x96, sqrt_ratio_current_x96, liquidity, False
+            )
+            if zero_for_one
+            else get_amount0_delta(
+                sqrt_ratio_current_x96, sqrt_ratio_target_x96, liquidity, False
+            )
+        )
+        if -amount_remaining >= amount_out:
+            sqrt_ratio_next_x96 = sqrt_ratio_target_x96
+        else:
+            sqrt_ratio_next_x96 = get_next_sqrt_price_from_output(
+                sqrt_ratio_current_x96, liquidity, -amount_remaining, zero_for_one
+            )
+    is_max = sqrt_ratio_target_x96 == sqrt_ratio_next_x96
+    if zero_for_one:
+        if not (is_max and exact_in):
+            amount_in = get_amount0_delta(
+                sqrt_ratio_next_x96, sqrt_ratio_current_x96, liquidity, True
+            )
+        if not (is_max and not exact_in):
+            amount_out = get_amount1_delta(
+                sqrt_ratio_next_x96, sqrt_ratio_current_x96, liquidity, False
+            )
+    else:
+        if not (is_max and exact_in):
+            amount_in = get_amount1_delta(
+                sqrt_ratio_current_x96, sqrt_ratio_next_x96, liquidity, True
+            )
+        if not (is_max and not exact_in):
+            amount_out = get_amount0_delta(
+                sqrt_ratio_current_x96, sqrt_ratio_next_x96, liquidity, False
+            )
+    # Cap the output amount to not exceed the remaining output amount
+    if not exact_in and amount_out > -amount_remaining:
+        amount_out = -amount_remaining
+    if exact_in and sqrt_ratio_next_x96 != sqrt_ratio_target_x96:
+        # Didn't reach the target so take the remainder of the maximum input as fee
+        fee_amount = amount_remaining - amount_in
+    else:
+        fee_amount = mul_div_rounding_up(amount_in, fee_pips, 10**6 - fee_pips)
+    return sqrt_ratio_next_x96, amount_in, amount_out, fee_amount
+
+
+# Cached pool state that replays UniswapV3Pool.swap off-chain
+class PoolState:
+    def __init__(self, sqrt_price_x96, tick, liquidity, fee, tick_spacing, tick_ladder):
+        self.sqrt_price_x96 = sqrt_price_x96
+        self.tick = tick
+        self.liquidity = liquidity
+        self.fee = fee
+        self.tick_spacing = tick_spacing
+        self.ticks = tick_ladder.ticks
+        self.liquidity_net = dict(
+            zip(tick_ladder.ticks.tolist(), tick_ladder.liquidity_net)
+        )
+        # Compressed initialized ticks, searched the same way the tick bitmap is walked
+        self.compressed_ticks = tick_ladder.ticks // tick_spacing
+
+    def next_initialized_tick_within_one_word(self, tick, lte):
+        # Mirrors TickBitmap.nextInitializedTickWithinOneWord, steps stop at word boundaries
+        compressed = tick // self.tick_spacing
+        if lte:
+            word_start = (compressed >> 8) << 8
+            index = int(
+                np.searchsorted(self.compressed_ticks, compressed, side="right")
+            )
+            if index > 0 and self.compressed_ticks[index - 1] >= word_start:
+                return int(self.compressed_ticks[index - 1]) * self.tick_spacing, True
+            return word_start * self.tick_spacing, False
+        compressed += 1
+        word_end = ((compressed >> 8) << 8) + 255
+        index = int(np.searchsorted(self.compressed_ticks, compressed, side="left"))
+        if (
+            index < len(self.compressed_ticks)
+            and self.compressed_ticks[index] <= word_end
+        ):
+            return int(self.compressed_ticks[index]) * self.tick_spacing, True
+        return word_end * self.tick_spacing, False
+
+    def swap(self, zero_for_one, amount_specified, sqrt_price_limit_x96=0):
+        # Returns (amount0, amount1, sqrt_price_x96_after) without mutating the cached state
+        if sqrt_price_limit_x96 == 0:
+            sqrt_price_limit_x96 = (
+                MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+            )
+        exact_input = amount_specified > 0
+        amount_specified_remaining = amount_specified
+        amount_calculated = 0
+        sqrt_price_x96 = self.sqrt_price_x96
+        tick = self.tick
+        liquidity = self.liquidity
+        while (
+            amount_specified_remaining != 0 and sqrt_price_x96 != sqrt_price_limit_x96
+        ):
+            sqrt_price_start_x96 = sqrt_price_x96
+            tick_next, initialized = self.next_initialized_tick_within_one_word(
+                tick, zero_for_one
+            )
+            tick_next = max(MIN_TICK, min(MAX_TICK, tick_next))
+            sqrt_price_next_x96 = get_sqrt_ratio_at_tick(tick_next)
+            if (
+                sqrt_price_next_x96 < sqrt_price_limit_x96
+                if zero_for_one
+                else sqrt_price_next_x96 > sqrt_price_limit_x96
+            ):
+                sqrt_price_target_x96 = sqrt_price_limit_x96
+            else:
+                sqrt_price_target_x96 = sqrt_price_next_x96
+            sqrt_price_x96, amount_in, amount_out, fee_amount = compute_swap_step(
+                sqrt_price_x96,
+                sqrt_price_target_x96,
+                liquidity,
+                amount_specified_remaining,
+                self.fee,
+            )
+            if exact_input:
+                amount_specified_remaining -= amount_in + fee_amount
+                amount_calculated -= amount_out
+            else:
+                amount_specified_remaining += amount_out
+                amount_calculated += amount_in + fee_amount
+            if sqrt_price_x96 == sqrt_price_next_x96:
+                # Cross the tick and apply its net liquidity
+                if initialized:
+                    liquidity_net = self.liquidity_net.get(tick_next, 0)
+                    liquidity += -liquidity_net if zero_for_one else liquidity_net
+                tick = tick_next - 1 if zero_for_one else tick_next
+            elif sqrt_price_x96 != sqrt_price_start_x96:
+                tick = get_tick_at_sqrt_ratio(sqrt_price_x96)
+        if zero_for_one == exact_input:
+            amount0 = amount_specified - amount_specified_remaining
+            amount1 = amount_calculated
+        else:
+            amount0 = amount_calculated
+            amount1 = amount_specified - amount_specified_remaining
+        return amount0, amount1, sqrt_price_x96
+
+    def quote_exact_output_single(self, zero_for_one, amount_out):
+        # Same result as QuoterV2.quoteExactOutputSingle with no price limit
+        amount0, amount1, _ = self.swap(zero_for_one, -amount_out)
+        amount_received = -amount1 if zero_for_one else -amount0
+        if amount_received != amount_out:
+            raise InsufficientLiquidity("Insufficient liquidity for output")
+        return amount0 if zero_for_one else amount1
+
+    def exact_input_single(self, zero_for_one, amount_in):
+        # Same result as SwapRouter.exactInputSingle with no price limit
+        amount0, amount1, _ = self.swap(zero_for_one, amount_in)
+        return -(amount1 if zero_for_one else amount0)
@@ -0,0 +1,149 @@
+# Import modules
+import json
+import os
+import config
+from web3 import Web3
+
+# Pool fees are given in hundredths of a basis point, as Uniswap v3 does
+FEE_DENOMINATOR = 1000000
+
+# Bot methods and ABI behind each protocol a venue can be declared with
+PROTOCOLS = {
+    "uniswap_v3": {
+        "abi": "uniswap_v3_pool",
+        "events": ["Swap"],
+        "price": "get_uniswap_v3_price",
+        "size": "calculate_uni_v3_trade_size",
+        "quote": "uniswap_v3_get_swap_out",
+        "snapshot": "add_uniswap_v3_snapshot_calls",
+        "event_price": "get_uniswap_v3_event_price",
+        "swap": "swap_via_uniswap",
+        "router_version": None,
+    },
+    "trader_joe_v1": {
+        "abi": "trader_joe_v1",
+        "events": ["Sync"],
+        "price": "get_tj_v1_price",
+        "size": "calculate_tj_v1_trade_size",
+        "quote": "tj_v1_get_swap_out",
+        "snapshot": "add_tj_v1_snapshot_calls",
+        "event_price": "get_tj_v1_event_price",
+        "swap": "swap_via_trader_joe",
+        "router_version": 0,
+    },
+    "trader_joe_v2": {
+        "abi": "trader_joe_v2",
+        "events": ["Swap"],
+        "price": "get_tj_v2_price",
+        "size": "calculate_tj_v2_trade_size",
+        "quote": "tj_v2_get_swap_out",
+        "snapshot": "add_tj_v2_snapshot_calls",
+        "event_price": "get_tj_v2_event_price",
+        "swap": "swap_via_trader_joe",
+        # TraderJoe router path version of V2.1 pairs
+        "router_version": 2,
+    },
+}
+
+
+# One pool as declared in the venue file
+class Venue:
+    def __init__(
+        self, chain_id, index, address, protocol, quote_asset, fee=None, bin_step=None
+    ):
+        assert protocol in PROTOCOLS, f"Unknown protocol {protocol} for {address}"
+        self.chain_id = chain_id
+        self.index = index
+        self.address = Web3.to_checksum_address(address)
+        self.protocol = protocol
+        # CoinGecko id of the pool's quote asset
+        self.quote_asset = quote_asset
+        self.fee = fee
+        self.bin_step = bin_step
+        self.abi_name = PROTOCOLS[protocol]["abi"]
+        self.event_names = PROTOCOLS[protocol]["events"]
+        self.router_version = PROTOCOLS[protocol]["router_version"]
+
+
+# An index product on one chain and what its bot needs to trade it
+class IndexListing:
+    def __init__(
+        self,
+        chain_id,
+        symbol,
+        address,
+        router,
+        wrapped_native,
+        zero_ex_base_url,
+        endpoint,
+        ws_endpoint,
+        profit_threshold,
+    ):
+        self.chain_id = chain_id
+        self.symbol = symbol
+        self.address = Web3.to_checksum_address(address)
+        self.router = Web3.to_checksum_address(router)
+        self.wrapped_native = Web3.to_checksum_address(wrapped_native)
+        self.zero_ex_base_url = zero_ex_base_url
+        # Names of the environment variables holding the node URLs
+        self.endpoint = endpoint
+        self.ws_endpoint = ws_endpoint
+        # Native units per mode, "dev" or "prod"
+        self.profit_threshold = profit_threshold
+
+
+# Indices and pools read once from the venue file
+class VenueRegistry:
+    def __init__(self, path):
+        with open(path) as f:
+            venue_file = json.load(f)
+        self.indices = [IndexListing(**i) for i in venue_file["indices"]]
+        self.venues = {}
+        for i in venue_file["venues"]:
+            venue = Venue(**i)
+            self.venues[(venue.chain_id, venue.address)] = venue
+
+    def get(self, chain_id, address):
+        return self.venues[(chain_id, Web3.to_checksum_address(address))]
+
+    def index(self, chain_id, address):
+        address = Web3.to_checksum_address(address)
+        return next(
+            i for i in self.indices if i.chain_id == chain_id and i.address == address
+        )
+
+    def pools(self, chain_id, index_symbol):
+        return [
+            i.address
+            for i in self.venues.values()
+            if i.chain_id == chain_id and i.index == index_symbol
+        ]
+
+
+# Venue bound to one bot, its functions are looked up once so dispatch is a single dict lookup
+class VenueAdapter:
+    def __init__(self, venue, bot):
+        methods = PROTOCOLS[venue.protocol]
+        self.venue = venue
+        self.chain_id = venue.chain_id
+        self.address = venue.address
+        self.protocol = venue.protocol
+        self.quote_asset = venue.quote_asset
+        self.fee = venue.fee
+        self.bin_step = venue.bin_step
+        self.abi_name = venue.abi_name
+        self.event_names = venue.event_names
+        self.router_version = venue.router_version
+        self.price = getattr(bot, methods["price"])
+        self.size = getattr(bot, methods["size"])
+        self.quote = getattr(bot, methods["quote"])
+        self.snapshot = getattr(bot, methods["snapshot"])
+        self.event_price = getattr(bot, methods["event_price"])
+        # Pricing on its own has no swap functions, those come with the arb bot
+        self.swap = getattr(bot, methods["swap"], None)
+
+
+# Loaded once for every bot
+venue_registry = VenueRegistry(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), config.venues_file)
+)
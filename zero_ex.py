@@ -0,0 +1,141 @@
+# Import modules
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Token bucket allowing rate requests per second with bursts of up to capacity
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Fetches 0x quotes concurrently over one pooled session, shared by every bot using the same API key
+class ZeroExQuoter:
+    def __init__(
+        self,
+        api_key,
+        rate,
+        burst,
+        max_workers,
+        max_retries,
+        backoff,
+        quote_ttl,
+        quote_block_window,
+    ):
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=max_workers, pool_maxsize=max_workers
+        )
+        self.session.mount("https://", adapter)
+        self.session.headers["0x-api-key"] = api_key
+        self.bucket = TokenBucket(rate, burst)
+        self.executor = ThreadPoolExecutor(max_workers)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # (chain, sellToken, buyToken, sellAmount, slippage) -> (quote, time fetched, block fetched at)
+        self.quotes = {}
+        self.quote_ttl = quote_ttl
+        self.quote_block_window = quote_block_window
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get_quote(self, base_url, query_params):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            response = self.session.get(base_url, params=query_params)
+            if response.status_code == 429 and attempt < self.max_retries:
+                # Honour Retry-After when given, otherwise back off exponentially
+                retry_after = response.headers.get("Retry-After")
+                delay = (
+                    float(retry_after)
+                    if retry_after is not None and retry_after.isdigit()
+                    else self.backoff * 2**attempt
+                )
+                print(f"0x rate limited, retrying in {delay}s")
+                time.sleep(delay)
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    @staticmethod
+    def quote_key(chain_id, query_params):
+        return (
+            chain_id,
+            query_params["sellToken"],
+            query_params["buyToken"],
+            int(query_params["sellAmount"]),
+            query_params["slippagePercentage"],
+        )
+
+    def cached_quote(self, chain_id, block_number, query_params):
+        with self.lock:
+            cached = self.quotes.get(self.quote_key(chain_id, query_params))
+            # Quotes are reused within a short time and block window, anything older is re-fetched
+            if (
+                cached is not None
+                and time.time() - cached[1] <= self.quote_ttl
+                and abs(block_number - cached[2]) <= self.quote_block_window[chain_id]
+            ):
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+            return None
+
+    def fetch_quote(self, base_url, chain_id, block_number, query_params):
+        quote = self.get_quote(base_url, query_params)
+        with self.lock:
+            now = time.time()
+            # Sell amounts differ on almost every cycle, so quotes past their TTL are dropped instead of piling up
+            self.quotes = {
+                i: j for i, j in self.quotes.items() if now - j[1] <= self.quote_ttl
+            }
+            self.quotes[self.quote_key(chain_id, query_params)] = (
+                quote,
+                now,
+                block_number,
+            )
+        return quote
+
+    def get_quotes(self, base_url, chain_id, block_number, query_params_list):
+        # Quotes are returned in the order requested, None entries need no quote
+        quotes = [
+            self.cached_quote(chain_id, block_number, i) if i is not None else None
+            for i in query_params_list
+        ]
+        futures = [
+            self.executor.submit(
+                self.fetch_quote, base_url, chain_id, block_number, query_params
+            )
+            if query_params is not None and quote is None
+            else None
+            for query_params, quote in zip(query_params_list, quotes)
+        ]
+        return [
+            future.result() if future is not None else quote
+            for future, quote in zip(futures, quotes)
+        ]
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self.quotes)}